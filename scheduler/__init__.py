@@ -4,6 +4,9 @@ import locale
 from customtkinter import CTkFrame, set_appearance_mode
 
 from scheduler import controllers, models, views
+from scheduler.background import BackgroundRunner
+from scheduler.cache import ResponseCache, default_cache_path
+from scheduler.keystore import KeyStore, default_key_store_path
 
 locale.setlocale(locale.LC_ALL, locale.getdefaultlocale())
 
@@ -16,7 +19,12 @@ class App(controllers.IApp):
         self.minsize(512, 512)
 
         self.frame: CTkFrame | None = None
-        self.model = models.AppLogicModel()
+        self.model = models.AppLogicModel(
+            cache=ResponseCache(default_cache_path()),
+            key_store=KeyStore(default_key_store_path()),
+        )
+        self.runner = BackgroundRunner(self.after)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.views = {}
         self.controllers = {}
 
@@ -34,9 +42,18 @@ class App(controllers.IApp):
     def get_model(self) -> models.AppLogicModel:
         return self.model
 
+    def get_runner(self) -> BackgroundRunner:
+        return self.runner
+
+    def on_close(self):
+        self.runner.shutdown()
+        self.destroy()
+
     def show_view(self, id: str):
         view_cls = self.views[id]
         controller = self.controllers[id]
+        # Results of the old view requests can't be shown anymore.
+        self.runner.cancel_all()
         if self.frame:
             self.frame.pack_forget()
             self.frame.destroy()
@@ -4,10 +4,20 @@ Provides functions for getting relevant tasks according to dates,
 computing metrics and sorting tasks according to the metrics values.
 """
 
-from datetime import datetime
-from typing import List
+import bisect
+import functools
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from scheduler.data_structures import Task
+from scheduler import data_structures
+from scheduler.data_structures import Task, from_epoch_ms, to_epoch_ms
+from scheduler.dependencies import DependencyGraph, order_by_dependencies
+from scheduler.formula import Formula, sticker_matches
 
 
 def relevant(task: Task, start_date: datetime, end_date: datetime) -> bool:
@@ -23,21 +33,40 @@ def relevant(task: Task, start_date: datetime, end_date: datetime) -> bool:
         otherwise
     :rtype: bool
     """
-    result = not task.archived and not task.completed
-    if task.deadline is not None:
-        result = result and task.deadline.deadline > start_date
-        if task.deadline.start_date is not None:
-            result = result and task.deadline.start_date < end_date
-    return result
+    return relevant_ms(task, to_epoch_ms(start_date), to_epoch_ms(end_date))
+
+
+def relevant_ms(task: Task, start_ms: int, end_ms: int) -> bool:
+    """Check if task may be done during time interval given in epoch
+    milliseconds.
+
+    :param task: Task to check
+    :type task: Task
+    :param start_ms: Start of time interval in epoch milliseconds
+    :type start_ms: int
+    :param end_ms: End of time interval in epoch milliseconds
+    :type end_ms: int
+    :return: True if task may be done during time interval, False
+        otherwise
+    :rtype: bool
+    """
+    if task.archived or task.completed:
+        return False
+    deadline = task.deadline
+    if deadline is None:
+        return True
+    return deadline.deadline_ms > start_ms and (
+        deadline.start_date_ms is None or deadline.start_date_ms < end_ms
+    )
 
 
 def get_relevant_tasks(
-    tasks: List[Task], start_date: datetime, end_date: datetime
+    tasks: Iterable[Task], start_date: datetime, end_date: datetime
 ) -> List[Task]:
     """Filter tasks that may be done between start_date and end_date.
 
-    :param tasks: List of tasks to filter
-    :type tasks: List[Task]
+    :param tasks: Tasks to filter, may be a lazy iterator
+    :type tasks: Iterable[Task]
     :param start_date: Start date of time interval
     :type start_date: datetime
     :param end_date: End date of time interval
@@ -45,8 +74,8 @@ def get_relevant_tasks(
     :return: Filtered list of tasks
     :rtype: List[Task]
     """
-    tasks = list(filter(lambda x: relevant(x, start_date, end_date), tasks))
-    return tasks
+    start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+    return [task for task in tasks if relevant_ms(task, start_ms, end_ms)]
 
 
 def count_deadline_metric(
@@ -63,13 +92,30 @@ def count_deadline_metric(
     :return: Metric value corresponding to task urgency
     :rtype: float
     """
-    if task.deadline is None:
+    return deadline_metric_ms(
+        task, to_epoch_ms(start_date), to_epoch_ms(end_date)
+    )
+
+
+def deadline_metric_ms(task: Task, start_ms: int, end_ms: int) -> float:
+    """Compute deadline metric for time interval given in epoch milliseconds.
+
+    :param task: Task for metric computation
+    :type task: Task
+    :param start_ms: Start of time interval in epoch milliseconds
+    :type start_ms: int
+    :param end_ms: End of time interval in epoch milliseconds
+    :type end_ms: int
+    :return: Metric value corresponding to task urgency
+    :rtype: float
+    """
+    deadline = task.deadline
+    if deadline is None:
         return 0
-    delta_deadline = (task.deadline.deadline - start_date).total_seconds()
+    delta_deadline = (deadline.deadline_ms - start_ms) / 1000
     delta_start = (
-        (end_date - task.deadline.start_date).total_seconds()
-        / (end_date - start_date).total_seconds()
-        if task.deadline.start_date is not None
+        (end_ms - deadline.start_date_ms) / (end_ms - start_ms)
+        if deadline.start_date_ms is not None
         else 1
     )
     if delta_start > 1:
@@ -83,10 +129,10 @@ def count_time_tracking_metric(task: Task) -> float:
     :param task: Task for metric computation
     :type task: Task
     :return: Metric value corresponding to the percentage of completed
-        work
+        work, 0 for tasks without time tracking or planned hours
     :rtype: float
     """
-    if task.time_tracking is None:
+    if task.time_tracking is None or task.time_tracking.plan == 0:
         return 0
     left = task.time_tracking.plan - task.time_tracking.work
     return left / task.time_tracking.plan
@@ -107,8 +153,39 @@ def count_priority_metric(
     :return: Metric value corresponding to task priority
     :rtype: float
     """
-    m_deadline = count_deadline_metric(task, start_date, end_date)
-    m_time_tracking = count_time_tracking_metric(task)
+    return priority_metric_ms(
+        task, to_epoch_ms(start_date), to_epoch_ms(end_date)
+    )
+
+
+def priority_metric_ms(task: Task, start_ms: int, end_ms: int) -> float:
+    """Compute priority metric for time interval given in epoch milliseconds.
+
+    :param task: Task for metric computation
+    :type task: Task
+    :param start_ms: Start of time interval in epoch milliseconds
+    :type start_ms: int
+    :param end_ms: End of time interval in epoch milliseconds
+    :type end_ms: int
+    :return: Metric value corresponding to task priority
+    :rtype: float
+    """
+    return combine_metrics(
+        deadline_metric_ms(task, start_ms, end_ms),
+        count_time_tracking_metric(task),
+    )
+
+
+def combine_metrics(m_deadline: float, m_time_tracking: float) -> float:
+    """Combine deadline and time tracking metrics into priority metric.
+
+    :param m_deadline: Deadline metric value
+    :type m_deadline: float
+    :param m_time_tracking: Time tracking metric value
+    :type m_time_tracking: float
+    :return: Metric value corresponding to task priority
+    :rtype: float
+    """
     if m_deadline == 0:
         return m_time_tracking
     elif m_time_tracking == 0:
@@ -116,24 +193,598 @@ def count_priority_metric(
     return m_deadline * m_time_tracking
 
 
+def formula_values_ms(
+    task: Task, formula: Formula, start_ms: int, end_ms: int
+) -> List[float]:
+    """Compute values of variables and stickers used in formula.
+
+    :param task: Task for metric computation
+    :type task: Task
+    :param formula: Compiled priority formula
+    :type formula: Formula
+    :param start_ms: Start of time interval in epoch milliseconds
+    :type start_ms: int
+    :param end_ms: End of time interval in epoch milliseconds
+    :type end_ms: int
+    :return: Arguments of the formula evaluators
+    :rtype: List[float]
+    """
+    deadline, time_tracking = task.deadline, task.time_tracking
+    values = []
+    for name in formula.variables:
+        if name == "m_deadline":
+            value = deadline_metric_ms(task, start_ms, end_ms)
+        elif name == "deadline_hours":
+            value = (
+                (deadline.deadline_ms - start_ms) / 3600000
+                if deadline is not None
+                else math.inf
+            )
+        elif name == "has_deadline":
+            value = float(deadline is not None)
+        elif name == "start_overlap":
+            value = 1.0
+            if deadline is not None and deadline.start_date_ms is not None:
+                value = min(
+                    (end_ms - deadline.start_date_ms) / (end_ms - start_ms), 1
+                )
+        elif name == "remaining":
+            value = count_time_tracking_metric(task)
+        elif name == "remaining_hours":
+            value = (
+                time_tracking.plan - time_tracking.work
+                if time_tracking is not None
+                else 0.0
+            )
+        else:
+            value = float(time_tracking is not None)
+        values.append(value)
+    for sticker in formula.stickers:
+        values.append(float(sticker_matches(task.stickers, sticker)))
+    return values
+
+
+def formula_metric_ms(
+    task: Task, formula: Formula, start_ms: int, end_ms: int
+) -> float:
+    """Compute user-defined priority metric for time interval given in epoch
+    milliseconds.
+
+    :param task: Task for metric computation
+    :type task: Task
+    :param formula: Compiled priority formula
+    :type formula: Formula
+    :param start_ms: Start of time interval in epoch milliseconds
+    :type start_ms: int
+    :param end_ms: End of time interval in epoch milliseconds
+    :type end_ms: int
+    :return: Metric value corresponding to task priority
+    :rtype: float
+    """
+    return formula.evaluate(formula_values_ms(task, formula, start_ms, end_ms))
+
+
+class MetricCache:
+    """Bounded LRU cache of metric results.
+
+    Results are keyed by the content version of ranked tasks and the
+    time interval, so a changed snapshot gets a new key and its old
+    results are evicted as least recently used.
+
+    :param max_size: Maximum number of stored results
+    :param hits: Number of results found in the cache
+    :param misses: Number of computed results
+    """
+
+    def __init__(self, max_size: int = 32):
+        """Create empty cache.
+
+        :param max_size: Maximum number of stored results
+        :type max_size: int
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.values: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get number of stored results.
+
+        :return: Number of stored results
+        :rtype: int
+        """
+        return len(self.values)
+
+    def lookup(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Get result by key, computing it on cache miss.
+
+        :param key: Content version, time interval and other arguments
+            the result depends on
+        :type key: Hashable
+        :param compute: Function computing the result
+        :type compute: Callable[[], Any]
+        :return: Stored or computed result
+        :rtype: Any
+        """
+        with self.lock:
+            if key in self.values:
+                self.values.move_to_end(key)
+                self.hits += 1
+                return self.values[key]
+            self.misses += 1
+        value = compute()
+        with self.lock:
+            self.values[key] = value
+            if len(self.values) > self.max_size:
+                self.values.popitem(last=False)
+        return value
+
+    def hit_rate(self) -> float:
+        """Get share of lookups served from the cache.
+
+        :return: Hit rate, 0 if there were no lookups
+        :rtype: float
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    def clear(self):
+        """Remove stored results and reset counters."""
+        with self.lock:
+            self.values.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _formula_priority(
+    formula: Formula, task: Task, start_ms: int, end_ms: int
+) -> float:
+    return formula_metric_ms(task, formula, start_ms, end_ms)
+
+
 def sort_tasks(
-    tasks: List[Task], start_date: datetime, end_date: datetime
+    tasks: Iterable[Task],
+    start_date: datetime,
+    end_date: datetime,
+    formula: Optional[Formula] = None,
 ) -> List[Task]:
     """Sort tasks according to their priority.
 
-    :param tasks: List of tasks to sort
-    :type tasks: List[Task]
+    :param tasks: Tasks to sort, may be a lazy iterator such as
+        AppLogicModel.iter_tasks
+    :type tasks: Iterable[Task]
     :param start_date: Start date of time interval
     :type start_date: datetime
     :param end_date: End date of time interval
     :type end_date: datetime
+    :param formula: User-defined priority formula, which replaces the
+        built-in priority metric
+    :type formula: Optional[Formula]
     :return: Sorted list of tasks with most prioritized tasks in the
         beginning
     :rtype: List[Task]
     """
-    relevant_tasks = get_relevant_tasks(tasks, start_date, end_date)
+    start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+    priority = priority_metric_ms
+    if formula is not None:
+        priority = functools.partial(_formula_priority, formula)
+    relevant_tasks = [
+        task for task in tasks if relevant_ms(task, start_ms, end_ms)
+    ]
     return sorted(
         relevant_tasks,
-        key=lambda x: count_priority_metric(x, start_date, end_date),
+        key=lambda x: priority(x, start_ms, end_ms),
         reverse=True,
     )
+
+
+class RunningRanking:
+    """Tasks sorted by priority while they arrive in batches, for example
+    column by column.
+
+    Every batch is sorted and merged into the current order, so after
+    every batch the order is the result of sort_tasks for all tasks
+    arrived so far in the order of arrival. Dependencies between tasks
+    are ignored. Tasks with IDs which were already added are skipped.
+
+    :param tasks: Sorted relevant tasks with most prioritized tasks in
+        the beginning, the list is replaced by every batch and never
+        changed in place, so it may be passed to another thread
+    :param priorities: Priorities of the sorted tasks
+    :param ids: IDs of all added tasks
+    """
+
+    def __init__(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        formula: Optional[Formula] = None,
+    ):
+        """Create empty ranking.
+
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :param formula: User-defined priority formula, the built-in
+            priority metric if not specified
+        :type formula: Optional[Formula]
+        """
+        self.start_ms = to_epoch_ms(start_date)
+        self.end_ms = to_epoch_ms(end_date)
+        self.priority = (
+            priority_metric_ms
+            if formula is None
+            else functools.partial(_formula_priority, formula)
+        )
+        self.tasks: List[Task] = []
+        self.priorities: List[float] = []
+        self.ids = set()
+
+    def add(self, tasks: Iterable[Task]):
+        """Merge batch of tasks into the ranking.
+
+        :param tasks: Arrived tasks
+        :type tasks: Iterable[Task]
+        """
+        batch = []
+        for task in tasks:
+            if task.id in self.ids:
+                continue
+            self.ids.add(task.id)
+            if relevant_ms(task, self.start_ms, self.end_ms):
+                priority = self.priority(task, self.start_ms, self.end_ms)
+                batch.append((priority, task))
+        if not batch:
+            return
+        # Both sorts are stable, and merge() takes equal items from the
+        # current order first, so ties keep the order of arrival.
+        batch.sort(key=lambda item: item[0], reverse=True)
+        merged = list(
+            heapq.merge(
+                zip(self.priorities, self.tasks),
+                batch,
+                key=lambda item: item[0],
+                reverse=True,
+            )
+        )
+        self.priorities = [priority for priority, _ in merged]
+        self.tasks = [task for _, task in merged]
+
+
+def sort_tasks_by_windows(
+    tasks: Iterable[Task], windows: Iterable[Tuple[datetime, datetime]]
+) -> List[List[Task]]:
+    """Sort tasks according to their priority for every time interval.
+
+    Tasks are read once: archived and completed ones are dropped, the
+    time tracking metric, which doesn't depend on time interval, is
+    computed once per task and tasks are ordered by deadline, so every
+    interval skips tasks with passed deadlines by binary search.
+
+    :param tasks: Tasks to sort, may be a lazy iterator
+    :type tasks: Iterable[Task]
+    :param windows: Start and end dates of time intervals
+    :type windows: Iterable[Tuple[datetime, datetime]]
+    :return: Results of sort_tasks for every time interval
+    :rtype: List[List[Task]]
+    """
+    active = [
+        task for task in tasks if not task.archived and not task.completed
+    ]
+    m_time_tracking = [count_time_tracking_metric(task) for task in active]
+    no_deadline = [i for i, task in enumerate(active) if task.deadline is None]
+    by_deadline = sorted(
+        (i for i, task in enumerate(active) if task.deadline is not None),
+        key=lambda i: active[i].deadline.deadline_ms,
+    )
+    deadlines = [active[i].deadline.deadline_ms for i in by_deadline]
+    start_dates = [active[i].deadline.start_date_ms for i in by_deadline]
+
+    rankings = []
+    for start_date, end_date in windows:
+        start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+        first = bisect.bisect_right(deadlines, start_ms)
+        priority = m_time_tracking.copy()
+        rows = no_deadline.copy()
+        for k in range(first, len(by_deadline)):
+            # Same computations as relevant_ms and deadline_metric_ms.
+            start = start_dates[k]
+            if start is None:
+                delta_start = 1
+            elif start < end_ms:
+                delta_start = (end_ms - start) / (end_ms - start_ms)
+                if delta_start > 1:
+                    delta_start = 1
+            else:
+                continue
+            i = by_deadline[k]
+            delta_deadline = (deadlines[k] - start_ms) / 1000
+            priority[i] = combine_metrics(
+                delta_start / (delta_deadline**2), m_time_tracking[i]
+            )
+            rows.append(i)
+        # Ties keep the order of tasks, like in sort_tasks.
+        rows.sort()
+        rows.sort(key=priority.__getitem__, reverse=True)
+        rankings.append([active[i] for i in rows])
+    return rankings
+
+
+def _ranking_keys(
+    tasks: Iterable[Task],
+    start_date: datetime,
+    end_date: datetime,
+) -> List[Tuple[float, int, Task]]:
+    """Get heap keys of relevant tasks, ties are broken by the task position,
+    like in stable sort_tasks."""
+    start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+    return [
+        (-priority_metric_ms(task, start_ms, end_ms), i, task)
+        for i, task in enumerate(tasks)
+        if relevant_ms(task, start_ms, end_ms)
+    ]
+
+
+def top_k_tasks(
+    tasks: Iterable[Task],
+    start_date: datetime,
+    end_date: datetime,
+    k: int,
+) -> List[Task]:
+    """Get k most prioritized tasks without sorting all of them.
+
+    The result is the same as sort_tasks(tasks, start_date,
+    end_date)[:k].
+
+    :param tasks: Tasks to rank, may be a lazy iterator
+    :type tasks: Iterable[Task]
+    :param start_date: Start date of time interval
+    :type start_date: datetime
+    :param end_date: End date of time interval
+    :type end_date: datetime
+    :param k: Number of tasks to return
+    :type k: int
+    :return: Sorted list of at most k tasks with most prioritized tasks
+        in the beginning
+    :rtype: List[Task]
+    """
+    keys = _ranking_keys(tasks, start_date, end_date)
+    return [task for _, _, task in heapq.nsmallest(k, keys)]
+
+
+def iter_ranked_tasks(
+    tasks: Iterable[Task],
+    start_date: datetime,
+    end_date: datetime,
+) -> Iterator[Task]:
+    """Iterate over relevant tasks in the order of sort_tasks, sorting only as
+    many tasks as are taken.
+
+    :param tasks: Tasks to rank, may be a lazy iterator
+    :type tasks: Iterable[Task]
+    :param start_date: Start date of time interval
+    :type start_date: datetime
+    :param end_date: End date of time interval
+    :type end_date: datetime
+    :return: Iterator over tasks with most prioritized tasks in the
+        beginning
+    :rtype: Iterator[Task]
+    """
+    heap = _ranking_keys(tasks, start_date, end_date)
+    heapq.heapify(heap)
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def sort_tasks_by_dependencies(
+    tasks: Iterable[Task], start_date: datetime, end_date: datetime
+) -> List[Task]:
+    """Sort tasks according to their priority so that subtasks go before their
+    parents.
+
+    :param tasks: Tasks to sort, may be a lazy iterator
+    :type tasks: Iterable[Task]
+    :param start_date: Start date of time interval
+    :type start_date: datetime
+    :param end_date: End date of time interval
+    :type end_date: datetime
+    :return: Sorted list of relevant tasks
+    :rtype: List[Task]
+    """
+    start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+    relevant_tasks = [
+        task for task in tasks if relevant_ms(task, start_ms, end_ms)
+    ]
+    priorities = [
+        priority_metric_ms(task, start_ms, end_ms) for task in relevant_tasks
+    ]
+    return [
+        relevant_tasks[i]
+        for i in order_by_dependencies(relevant_tasks, priorities)
+    ]
+
+
+def build_schedule(
+    tasks: Iterable[Task],
+    start_day: date,
+    end_day: date,
+    daily_capacity: float,
+) -> data_structures.Schedule:
+    """Distribute remaining hours of tasks over days.
+
+    Every day the capacity is filled with tasks available that day,
+    which are kept in a heap ordered by the earliest deadline and then
+    by priority for the whole span. A task becomes available on its
+    start date and isn't scheduled after its deadline day. Only relevant
+    tasks with time tracking and hours left are scheduled.
+
+    A task becomes available only after all its scheduled subtasks are
+    done, subtasks inherit deadline and priority of their parents. If a
+    subtask misses its deadline, its parent stays unscheduled.
+
+    :param tasks: Tasks to schedule, may be a lazy iterator
+    :type tasks: Iterable[Task]
+    :param start_day: First day of the span
+    :type start_day: date
+    :param end_day: Last day of the span
+    :type end_day: date
+    :param daily_capacity: Working hours per day
+    :type daily_capacity: float
+    :return: Schedule of every day and hours which didn't fit
+    :rtype: data_structures.Schedule
+    """
+    start_ms = to_epoch_ms(datetime.combine(start_day, time()))
+    end_ms = to_epoch_ms(datetime.combine(end_day, time(23, 59, 59)))
+    first, last = start_day.toordinal(), end_day.toordinal()
+
+    candidates = []
+    for task in tasks:
+        time_tracking = task.time_tracking
+        if time_tracking is None or not relevant_ms(task, start_ms, end_ms):
+            continue
+        hours = time_tracking.plan - time_tracking.work
+        if hours <= 0:
+            continue
+        release, due = first, float("inf")
+        if task.deadline is not None:
+            due = from_epoch_ms(task.deadline.deadline_ms).toordinal()
+            if task.deadline.start_date_ms is not None:
+                start = from_epoch_ms(task.deadline.start_date_ms)
+                release = max(first, start.toordinal())
+        priority = priority_metric_ms(task, start_ms, end_ms)
+        candidates.append((release, due, priority, task, hours))
+
+    graph = DependencyGraph(candidate[3] for candidate in candidates)
+    dues = graph.propagate(
+        {candidate[3].id: candidate[1] for candidate in candidates}, min
+    )
+    priorities = graph.propagate(
+        {candidate[3].id: candidate[2] for candidate in candidates}
+    )
+    position = {candidate[3].id: i for i, candidate in enumerate(candidates)}
+    pending = [
+        len(graph.children[candidate[3].id]) for candidate in candidates
+    ]
+    released = [False] * len(candidates)
+    waiting = []
+    left = {}
+    for i, (release, _, _, task, hours) in enumerate(candidates):
+        waiting.append((release, dues[task.id], -priorities[task.id], i, task))
+        left[i] = hours
+    waiting_by_position = list(waiting)
+    waiting.sort(key=lambda item: (item[0], item[3]))
+
+    schedule = data_structures.Schedule()
+    available: List[Tuple[float, float, int, Task]] = []
+    j = 0
+    for ordinal in range(first, last + 1):
+        while j < len(waiting) and waiting[j][0] <= ordinal:
+            i = waiting[j][3]
+            released[i] = True
+            if not pending[i]:
+                heapq.heappush(available, waiting[j][1:])
+            j += 1
+        day = data_structures.DaySchedule(
+            date.fromordinal(ordinal), free_hours=daily_capacity
+        )
+        while available and day.free_hours > 0:
+            due, _, i, task = available[0]
+            if due < ordinal:
+                # Deadline has passed, the rest stays unscheduled.
+                heapq.heappop(available)
+                continue
+            hours = min(left[i], day.free_hours)
+            day.slots.append(data_structures.Slot(task, hours))
+            day.free_hours -= hours
+            left[i] -= hours
+            if left[i] > 0:
+                continue
+            heapq.heappop(available)
+            for parent_id in graph.parents[task.id]:
+                k = position[parent_id]
+                pending[k] -= 1
+                if not pending[k] and released[k]:
+                    heapq.heappush(available, waiting_by_position[k][1:])
+        schedule.days.append(day)
+
+    schedule.unscheduled = {
+        waiting_task[4].id: left[waiting_task[3]]
+        for waiting_task in waiting
+        if left[waiting_task[3]] > 0
+    }
+    return schedule
+
+
+def build_team_plan(
+    tasks: Iterable[Task],
+    start_date: datetime,
+    end_date: datetime,
+    capacities: Dict[str, float],
+) -> data_structures.TeamPlan:
+    """Distribute remaining hours of tasks between people by list scheduling.
+
+    Tasks are taken in the order of sort_tasks_by_dependencies and every
+    task goes as a whole to the one of its assignees with the most free
+    hours. Tasks without assignees go to the person with the most free
+    hours in the team, who is found in a heap of people by free hours.
+    Only relevant tasks with time tracking and hours left are planned.
+
+    :param tasks: Tasks to plan, may be a lazy iterator
+    :type tasks: Iterable[Task]
+    :param start_date: Start date of time interval
+    :type start_date: datetime
+    :param end_date: End date of time interval
+    :type end_date: datetime
+    :param capacities: Working hours during the interval by user ID,
+        assignees missing here don't take tasks
+    :type capacities: Dict[str, float]
+    :return: Plan of every person and hours which didn't fit
+    :rtype: data_structures.TeamPlan
+    """
+    start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+    candidates = []
+    priorities = []
+    for task in tasks:
+        time_tracking = task.time_tracking
+        if time_tracking is None or time_tracking.plan <= time_tracking.work:
+            continue
+        if relevant_ms(task, start_ms, end_ms):
+            candidates.append(task)
+            priorities.append(priority_metric_ms(task, start_ms, end_ms))
+
+    plan = data_structures.TeamPlan(
+        {
+            user_id: data_structures.WorkerPlan(user_id, free_hours=hours)
+            for user_id, hours in capacities.items()
+        }
+    )
+    workers = plan.workers
+    # Entries become stale when free hours of the person change, they are
+    # skipped instead of being removed.
+    team = [(-hours, user_id) for user_id, hours in capacities.items()]
+    heapq.heapify(team)
+    for i in order_by_dependencies(candidates, priorities):
+        task = candidates[i]
+        hours = task.time_tracking.plan - task.time_tracking.work
+        worker = None
+        if task.assigned:
+            for user_id in task.assigned:
+                other = workers.get(user_id)
+                if other is not None and (
+                    worker is None or other.free_hours > worker.free_hours
+                ):
+                    worker = other
+        else:
+            while team and -team[0][0] != workers[team[0][1]].free_hours:
+                heapq.heappop(team)
+            if team:
+                worker = workers[team[0][1]]
+        if worker is None or worker.free_hours < hours:
+            plan.unscheduled[task.id] = hours
+            continue
+        worker.slots.append(data_structures.Slot(task, hours))
+        worker.free_hours -= hours
+        heapq.heappush(team, (-worker.free_hours, worker.user_id))
+    return plan
@@ -0,0 +1,268 @@
+"""Execution of model calls off the Tk main thread.
+
+Tk widgets may be used only from the thread running the main loop, so
+BackgroundRunner runs calls in a worker thread and passes their results
+back through a queue, which the main thread drains by after() polling.
+Requests are identified by keys: a new request supersedes the pending
+request with the same key, which is cancelled if it didn't start yet and
+whose result is dropped otherwise. Streamed requests deliver
+intermediate results of an iterator before the final one.
+"""
+
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generator, Optional
+
+POLL_INTERVAL = 50
+"""Milliseconds between checks of finished requests."""
+
+
+class Request:
+    """Call submitted to BackgroundRunner.
+
+    :param key: Key of the request, at most one request per key is
+        delivered
+    :param function: Called in the worker thread
+    :param on_done: Called in the main thread with the result
+    :param on_error: Called in the main thread with the raised exception
+    :param on_progress: Called in the main thread with intermediate
+        results of streamed requests
+    :param future: Future of the call
+    :param cancelled: Flag of superseded or cancelled request, which
+        results are never delivered
+    """
+
+    def __init__(
+        self,
+        key: str,
+        function: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_progress: Optional[Callable[[Any], None]] = None,
+    ):
+        """Create request, which isn't submitted yet.
+
+        :param key: Key of the request
+        :type key: str
+        :param function: Function to call in the worker thread
+        :type function: Callable[[], Any]
+        :param on_done: Function to call with the result in the main
+            thread
+        :type on_done: Callable[[Any], None]
+        :param on_error: Function to call with the raised exception in
+            the main thread, the exception is printed if not specified
+        :type on_error: Optional[Callable[[Exception], None]]
+        :param on_progress: Function to call with intermediate results in
+            the main thread, if specified, function is a generator
+            function yielding them
+        :type on_progress: Optional[Callable[[Any], None]]
+        """
+        self.key = key
+        self.function = function
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future: Optional[Future] = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Drop the result and cancel the call if it didn't start yet."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class BackgroundRunner:
+    """Runner of calls in a worker thread with results delivered to the main
+    thread.
+
+    There is one worker thread, so calls never run concurrently and the
+    model doesn't need to be thread-safe. A superseded call which
+    already started runs to the end, but its result is dropped.
+
+    :param schedule: Tk after method of any widget, schedules a function
+        call in the main thread after given milliseconds
+    :param requests: Pending requests by key
+    :param results: Finished requests and their results, filled by the
+        worker thread
+    :param polling: Flag whether the next check of results is scheduled
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[int, Callable[[], None]], Any],
+        poll_interval: int = POLL_INTERVAL,
+    ):
+        """Create runner with idle worker thread.
+
+        :param schedule: Tk after method of any widget
+        :type schedule: Callable[[int, Callable[[], None]], Any]
+        :param poll_interval: Milliseconds between checks of finished
+            requests
+        :type poll_interval: int
+        """
+        self.schedule = schedule
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.requests: Dict[str, Request] = {}
+        self.results: queue.SimpleQueue = queue.SimpleQueue()
+        self.polling = False
+
+    def submit(
+        self,
+        key: str,
+        function: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> Request:
+        """Run function in the worker thread superseding the pending request
+        with the same key. Should be called from the main thread.
+
+        :param key: Key of the request
+        :type key: str
+        :param function: Function to call in the worker thread
+        :type function: Callable[[], Any]
+        :param on_done: Function to call with the result in the main
+            thread
+        :type on_done: Callable[[Any], None]
+        :param on_error: Function to call with the raised exception in
+            the main thread, the exception is printed if not specified
+        :type on_error: Optional[Callable[[Exception], None]]
+        :return: Submitted request
+        :rtype: Request
+        """
+        return self._submit(Request(key, function, on_done, on_error))
+
+    def submit_stream(
+        self,
+        key: str,
+        function: Callable[[], Generator[Any, None, Any]],
+        on_progress: Callable[[Any], None],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> Request:
+        """Run generator in the worker thread superseding the pending request
+        with the same key. Yielded items are passed to on_progress as soon as
+        they are produced, the value returned by the generator is passed to
+        on_done. Items followed by newer results before the main thread checks
+        them are skipped. The generator is closed as soon as the request is
+        superseded or cancelled. Should be called from the main thread.
+
+        :param key: Key of the request
+        :type key: str
+        :param function: Generator function yielding intermediate results
+            and returning the final one
+        :type function: Callable[[], Generator[Any, None, Any]]
+        :param on_progress: Function to call with intermediate results in
+            the main thread
+        :type on_progress: Callable[[Any], None]
+        :param on_done: Function to call with the final result in the
+            main thread
+        :type on_done: Callable[[Any], None]
+        :param on_error: Function to call with the raised exception in
+            the main thread, the exception is printed if not specified
+        :type on_error: Optional[Callable[[Exception], None]]
+        :return: Submitted request
+        :rtype: Request
+        """
+        return self._submit(
+            Request(key, function, on_done, on_error, on_progress)
+        )
+
+    def _submit(self, request: Request) -> Request:
+        self.cancel(request.key)
+        self.requests[request.key] = request
+        request.future = self.executor.submit(self._run, request)
+        if not self.polling:
+            self.polling = True
+            self.schedule(self.poll_interval, self.poll)
+        return request
+
+    def _run(self, request: Request):
+        if request.cancelled:
+            return
+        try:
+            if request.on_progress is None:
+                result = (True, request.function())
+            else:
+                result = (True, self._iterate(request))
+        except Exception as e:
+            result = (False, e)
+        self.results.put((request, result))
+
+    def _iterate(self, request: Request) -> Any:
+        generator = request.function()
+        try:
+            while not request.cancelled:
+                # None marks intermediate results.
+                self.results.put((request, (None, next(generator))))
+        except StopIteration as stop:
+            return stop.value
+        generator.close()
+        return None
+
+    def cancel(self, key: str):
+        """Cancel the pending request with the key.
+
+        :param key: Key of the request
+        :type key: str
+        """
+        request = self.requests.pop(key, None)
+        if request is not None:
+            request.cancel()
+
+    def cancel_all(self):
+        """Cancel all pending requests, for example before the view receiving
+        their results is destroyed."""
+        for key in list(self.requests):
+            self.cancel(key)
+
+    def is_pending(self, key: str) -> bool:
+        """Check if the request with the key wasn't delivered yet.
+
+        :param key: Key of the request
+        :type key: str
+        :return: True if the request is pending
+        :rtype: bool
+        """
+        return key in self.requests
+
+    def poll(self):
+        """Deliver results of finished requests.
+
+        Called in the main thread by after() while there are pending
+        requests.
+        """
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        latest = {id(request): i for i, (request, _) in enumerate(finished)}
+        for i, (request, (ok, value)) in enumerate(finished):
+            if request.cancelled or self.requests.get(request.key) is not (
+                request
+            ):
+                continue
+            if ok is None:
+                # Only the newest intermediate result is worth showing.
+                if latest[id(request)] == i:
+                    request.on_progress(value)
+                continue
+            del self.requests[request.key]
+            if ok:
+                request.on_done(value)
+            elif request.on_error is not None:
+                request.on_error(value)
+            else:
+                print(value)
+        if self.requests:
+            self.schedule(self.poll_interval, self.poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        """Cancel pending requests and stop the worker thread."""
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,230 @@
+"""Persistent cache for YouGile responses.
+
+Responses are stored in SQLite database keyed by request, every entity
+type has its own time to live and the least recently used entries are
+evicted when the cache grows over its size limit.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_TTLS = {
+    "ProjectController_search": 600,
+    "BoardController_search": 600,
+    "BoardController_get": 600,
+    "ColumnController_search": 300,
+    "TaskController_search": 60,
+}
+
+
+def default_cache_path() -> str:
+    """Get path of the cache database in the user cache directory.
+
+    :return: Path to the cache database
+    :rtype: str
+    """
+    cache_dir = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_dir, "SmartScheduler", "responses.sqlite")
+
+
+class CachedResponse:
+    """Response restored from cache, mimics used part of requests.Response.
+
+    :param status_code: HTTP status code
+    :param payload: Decoded JSON body
+    :param etag: ETag header of the original response
+    :param fresh: False if time to live of the entry has expired
+    """
+
+    def __init__(
+        self,
+        payload: Any,
+        status_code: int = 200,
+        etag: Optional[str] = None,
+        fresh: bool = True,
+    ):
+        """Create response from decoded JSON body.
+
+        :param payload: Decoded JSON body
+        :type payload: Any
+        :param status_code: HTTP status code
+        :type status_code: int
+        :param etag: ETag header of the original response
+        :type etag: Optional[str]
+        :param fresh: False if time to live of the entry has expired
+        :type fresh: bool
+        """
+        self.payload = payload
+        self.status_code = status_code
+        self.etag = etag
+        self.fresh = fresh
+
+    def json(self) -> Any:
+        """Get decoded JSON body.
+
+        :return: Decoded JSON body
+        :rtype: Any
+        """
+        return self.payload
+
+
+class ResponseCache:
+    """SQLite storage of YouGile responses with TTL and LRU eviction.
+
+    Entries older than their time to live are still returned as stale
+    during stale_ttl seconds, so callers may revalidate them in the
+    background.
+
+    :param path: Path to the database, ":memory:" for in-memory cache
+    :param max_entries: Maximum number of stored responses
+    :param ttls: Time to live in seconds by request model name
+    :param default_ttl: Time to live for models missing in ttls
+    :param stale_ttl: Seconds after expiration during which entry is
+        served as stale
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_entries: int = 10000,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 60,
+        stale_ttl: float = 3600,
+    ):
+        """Open or create cache database.
+
+        :param path: Path to the database, ":memory:" for in-memory
+            cache
+        :type path: str
+        :param max_entries: Maximum number of stored responses
+        :type max_entries: int
+        :param ttls: Time to live in seconds by request model name,
+            DEFAULT_TTLS if not specified
+        :type ttls: Optional[Dict[str, float]]
+        :param default_ttl: Time to live for models missing in ttls
+        :type default_ttl: float
+        :param stale_ttl: Seconds after expiration during which entry is
+            served as stale
+        :type stale_ttl: float
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, entity TEXT, payload TEXT, etag TEXT, "
+                "stored_at REAL, accessed_at REAL)"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_lru "
+                "ON responses (accessed_at)"
+            )
+
+    def get(self, key: str, entity: str) -> Optional[CachedResponse]:
+        """Get stored response.
+
+        :param key: Request key
+        :type key: str
+        :param entity: Request model name
+        :type entity: str
+        :return: Stored response or None if it is missing or expired
+            for longer than stale_ttl
+        :rtype: Optional[CachedResponse]
+        """
+        now = time.time()
+        with self.lock, self.db:
+            row = self.db.execute(
+                "SELECT payload, etag, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            payload, etag, stored_at = row
+            ttl = self.ttls.get(entity, self.default_ttl)
+            if now - stored_at >= ttl + self.stale_ttl:
+                return None
+            self.db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+        return CachedResponse(
+            json.loads(payload), etag=etag, fresh=now - stored_at < ttl
+        )
+
+    def put(
+        self, key: str, entity: str, payload: Any, etag: Optional[str] = None
+    ):
+        """Store response and evict least recently used ones over limit.
+
+        :param key: Request key
+        :type key: str
+        :param entity: Request model name
+        :type entity: str
+        :param payload: Decoded JSON body
+        :type payload: Any
+        :param etag: ETag header of the response
+        :type etag: Optional[str]
+        """
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, entity, json.dumps(payload), etag, now, now),
+            )
+            self.db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM "
+                "responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def touch(self, key: str):
+        """Mark stored response as fresh after successful revalidation.
+
+        :param key: Request key
+        :type key: str
+        """
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? "
+                "WHERE key = ?",
+                (now, now, key),
+            )
+
+    def clear(self, entities: Optional[Iterable[str]] = None):
+        """Remove stored responses.
+
+        :param entities: Request model names to remove responses of, all
+            responses are removed if not specified
+        :type entities: Optional[Iterable[str]]
+        """
+        with self.lock, self.db:
+            if entities is None:
+                self.db.execute("DELETE FROM responses")
+            else:
+                self.db.executemany(
+                    "DELETE FROM responses WHERE entity = ?",
+                    [(entity,) for entity in entities],
+                )
+
+    def __len__(self) -> int:
+        """Get number of stored responses.
+
+        :return: Number of stored responses
+        :rtype: int
+        """
+        with self.lock:
+            row = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return row[0]
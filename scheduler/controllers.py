@@ -1,12 +1,14 @@
 import gettext
 import locale
 import os
-from datetime import date, datetime, time
-from typing import List
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Generator, List, Optional, Tuple
 
 from customtkinter import CTk
 
 from scheduler import data_structures, models, views
+from scheduler.background import BackgroundRunner
+from scheduler.table import TaskRanking
 
 locale.setlocale(locale.LC_ALL, locale.getdefaultlocale())
 
@@ -15,6 +17,16 @@ translation = gettext.translation(
 )
 _ = translation.gettext
 
+PROJECTS_REQUEST = "projects"
+"""Key of background requests of project names."""
+
+BOARDS_REQUEST = "boards"
+"""Key of background requests of board names."""
+
+TASKS_REQUEST = "tasks"
+"""Key of background requests of tasks and plans, which are shown in the same
+area and supersede each other."""
+
 
 class IApp(CTk):
     """Interface of application to be used in controllers."""
@@ -33,6 +45,17 @@ class IApp(CTk):
         """
         raise NotImplementedError()
 
+    def get_runner(self) -> BackgroundRunner:
+        """This method provides access to the runner of model calls off the
+        main thread.
+
+        :raises NotImplementedError: interface is not intended to be
+            called
+        :return: return the instance of BackgroundRunner
+        :rtype: BackgroundRunner
+        """
+        raise NotImplementedError()
+
     def show_view(self, id: str):
         """Show the view with the given id.
 
@@ -108,36 +131,64 @@ class BoardController(views.IBoardController):
         self.projects: List[data_structures.Project] = []
         self.boards: List[data_structures.Board] = []
 
-    def get_project_names(self) -> List[str]:
-        """Returns project names. Always requested by BoardView.
+    def get_project_names(self, view: views.BoardView):
+        """Start loading project names in background, they are passed to
+        view.show_project_names. Always requested by BoardView.
 
-        :return: list of project names
-        :rtype: List[str]
+        :param view: the view
+        :type view: views.BoardView
         """
-        self.projects = self.app.get_model().get_projects()
-        return [prj.title for prj in self.projects]
+        model = self.app.get_model()
+
+        def on_done(projects: List[data_structures.Project]):
+            self.projects = projects
+            view.show_project_names([prj.title for prj in projects])
+
+        view.show_projects_loading()
+        self.app.get_runner().submit(
+            PROJECTS_REQUEST,
+            model.get_projects,
+            on_done,
+            lambda e: view.display_internal_error(),
+        )
 
     def get_board_names_by_project_name(
         self, view: views.BoardView, project_name: str
-    ) -> List[str]:
-        """Given the project name returns list of borad names to display in
-        BoardView.
+    ):
+        """Start loading names of boards of the project in background, they are
+        passed to view.show_board_names. Choosing another project supersedes
+        the request.
 
         :param view: the view
         :type view: views.BoardView
         :param project_name: project name
         :type project_name: str
-        :return: list of board names
-        :rtype: List[str]
         """
+        self.boards = []
         try:
-            self.boards = self.app.get_model().get_boards_by_project(
-                find_by_title(self.projects, project_name)
-            )
-        except Exception:
+            project = find_by_title(self.projects, project_name)
+        except RuntimeError:
+            self.app.get_runner().cancel(BOARDS_REQUEST)
             view.display_internal_error()
-            return []
-        return [board.title for board in self.boards]
+            view.show_board_names([])
+            return
+        model = self.app.get_model()
+
+        def on_done(boards: List[data_structures.Board]):
+            self.boards = boards
+            view.show_board_names([board.title for board in boards])
+
+        def on_error(e: Exception):
+            view.display_internal_error()
+            view.show_board_names([])
+
+        view.show_boards_loading()
+        self.app.get_runner().submit(
+            BOARDS_REQUEST,
+            lambda: model.get_boards_by_project(project),
+            on_done,
+            on_error,
+        )
 
     def on_choose_board(self, view: views.BoardView, board_name: str):
         """Given a board name execute the app logic and move to TasksView.
@@ -161,21 +212,48 @@ class BoardController(views.IBoardController):
 
 
 class TasksController(views.ITasksController):
-    """Controller implementing communication between TasksView and models."""
+    """Controller implementing communication between TasksView and models.
 
-    def __init__(self, app: IApp):
+    The ranking of the last requested time interval is kept and tasks
+    are taken from it page by page only when their cards become visible.
+    Tasks and plans are loaded in background, a new request supersedes
+    the pending one.
+
+    Card texts are cached by task ID together with the content hash of
+    the task and the locale they were rendered in, so only new and
+    changed tasks are rendered again when the interval or the board
+    changes.
+    """
+
+    def __init__(self, app: IApp, page_size: int = 50, plan_size: int = 5):
         """Constructor initializing the instance by app.
 
         :param app: instance of implemented IApp interface
         :type app: IApp
+        :param page_size: least number of tasks taken from the ranking at
+            once
+        :type page_size: int
+        :param plan_size: number of tasks shown for every day of a plan
+        :type plan_size: int
         """
         self.app = app
+        self.page_size = page_size
+        self.plan_size = plan_size
+        self.ranking: Optional[TaskRanking] = None
+        self.tasks: List[data_structures.Task] = []
+        self.versions: Dict[str, str] = {}
+        self.card_locale: Optional[str] = None
+        self.card_texts: Dict[str, Tuple[str, str, str]] = {}
 
     def get_filtered_tasks(
         self, view: views.TasksView, begin_date: date, end_date: date
-    ) -> List[str]:
-        """Get card texts by the begin and end dates. Should be called from
-        TasksView.
+    ):
+        """Start ranking tasks by the begin and end dates, the number of cards
+        is passed to view.show_tasks. Should be called from TasksView.
+
+        While the board is loaded for the first time, tasks of every
+        loaded column are ranked and shown right away, then they are
+        replaced by the final ranking of the whole board.
 
         :param view: the view
         :type view: views.TasksView
@@ -183,8 +261,6 @@ class TasksController(views.ITasksController):
         :type begin_date: date
         :param end_date: the end date
         :type end_date: date
-        :return: list of card texts
-        :rtype: List[str]
         """
         begin_date = datetime.combine(
             begin_date, time(hour=0, minute=0, second=0)
@@ -192,42 +268,200 @@ class TasksController(views.ITasksController):
         end_date = datetime.combine(
             end_date, time(hour=23, minute=59, second=59)
         )
+        self.ranking = None
+        self.tasks = []
         if begin_date > end_date:
+            self.app.get_runner().cancel(TASKS_REQUEST)
             view.on_error()
-            return []
-        try:
-            board = self.app.get_model().get_board()
-            filtered_tasks = self.app.get_model().get_tasks_by_board(
-                board, begin_date, end_date
-            )
-        except Exception as e:
-            print(e)
+            return
+        model = self.app.get_model()
+
+        def rank() -> Generator:
+            board = model.get_board()
+            yield from model.iter_partial_rankings(board, begin_date, end_date)
+            # The snapshot is read once, because reading it again may
+            # synchronize the board and give hashes of other tasks.
+            snapshot = model.get_board_snapshot(board)
+            ranking = model.rank_snapshot(snapshot, begin_date, end_date)
+            return ranking, snapshot.hashes
+
+        def on_progress(tasks: List[data_structures.Task]):
+            # Tasks of partial rankings have no versions yet, so their
+            # texts aren't cached.
+            self.ranking, self.versions = None, {}
+            self.tasks = tasks
+            view.show_tasks(self.get_tasks_count())
+
+        def on_done(result: Tuple[TaskRanking, Dict[str, str]]):
+            self.ranking, self.versions = result
+            self.tasks = []
+            self.card_locale = locale.setlocale(locale.LC_ALL)
+            for task_id in self.card_texts.keys() - self.versions.keys():
+                del self.card_texts[task_id]
+            view.show_tasks(self.get_tasks_count())
+
+        view.show_loading()
+        self.app.get_runner().submit_stream(
+            TASKS_REQUEST,
+            rank,
+            on_progress,
+            on_done,
+            lambda e: self.on_error(view, e),
+        )
+
+    def get_tasks_count(self) -> int:
+        """Get number of relevant tasks for the last requested dates.
+
+        :return: number of cards
+        :rtype: int
+        """
+        if self.ranking is None:
+            return len(self.tasks)
+        return len(self.tasks) + len(self.ranking)
+
+    def get_card_text(self, index: int) -> str:
+        """Get text of the card by its position, taking tasks from the ranking
+        up to the position if they weren't taken yet. Texts of unchanged tasks
+        are taken from the cache.
+
+        :param index: position of the card
+        :type index: int
+        :return: card text
+        :rtype: str
+        """
+        missing = index + 1 - len(self.tasks)
+        if missing > 0 and self.ranking is not None:
+            self.tasks += self.ranking.next_page(max(missing, self.page_size))
+        task = self.tasks[index]
+        version = self.versions.get(task.id)
+        cached = self.card_texts.get(task.id)
+        if cached is not None and cached[:2] == (version, self.card_locale):
+            return cached[2]
+        text = self.card_text(task)
+        if version is not None and self.card_locale is not None:
+            self.card_texts[task.id] = (version, self.card_locale, text)
+        return text
+
+    def get_daily_plan(
+        self, view: views.TasksView, begin_date: date, end_date: date
+    ):
+        """Start loading titles of the most prioritized tasks for every day
+        between the begin and end dates, they are passed to view.show_plan as a
+        list of day names and task titles. Should be called from TasksView.
+
+        :param view: the view
+        :type view: views.TasksView
+        :param begin_date: the begin date
+        :type begin_date: date
+        :param end_date: the end date
+        :type end_date: date
+        """
+        self.ranking = None
+        self.tasks = []
+        if begin_date > end_date:
+            self.app.get_runner().cancel(TASKS_REQUEST)
             view.on_error()
-            return []
-        result_texts = []
-        for task in filtered_tasks:
-            text = f"{task.title.strip()}\n\n{task.description.strip()}\n"
-            if task.archived:
-                text += _("Task is archived\n")
-            if task.completed:
-                text += _("Completed\n")
-            if task.deadline is not None:
-                if task.deadline.start_date is not None:
-                    text += _("\tStart date: {}\n").format(
-                        task.deadline.start_date.strftime("%d/%m/%Y %H:%M")
-                    )
-                text += _("\tDeadline: {}\n").format(
-                    task.deadline.deadline.strftime("%d/%m/%Y %H:%M")
+            return
+        days = [
+            begin_date + timedelta(days=i)
+            for i in range((end_date - begin_date).days + 1)
+        ]
+        windows = [
+            (
+                datetime.combine(day, time(hour=0, minute=0, second=0)),
+                datetime.combine(day, time(hour=23, minute=59, second=59)),
+            )
+            for day in days
+        ]
+        model = self.app.get_model()
+
+        def plan() -> List[Tuple[str, List[str]]]:
+            rankings = model.get_tasks_by_board_windows(
+                model.get_board(), windows
+            )
+            return [
+                (
+                    day.strftime("%d/%m/%Y"),
+                    [task.title.strip() for task in tasks[: self.plan_size]],
                 )
-            if task.time_tracking is not None:
-                text += _("Planned time: {} hours\n").format(
-                    task.time_tracking.plan
+                for day, tasks in zip(days, rankings)
+            ]
+
+        view.show_loading()
+        self.app.get_runner().submit(
+            TASKS_REQUEST,
+            plan,
+            view.show_plan,
+            lambda e: self.on_error(view, e),
+        )
+
+    def on_error(self, view: views.TasksView, error: Exception):
+        """Show failure of a background request.
+
+        :param view: the view
+        :type view: views.TasksView
+        :param error: raised exception
+        :type error: Exception
+        """
+        print(error)
+        view.on_error()
+
+    def card_text(self, task: data_structures.Task) -> str:
+        """Get text of the task card.
+
+        :param task: the task
+        :type task: data_structures.Task
+        :return: card text
+        :rtype: str
+        """
+        text = f"{task.title.strip()}\n\n{task.description.strip()}\n"
+        if task.archived:
+            text += _("Task is archived\n")
+        if task.completed:
+            text += _("Completed\n")
+        if task.deadline is not None:
+            if task.deadline.start_date is not None:
+                text += _("\tStart date: {}\n").format(
+                    task.deadline.start_date.strftime("%d/%m/%Y %H:%M")
                 )
-                text += _("Work time: {} hours\n").format(
-                    task.time_tracking.work
+            text += _("\tDeadline: {}\n").format(
+                task.deadline.deadline.strftime("%d/%m/%Y %H:%M")
+            )
+        if task.time_tracking is not None:
+            text += _("Planned time: {} hours\n").format(
+                task.time_tracking.plan
+            )
+            text += _("Work time: {} hours\n").format(task.time_tracking.work)
+        return text
+
+    def refresh_tasks(self, view: views.TasksView):
+        """Synchronize loaded tasks with YouGile and show them again.
+
+        Numbers of new, changed and removed tasks are passed to
+        view.show_status.
+
+        :param view: the view
+        :type view: views.TasksView
+        """
+        model = self.app.get_model()
+        self.ranking = None
+        self.tasks = []
+
+        def on_done(result: data_structures.SyncResult):
+            view.show_status(
+                _("Refreshed: {} new, {} changed, {} removed").format(
+                    result.added, result.updated, result.removed
                 )
-            result_texts.append(text)
-        return result_texts
+            )
+            view.on_get_tasks()
+
+        view.show_loading()
+        self.app.get_runner().submit(
+            TASKS_REQUEST,
+            lambda: model.refresh_board(model.get_board()),
+            on_done,
+            lambda e: self.on_error(view, e),
+        )
 
     def back_to_board_view(self):
         """Go back to board view."""
@@ -1,11 +1,10 @@
 """Data structures for YouGile entities."""
 
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
-from markdown import markdown
+from scheduler.markup import markdown_to_text
 
 
 @dataclass
@@ -32,19 +31,119 @@ class Board:
     title: str
 
 
-@dataclass
+def to_epoch_ms(value: datetime) -> int:
+    """Convert date to epoch milliseconds as YouGile represents dates.
+
+    :param value: Date
+    :type value: datetime
+    :return: Milliseconds since the epoch
+    :rtype: int
+    """
+    return round(value.timestamp() * 1000)
+
+
+def from_epoch_ms(value: int) -> datetime:
+    """Convert epoch milliseconds to local date.
+
+    :param value: Milliseconds since the epoch
+    :type value: int
+    :return: Date
+    :rtype: datetime
+    """
+    return datetime.fromtimestamp(value / 1000)
+
+
 class Deadline:
     """Deadline for the task.
 
-    :param deadline: Due date
-    :param start_date: Start date
+    Dates are stored as epoch milliseconds and converted to datetime
+    only on access to deadline and start_date.
+
+    :param deadline_ms: Due date in epoch milliseconds
+    :param start_date_ms: Start date in epoch milliseconds
     """
 
-    deadline: datetime
-    start_date: Optional[datetime] = None
+    __slots__ = ("deadline_ms", "start_date_ms")
 
+    deadline_ms: int
+    start_date_ms: Optional[int]
 
-@dataclass
+    def __init__(
+        self, deadline: datetime, start_date: Optional[datetime] = None
+    ):
+        """Create deadline from dates.
+
+        :param deadline: Due date
+        :type deadline: datetime
+        :param start_date: Start date
+        :type start_date: Optional[datetime]
+        """
+        self.deadline = deadline
+        self.start_date = start_date
+
+    @classmethod
+    def from_epoch_ms(
+        cls, deadline_ms: int, start_date_ms: Optional[int] = None
+    ) -> "Deadline":
+        """Create deadline from epoch milliseconds without building datetime
+        objects.
+
+        :param deadline_ms: Due date in epoch milliseconds
+        :type deadline_ms: int
+        :param start_date_ms: Start date in epoch milliseconds
+        :type start_date_ms: Optional[int]
+        :return: Deadline
+        :rtype: Deadline
+        """
+        deadline = cls.__new__(cls)
+        deadline.deadline_ms = deadline_ms
+        deadline.start_date_ms = start_date_ms
+        return deadline
+
+    @property
+    def deadline(self) -> datetime:
+        """Due date.
+
+        :return: Due date
+        :rtype: datetime
+        """
+        return from_epoch_ms(self.deadline_ms)
+
+    @deadline.setter
+    def deadline(self, value: datetime):
+        self.deadline_ms = to_epoch_ms(value)
+
+    @property
+    def start_date(self) -> Optional[datetime]:
+        """Start date.
+
+        :return: Start date or None if it isn't set
+        :rtype: Optional[datetime]
+        """
+        if self.start_date_ms is None:
+            return None
+        return from_epoch_ms(self.start_date_ms)
+
+    @start_date.setter
+    def start_date(self, value: Optional[datetime]):
+        self.start_date_ms = None if value is None else to_epoch_ms(value)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Deadline):
+            return NotImplemented
+        return (self.deadline_ms, self.start_date_ms) == (
+            other.deadline_ms,
+            other.start_date_ms,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Deadline(deadline={self.deadline!r}, "
+            f"start_date={self.start_date!r})"
+        )
+
+
+@dataclass(slots=True)
 class TimeTracking:
     """Time tracking for the task.
 
@@ -61,20 +160,44 @@ class Task:
 
     :param id: Task ID
     :param title: Task name
-    :param description: Task description
+    :param description: Task description as plain text, converted from
+        Markdown on the first access
+    :param raw_description: Task description in Markdown
     :param archived: Flag for archived task
     :param completed: Flag for completed task
     :param deadline: Deadline for task
     :param time_tracking: Time tracking for task
+    :param subtasks: IDs of subtasks which have to be done before the
+        task
+    :param assigned: IDs of users the task is assigned to
+    :param stickers: Sticker states by sticker ID
     """
 
+    __slots__ = (
+        "id",
+        "title",
+        "raw_description",
+        "_description",
+        "archived",
+        "completed",
+        "deadline",
+        "time_tracking",
+        "subtasks",
+        "assigned",
+        "stickers",
+    )
+
     id: str
     title: str
-    description: str
+    raw_description: str
+    _description: Optional[str]
     archived: bool
     completed: bool
     deadline: Optional[Deadline]
     time_tracking: Optional[TimeTracking]
+    subtasks: Tuple[str, ...]
+    assigned: Tuple[str, ...]
+    stickers: Dict[str, str]
 
     def __init__(self, obj: dict):
         """Create task from dict with YouGile parameters.
@@ -89,22 +212,135 @@ class Task:
         self.deadline = None
         if "deadline" in obj:
             dl = obj["deadline"]
-            deadline = Deadline(datetime.fromtimestamp(dl["deadline"] / 1000))
-            deadline.start_date = (
-                datetime.fromtimestamp(dl["startDate"] / 1000)
-                if "startDate" in dl
-                else None
-            )
-            self.deadline = deadline
-        self.description = ""
-        if "description" in obj:
-            html = markdown(obj["description"])
-            self.description = "".join(
-                BeautifulSoup(html, features="html.parser").findAll(text=True)
+            self.deadline = Deadline.from_epoch_ms(
+                int(dl["deadline"]),
+                int(dl["startDate"]) if "startDate" in dl else None,
             )
+        self.raw_description = obj.get("description", "")
+        self._description = None
         self.time_tracking = None
         if "timeTracking" in obj:
             time_tracking = TimeTracking(
                 obj["timeTracking"]["plan"], obj["timeTracking"]["work"]
             )
             self.time_tracking = time_tracking
+        self.subtasks = tuple(obj.get("subtasks", ()))
+        self.assigned = tuple(obj.get("assigned", ()))
+        self.stickers = dict(obj.get("stickers") or {})
+
+    @property
+    def description(self) -> str:
+        """Task description as plain text.
+
+        :return: Description without Markdown and HTML formatting
+        :rtype: str
+        """
+        if self._description is None:
+            self._description = (
+                markdown_to_text(self.raw_description)
+                if self.raw_description
+                else ""
+            )
+        return self._description
+
+
+@dataclass
+class BoardSnapshot:
+    """Tasks of the board loaded at some moment.
+
+    :param board: Board the tasks belong to
+    :param tasks: Tasks from all columns of the board
+    :param hashes: Hashes of YouGile task objects by task ID
+    :param fetched_at: Time when the tasks were loaded
+    :param stale: Some tasks came from stale cached responses, which are
+        being revalidated
+    :param version: Hash of the task hashes in the order of tasks, which
+        changes whenever the tasks change
+    """
+
+    board: Board
+    tasks: List[Task]
+    hashes: Dict[str, str] = field(default_factory=dict)
+    fetched_at: datetime = field(default_factory=datetime.now)
+    stale: bool = False
+    version: str = ""
+
+
+@dataclass
+class SyncResult:
+    """Changes applied to the board snapshot by synchronization.
+
+    :param added: Number of new tasks
+    :param updated: Number of changed tasks
+    :param removed: Number of deleted tasks
+    """
+
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+@dataclass
+class Slot:
+    """Hours of the task scheduled for a day or a person.
+
+    :param task: Scheduled task
+    :param hours: Number of hours
+    """
+
+    task: Task
+    hours: float
+
+
+@dataclass
+class DaySchedule:
+    """Tasks scheduled for a day.
+
+    :param day: The day
+    :param slots: Scheduled tasks in the order of work
+    :param free_hours: Capacity left unused
+    """
+
+    day: date
+    slots: List[Slot] = field(default_factory=list)
+    free_hours: float = 0
+
+
+@dataclass
+class Schedule:
+    """Tasks distributed over days.
+
+    :param days: Schedules of every day of the span
+    :param unscheduled: Hours which didn't fit before the deadline or
+        the end of the span by task ID
+    """
+
+    days: List[DaySchedule] = field(default_factory=list)
+    unscheduled: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class WorkerPlan:
+    """Tasks planned for a person.
+
+    :param user_id: ID of the person
+    :param slots: Planned tasks in the order of priority
+    :param free_hours: Capacity left unused
+    """
+
+    user_id: str
+    slots: List[Slot] = field(default_factory=list)
+    free_hours: float = 0
+
+
+@dataclass
+class TeamPlan:
+    """Tasks distributed between people.
+
+    :param workers: Plans of every person by user ID
+    :param unscheduled: Hours of tasks which didn't fit into capacity of
+        any of their assignees by task ID
+    """
+
+    workers: Dict[str, WorkerPlan] = field(default_factory=dict)
+    unscheduled: Dict[str, float] = field(default_factory=dict)
@@ -0,0 +1,204 @@
+"""Precedence of tasks given by YouGile subtasks.
+
+A task can't be done before its subtasks, so rankings and schedules put
+subtasks first and let them inherit urgency of their parents. Links
+forming cycles are reported and ignored instead of failing. All passes
+are iterative, so long chains of subtasks don't hit the recursion limit.
+"""
+
+import heapq
+from typing import Callable, Dict, Iterable, List, Set
+
+from scheduler.data_structures import Task
+
+
+class DependencyGraph:
+    """Precedence of tasks given by YouGile subtasks: a subtask has to be done
+    before its parent.
+
+    Links to tasks missing in the graph are ignored. Links inside cycles
+    are reported in cycles and dropped, so the rest of the graph can
+    still be ordered. All passes are iterative and linear in the number
+    of tasks and links.
+
+    :param tasks: Tasks by ID
+    :param children: IDs of subtasks by parent ID
+    :param parents: IDs of parents by subtask ID
+    :param cycles: Groups of task IDs depending on each other
+    :param order: Task IDs with subtasks before their parents
+    """
+
+    def __init__(self, tasks: Iterable[Task]):
+        """Build graph of tasks.
+
+        :param tasks: Tasks, their subtasks outside of tasks are ignored
+        :type tasks: Iterable[Task]
+        """
+        self.tasks: Dict[str, Task] = {task.id: task for task in tasks}
+        self.children: Dict[str, List[str]] = {
+            task_id: [] for task_id in self.tasks
+        }
+        self.parents: Dict[str, List[str]] = {
+            task_id: [] for task_id in self.tasks
+        }
+        for task_id, task in self.tasks.items():
+            for child_id in task.subtasks:
+                if child_id in self.tasks:
+                    self.children[task_id].append(child_id)
+                    self.parents[child_id].append(task_id)
+        self.cycles = self.find_cycles()
+        for cycle in self.cycles:
+            members = set(cycle)
+            for task_id in cycle:
+                self.children[task_id] = [
+                    child_id
+                    for child_id in self.children[task_id]
+                    if child_id not in members
+                ]
+                self.parents[task_id] = [
+                    parent_id
+                    for parent_id in self.parents[task_id]
+                    if parent_id not in members
+                ]
+        self.order = self.topological_order()
+
+    def __bool__(self) -> bool:
+        """Check if there are any links between tasks.
+
+        :return: True if some task has a subtask in the graph
+        :rtype: bool
+        """
+        return any(self.children.values())
+
+    def find_cycles(self) -> List[List[str]]:
+        """Find strongly connected components with more than one task or a task
+        linked to itself by Tarjan's algorithm.
+
+        :return: Groups of task IDs depending on each other
+        :rtype: List[List[str]]
+        """
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        cycles = []
+        for root in self.tasks:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.children[root]))]
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.children[child])))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] != index[node]:
+                        continue
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.children[node]:
+                        cycles.append(component[::-1])
+        return cycles
+
+    def topological_order(self) -> List[str]:
+        """Order tasks so that subtasks go before their parents by Kahn's
+        algorithm.
+
+        :return: Task IDs
+        :rtype: List[str]
+        """
+        waiting = {
+            task_id: len(children)
+            for task_id, children in self.children.items()
+        }
+        order = [task_id for task_id, count in waiting.items() if not count]
+        for task_id in order:
+            for parent_id in self.parents[task_id]:
+                waiting[parent_id] -= 1
+                if not waiting[parent_id]:
+                    order.append(parent_id)
+        return order
+
+    def propagate(
+        self,
+        values: Dict[str, float],
+        combine: Callable[[float, float], float] = max,
+    ) -> Dict[str, float]:
+        """Pass values from parents to their subtasks, so subtasks inherit
+        urgency of their parents.
+
+        :param values: Values by task ID, such as priority
+        :type values: Dict[str, float]
+        :param combine: Function of subtask and parent values giving the
+            new subtask value, max by default, min for deadlines
+        :type combine: Callable[[float, float], float]
+        :return: Propagated values by task ID
+        :rtype: Dict[str, float]
+        """
+        values = dict(values)
+        for task_id in reversed(self.order):
+            for child_id in self.children[task_id]:
+                values[child_id] = combine(values[child_id], values[task_id])
+        return values
+
+
+def order_by_dependencies(
+    tasks: List[Task], priorities: List[float]
+) -> List[int]:
+    """Order tasks by priority so that subtasks go before their parents.
+
+    Subtasks inherit priority of their parents. Among tasks whose
+    subtasks are done the most prioritized one goes first, ties are
+    broken by position.
+
+    :param tasks: Tasks to order
+    :type tasks: List[Task]
+    :param priorities: Priority of every task
+    :type priorities: List[float]
+    :return: Positions of tasks in the order
+    :rtype: List[int]
+    """
+    graph = DependencyGraph(tasks)
+    position = {task.id: i for i, task in enumerate(tasks)}
+    priority = graph.propagate(
+        {task.id: priority for task, priority in zip(tasks, priorities)}
+    )
+    waiting = {
+        task_id: len(children) for task_id, children in graph.children.items()
+    }
+    heap = [
+        (-priority[task.id], i, task.id)
+        for i, task in enumerate(tasks)
+        if task.id in waiting and not waiting[task.id]
+    ]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        _, i, task_id = heapq.heappop(heap)
+        order.append(i)
+        for parent_id in graph.parents[task_id]:
+            waiting[parent_id] -= 1
+            if not waiting[parent_id]:
+                heapq.heappush(
+                    heap,
+                    (-priority[parent_id], position[parent_id], parent_id),
+                )
+    return order
@@ -0,0 +1,406 @@
+"""User-defined priority formulas.
+
+A formula is an arithmetic expression over task variables, for example
+``m_deadline * remaining + 0.1 * sticker("urgent")``. It is parsed and
+validated once and then compiled into a single code object, which is
+evaluated with scalar functions for single tasks and with NumPy
+functions for columns of TaskTable. Compiled formulas are cached by
+their text.
+
+Variables, all of them are computed for a time interval:
+
+* m_deadline: deadline metric of scheduler.algorithms
+* deadline_hours: hours from the interval start to the deadline, inf
+  for tasks without deadline
+* has_deadline: 1 for tasks with deadline, 0 otherwise
+* start_overlap: share of the interval after the start date, 1 for
+  tasks without start date
+* remaining: share of planned hours not done yet, 0 for tasks without
+  time tracking or planned hours
+* remaining_hours: planned hours not done yet, 0 for tasks without time
+  tracking
+* has_time_tracking: 1 for tasks with time tracking, 0 otherwise
+
+Operators are ``+ - * / **``, unary minus and comparisons, which give 1
+or 0. Functions are min, max, abs, sqrt, log, exp, ``where(condition,
+value, other)`` and ``sticker(id)`` or ``sticker(id, state)``, which
+give 1 if the task has the sticker or the sticker state and 0 otherwise.
+Numbers are floats. Division by zero and other undefined operations
+give inf or nan in both modes, like NumPy does, with signs of zeros
+following IEEE 754. Min and max of nan are nan, and of equal numbers
+such as 0 and -0 the last one. Formula values which are nan are
+replaced by -inf, so such tasks go last.
+"""
+
+import ast
+import functools
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VARIABLES = (
+    "m_deadline",
+    "deadline_hours",
+    "has_deadline",
+    "start_overlap",
+    "remaining",
+    "remaining_hours",
+    "has_time_tracking",
+)
+"""Names of task variables available in formulas."""
+
+DEFAULT_FORMULA = (
+    "where(m_deadline == 0, remaining,"
+    " where(remaining == 0, m_deadline, m_deadline * remaining))"
+)
+"""Formula equal to the built-in priority metric."""
+
+MAX_LENGTH = 1000
+"""Maximum length of formula text."""
+
+_FUNCTIONS = {
+    "min": (2, None),
+    "max": (2, None),
+    "abs": (1, 1),
+    "sqrt": (1, 1),
+    "log": (1, 1),
+    "exp": (1, 1),
+    "where": (3, 3),
+}
+_OPERATORS = {
+    ast.Add: None,
+    ast.Sub: None,
+    ast.Mult: None,
+    ast.Div: "_div",
+    ast.Pow: "_pow",
+}
+_COMPARISONS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+Sticker = Tuple[str, Optional[str]]
+
+
+class FormulaError(ValueError):
+    """Formula has bad syntax or uses unknown names."""
+
+
+def _div(a: float, b: float) -> float:
+    if b:
+        return a / b
+    if a == 0 or a != a:
+        return math.nan
+    return math.copysign(math.inf, a) * math.copysign(1, b)
+
+
+def _pow(a: float, b: float) -> float:
+    try:
+        value = float(a) ** float(b)
+    except ZeroDivisionError:
+        # Zero to a negative odd integer power keeps the sign of zero.
+        if float(b) % 2 == 1:
+            return math.copysign(math.inf, a)
+        return math.inf
+    except OverflowError:
+        if a > 0 or float(b) % 2 == 0:
+            return math.inf
+        # A negative number to a non-integer power is undefined.
+        return -math.inf if float(b) % 2 == 1 else math.nan
+    return math.nan if isinstance(value, complex) else value
+
+
+def _vector_pow(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # np.power computes x ** 0.5 as sqrt(x) if the exponent is a single
+    # number or a broadcast one, which differs from pow for -inf and -0.
+    a, b = np.broadcast_arrays(np.atleast_1d(a), np.atleast_1d(b))
+    return np.power(
+        np.array(a, dtype=np.float64), np.array(b, dtype=np.float64)
+    )
+
+
+def _sqrt(a: float) -> float:
+    return math.sqrt(a) if a >= 0 else math.nan
+
+
+def _log(a: float) -> float:
+    if a > 0:
+        return math.log(a)
+    return -math.inf if a == 0 else math.nan
+
+
+def _exp(a: float) -> float:
+    try:
+        return math.exp(a)
+    except OverflowError:
+        return math.inf
+
+
+def _reduce(function: Callable) -> Callable:
+    return lambda *args: functools.reduce(function, args)
+
+
+# Built-in min and max and np.minimum and np.maximum differ in nan and
+# in which of equal numbers they return, such as 0 and -0, so both
+# modes use the same rule: the first value if it is nan or strictly
+# less (greater), the second one otherwise.
+def _scalar_min(a: float, b: float) -> float:
+    return a if a != a or a < b else b
+
+
+def _scalar_max(a: float, b: float) -> float:
+    return a if a != a or a > b else b
+
+
+def _vector_min(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.where((a != a) | (a < b), a, b)
+
+
+def _vector_max(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.where((a != a) | (a > b), a, b)
+
+
+_SCALAR = {
+    "_div": _div,
+    "_pow": _pow,
+    "_min": _reduce(_scalar_min),
+    "_max": _reduce(_scalar_max),
+    "_abs": abs,
+    "_sqrt": _sqrt,
+    "_log": _log,
+    "_exp": _exp,
+    "_where": lambda condition, value, other: value if condition else other,
+}
+_VECTOR = {
+    "_div": np.true_divide,
+    "_pow": _vector_pow,
+    "_min": _reduce(_vector_min),
+    "_max": _reduce(_vector_max),
+    "_abs": np.abs,
+    "_sqrt": np.sqrt,
+    "_log": np.log,
+    "_exp": np.exp,
+    "_where": np.where,
+}
+
+
+class _Compiler(ast.NodeTransformer):
+    """Validate formula tree and replace names by lambda arguments."""
+
+    def __init__(self):
+        self.variables: List[str] = []
+        self.stickers: List[Sticker] = []
+
+    def argument(self, name: str) -> ast.Name:
+        return ast.Name(id=name, ctx=ast.Load())
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        raise FormulaError(f"Unsupported syntax: {type(node).__name__}")
+
+    def visit_Expression(self, node: ast.Expression) -> ast.AST:
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if type(node.value) not in (int, float):
+            raise FormulaError(f"Unsupported constant: {node.value!r}")
+        # NumPy integers overflow and can't be raised to negative powers.
+        try:
+            return ast.Constant(float(node.value))
+        except OverflowError as error:
+            raise FormulaError(f"Too large constant: {node.value}") from error
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id not in VARIABLES:
+            raise FormulaError(f"Unknown variable: {node.id}")
+        if node.id not in self.variables:
+            self.variables.append(node.id)
+        return self.argument(node.id)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        if not isinstance(node.op, (ast.UAdd, ast.USub)):
+            raise FormulaError("Unsupported operator")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if type(node.op) not in _OPERATORS:
+            raise FormulaError("Unsupported operator")
+        left, right = self.visit(node.left), self.visit(node.right)
+        function = _OPERATORS[type(node.op)]
+        if function is None:
+            return ast.BinOp(left=left, op=node.op, right=right)
+        return ast.Call(
+            func=self.argument(function), args=[left, right], keywords=[]
+        )
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        if len(node.ops) != 1 or not isinstance(node.ops[0], _COMPARISONS):
+            raise FormulaError("Only single comparisons are supported")
+        return ast.BinOp(
+            left=ast.Compare(
+                left=self.visit(node.left),
+                ops=node.ops,
+                comparators=[self.visit(node.comparators[0])],
+            ),
+            op=ast.Mult(),
+            right=ast.Constant(1.0),
+        )
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise FormulaError("Unsupported call")
+        name = node.func.id
+        if name == "sticker":
+            return self.sticker(node.args)
+        if name not in _FUNCTIONS:
+            raise FormulaError(f"Unknown function: {name}")
+        least, most = _FUNCTIONS[name]
+        if (
+            len(node.args) < least
+            or most is not None
+            and len(node.args) > most
+        ):
+            raise FormulaError(f"Wrong number of arguments of {name}")
+        return ast.Call(
+            func=self.argument("_" + name),
+            args=[self.visit(arg) for arg in node.args],
+            keywords=[],
+        )
+
+    def sticker(self, args: List[ast.expr]) -> ast.AST:
+        if not 1 <= len(args) <= 2 or not all(
+            isinstance(arg, ast.Constant) and isinstance(arg.value, str)
+            for arg in args
+        ):
+            raise FormulaError("sticker takes sticker ID and optional state")
+        key = (args[0].value, args[1].value if len(args) == 2 else None)
+        if key not in self.stickers:
+            self.stickers.append(key)
+        return self.argument(f"_sticker{self.stickers.index(key)}")
+
+
+class Formula:
+    """Compiled priority formula.
+
+    Arguments of the evaluators are values of variables followed by
+    values of stickers in the order of these lists.
+
+    :param text: Formula text
+    :param variables: Names of used variables
+    :param stickers: Used sticker IDs and states, state is None if any
+        state matches
+    :param scalar: Evaluator of numbers
+    :param vector: Evaluator of NumPy arrays
+    """
+
+    def __init__(self, text: str):
+        """Parse, validate and compile formula.
+
+        :param text: Formula text
+        :type text: str
+        :raises FormulaError: Formula has bad syntax or uses unknown
+            names
+        """
+        if len(text) > MAX_LENGTH:
+            raise FormulaError("Formula is too long")
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError as error:
+            raise FormulaError(f"Bad syntax: {error.msg}") from error
+        compiler = _Compiler()
+        body = compiler.visit(tree).body
+        self.text = text
+        self.variables: Tuple[str, ...] = tuple(compiler.variables)
+        self.stickers: Tuple[Sticker, ...] = tuple(compiler.stickers)
+        names = list(self.variables) + [
+            f"_sticker{i}" for i in range(len(self.stickers))
+        ]
+        function = ast.Expression(
+            ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg=name) for name in names],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=body,
+            )
+        )
+        code = compile(
+            ast.fix_missing_locations(function), "<formula>", "eval"
+        )
+        self.scalar: Callable[..., float] = eval(
+            code, {"__builtins__": {}, **_SCALAR}
+        )
+        self.vector: Callable[..., np.ndarray] = eval(
+            code, {"__builtins__": {}, **_VECTOR}
+        )
+
+    def __repr__(self) -> str:
+        """Get formula representation.
+
+        :return: Representation with formula text
+        :rtype: str
+        """
+        return f"Formula({self.text!r})"
+
+    def evaluate(self, values: Sequence[float]) -> float:
+        """Evaluate formula for a task.
+
+        :param values: Values of variables and stickers
+        :type values: Sequence[float]
+        :return: Formula value
+        :rtype: float
+        """
+        value = float(self.scalar(*values))
+        return value if value == value else -math.inf
+
+    def evaluate_columns(
+        self, columns: Sequence[np.ndarray], size: int
+    ) -> np.ndarray:
+        """Evaluate formula for many tasks at once.
+
+        :param columns: Arrays of values of variables and stickers
+        :type columns: Sequence[np.ndarray]
+        :param size: Number of tasks
+        :type size: int
+        :return: Formula values
+        :rtype: np.ndarray
+        """
+        with np.errstate(all="ignore"):
+            values = np.asarray(self.vector(*columns), dtype=np.float64)
+        if values.shape != (size,):
+            # Formulas without variables give a single number.
+            values = np.full(size, values)
+        values[np.isnan(values)] = -np.inf
+        return values
+
+
+@functools.lru_cache(maxsize=128)
+def compile_formula(text: str) -> Formula:
+    """Get compiled formula, compiling every text once.
+
+    :param text: Formula text
+    :type text: str
+    :raises FormulaError: Formula has bad syntax or uses unknown names
+    :return: Compiled formula
+    :rtype: Formula
+    """
+    return Formula(text)
+
+
+def sticker_matches(stickers: Dict[str, str], sticker: Sticker) -> bool:
+    """Check if task stickers contain sticker used in formula.
+
+    :param stickers: Sticker states of task by sticker ID
+    :type stickers: Dict[str, str]
+    :param sticker: Sticker ID and state, None for any state
+    :type sticker: Sticker
+    :return: True if the task has the sticker in the state
+    :rtype: bool
+    """
+    sticker_id, state = sticker
+    value = stickers.get(sticker_id)
+    if state is None:
+        return value not in (None, "")
+    return value == state
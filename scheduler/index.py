@@ -0,0 +1,275 @@
+"""Index of tasks by their deadline intervals.
+
+A task is relevant for a time interval if its deadline is after the
+interval start and its start date, if any, is before the interval end.
+IntervalIndex keeps active tasks with start dates in a priority search
+tree: the tree is a heap by start date and a search tree by deadline, so
+tasks relevant for an interval are found in O(log n + k) without
+checking every task. Tasks without start date are relevant for any
+interval before their deadline, they are kept in a list sorted by
+deadline. Tasks without deadline are relevant for any interval and are
+kept in a separate bucket.
+"""
+
+import bisect
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, Union
+
+from scheduler.data_structures import Task, to_epoch_ms
+
+LEAF_SIZE = 32
+"""Maximum number of tasks scanned linearly instead of splitting."""
+
+
+class _Entry:
+    __slots__ = ("seq", "deadline_ms", "start_ms", "task")
+
+    def __init__(self, seq: int, task: Task):
+        self.seq = seq
+        self.task = task
+        if task.deadline is None:
+            self.deadline_ms = self.start_ms = None
+            return
+        self.deadline_ms = task.deadline.deadline_ms
+        self.start_ms = task.deadline.start_date_ms
+
+
+class _Node:
+    __slots__ = ("entry", "split", "left", "right")
+
+    def __init__(self, entry: _Entry, split: int, left, right):
+        self.entry = entry
+        self.split = split
+        self.left = left
+        self.right = right
+
+
+_Tree = Union[_Node, List[_Entry], None]
+
+
+def _build(entries: List[_Entry]) -> _Tree:
+    """Build priority search tree of entries sorted by deadline."""
+    if len(entries) <= LEAF_SIZE:
+        return entries or None
+    starts = [entry.start_ms for entry in entries]
+    i = min(range(len(starts)), key=starts.__getitem__)
+    rest = entries[:i] + entries[i:][1:]
+    mid = len(rest) // 2
+    return _Node(
+        entries[i],
+        rest[mid - 1].deadline_ms,
+        _build(rest[:mid]),
+        _build(rest[mid:]),
+    )
+
+
+class IntervalIndex:
+    """Incrementally updated index of active tasks by deadline intervals.
+
+    Archived and completed tasks are never indexed. Changes are applied
+    to the built tree lazily: replaced entries are skipped by queries
+    and new entries are scanned linearly until there are enough of them
+    to rebuild the tree.
+
+    :param entries: Indexed entries by task ID
+    :param no_deadline: Entries of tasks without deadline by task ID
+    :param open_deadlines: Sorted deadlines of tasks without start date
+    :param open_entries: Entries of tasks without start date in the
+        order of open_deadlines
+    :param pending: Entries with start dates added after the tree was
+        built
+    :param stale: Number of entries in the tree which were removed or
+        replaced
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        """Build index of tasks.
+
+        :param tasks: Tasks to index, query results keep their order
+        :type tasks: Iterable[Task]
+        """
+        self.entries: Dict[str, _Entry] = {}
+        self.no_deadline: Dict[str, _Entry] = {}
+        self.open_deadlines: List[int] = []
+        self.open_entries: List[_Entry] = []
+        self.pending: List[_Entry] = []
+        self.stale = 0
+        self.next_seq = 0
+        self.tree: _Tree = None
+        for task in tasks:
+            self._insert(task, rebuilding=True)
+        self.rebuild()
+
+    def __len__(self) -> int:
+        """Get number of indexed tasks.
+
+        :return: Number of active tasks
+        :rtype: int
+        """
+        return len(self.entries)
+
+    def __contains__(self, task_id: str) -> bool:
+        """Check if task is indexed.
+
+        :param task_id: Task ID
+        :type task_id: str
+        :return: True if the task is indexed
+        :rtype: bool
+        """
+        return task_id in self.entries
+
+    def _insert(self, task: Task, seq: Optional[int] = None, rebuilding=False):
+        if task.archived or task.completed:
+            return
+        if seq is None:
+            seq = self.next_seq
+            self.next_seq += 1
+        entry = _Entry(seq, task)
+        self.entries[task.id] = entry
+        if entry.deadline_ms is None:
+            self.no_deadline[task.id] = entry
+        elif entry.start_ms is None:
+            if not rebuilding:
+                i = bisect.bisect_right(self.open_deadlines, entry.deadline_ms)
+                self.open_deadlines.insert(i, entry.deadline_ms)
+                self.open_entries.insert(i, entry)
+        elif not rebuilding:
+            self.pending.append(entry)
+
+    def _discard(self, task_id: str) -> Optional[int]:
+        entry = self.entries.pop(task_id, None)
+        if entry is None:
+            return None
+        if entry.deadline_ms is None:
+            del self.no_deadline[task_id]
+        elif entry.start_ms is None:
+            i = bisect.bisect_left(self.open_deadlines, entry.deadline_ms)
+            while self.open_entries[i] is not entry:
+                i += 1
+            del self.open_deadlines[i]
+            del self.open_entries[i]
+        else:
+            self.stale += 1
+        return entry.seq
+
+    def rebuild(self):
+        """Build the tree and the list of tasks without start date again from
+        all indexed tasks."""
+        by_deadline = attrgetter("deadline_ms")
+        self.open_entries = sorted(
+            (
+                entry
+                for entry in self.entries.values()
+                if entry.deadline_ms is not None and entry.start_ms is None
+            ),
+            key=by_deadline,
+        )
+        self.open_deadlines = [
+            entry.deadline_ms for entry in self.open_entries
+        ]
+        self.tree = _build(
+            sorted(
+                (
+                    entry
+                    for entry in self.entries.values()
+                    if entry.start_ms is not None
+                ),
+                key=by_deadline,
+            )
+        )
+        self.pending = []
+        self.stale = 0
+
+    def _maybe_rebuild(self):
+        if self.stale + len(self.pending) > max(
+            LEAF_SIZE, len(self.entries) // 4
+        ):
+            self.rebuild()
+
+    def add(self, task: Task):
+        """Add new or changed task to the index.
+
+        A changed task keeps its position in query results.
+
+        :param task: Task to add
+        :type task: Task
+        """
+        seq = self._discard(task.id)
+        self._insert(task, seq)
+        self._maybe_rebuild()
+
+    def remove(self, task_id: str):
+        """Remove task from the index.
+
+        :param task_id: ID of task to remove
+        :type task_id: str
+        """
+        self._discard(task_id)
+        self._maybe_rebuild()
+
+    def _live(self, entry: _Entry) -> bool:
+        return self.entries.get(entry.task.id) is entry
+
+    def _search(
+        self, tree: _Tree, start_ms: int, end_ms: int, found: List[_Entry]
+    ):
+        if tree is None:
+            return
+        if isinstance(tree, list):
+            found.extend(
+                entry
+                for entry in tree
+                if entry.deadline_ms > start_ms and entry.start_ms < end_ms
+            )
+            return
+        entry = tree.entry
+        # Start dates in the subtree aren't less than the one of its root.
+        if entry.start_ms >= end_ms:
+            return
+        if entry.deadline_ms > start_ms:
+            found.append(entry)
+        # Deadlines in the left subtree aren't greater than split.
+        if tree.split > start_ms:
+            self._search(tree.left, start_ms, end_ms, found)
+        self._search(tree.right, start_ms, end_ms, found)
+
+    def relevant_ms(self, start_ms: int, end_ms: int) -> List[Task]:
+        """Get tasks which may be done during time interval given in epoch
+        milliseconds.
+
+        :param start_ms: Start of time interval in epoch milliseconds
+        :type start_ms: int
+        :param end_ms: End of time interval in epoch milliseconds
+        :type end_ms: int
+        :return: Relevant tasks in the order they were indexed
+        :rtype: List[Task]
+        """
+        found = list(self.no_deadline.values())
+        i = bisect.bisect_right(self.open_deadlines, start_ms)
+        found += self.open_entries[i:]
+        started: List[_Entry] = []
+        self._search(self.tree, start_ms, end_ms, started)
+        started.extend(
+            entry
+            for entry in self.pending
+            if entry.deadline_ms > start_ms and entry.start_ms < end_ms
+        )
+        if self.stale:
+            started = [entry for entry in started if self._live(entry)]
+        found += started
+        found.sort(key=attrgetter("seq"))
+        return [entry.task for entry in found]
+
+    def relevant(self, start_date: datetime, end_date: datetime) -> List[Task]:
+        """Get tasks which may be done during time interval, same as
+        algorithms.get_relevant_tasks for indexed tasks.
+
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :return: Relevant tasks in the order they were indexed
+        :rtype: List[Task]
+        """
+        return self.relevant_ms(to_epoch_ms(start_date), to_epoch_ms(end_date))
@@ -0,0 +1,152 @@
+"""Local storage of YouGile API keys.
+
+Keys are stored by login and company, so authorization doesn't need to
+request a key from YouGile every time. A key is given out only for the
+password it was obtained with: the password is checked against its
+salted PBKDF2 hash, the password itself is never stored.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+from typing import Dict, Optional
+
+
+def default_key_store_path() -> str:
+    """Get path of the key store in the user config directory.
+
+    :return: Path to the key store
+    :rtype: str
+    """
+    config_dir = os.environ.get(
+        "XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config")
+    )
+    return os.path.join(config_dir, "SmartScheduler", "keys.json")
+
+
+class KeyStore:
+    """API keys storage keyed by login and company.
+
+    :param path: Path to the key store file, keys are kept only in
+        memory if not specified
+    :param iterations: Number of PBKDF2 iterations for password hashes
+    :param entries: Stored entries by login and company hash
+    """
+
+    def __init__(self, path: Optional[str] = None, iterations: int = 100000):
+        """Open key store file if it exists.
+
+        :param path: Path to the key store file, keys are kept only in
+            memory if not specified
+        :type path: Optional[str]
+        :param iterations: Number of PBKDF2 iterations for password
+            hashes
+        :type iterations: int
+        """
+        self.path = path
+        self.iterations = iterations
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path) as fin:
+                    self.entries = json.load(fin)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def entry_id(login: str, company_name: str) -> str:
+        """Get entry ID by login and company.
+
+        :param login: User login
+        :type login: str
+        :param company_name: Company name
+        :type company_name: str
+        :return: Entry ID
+        :rtype: str
+        """
+        return hashlib.sha256(f"{login}\0{company_name}".encode()).hexdigest()
+
+    def hash_password(self, password: str, salt: bytes) -> str:
+        """Compute salted password hash.
+
+        :param password: User password
+        :type password: str
+        :param salt: Salt
+        :type salt: bytes
+        :return: Password hash
+        :rtype: str
+        """
+        return hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), salt, self.iterations
+        ).hex()
+
+    def get(self, login: str, password: str, company_name: str) -> str | None:
+        """Get stored key.
+
+        :param login: User login
+        :type login: str
+        :param password: User password
+        :type password: str
+        :param company_name: Company name
+        :type company_name: str
+        :return: Stored key or None if there is no key or the password
+            doesn't match
+        :rtype: str | None
+        """
+        entry = self.entries.get(self.entry_id(login, company_name))
+        if not isinstance(entry, dict):
+            return None
+        password_hash = self.hash_password(
+            password, bytes.fromhex(entry["salt"])
+        )
+        if not hmac.compare_digest(password_hash, entry["password_hash"]):
+            return None
+        return entry["key"]
+
+    def put(self, login: str, password: str, company_name: str, key: str):
+        """Store key.
+
+        :param login: User login
+        :type login: str
+        :param password: User password
+        :type password: str
+        :param company_name: Company name
+        :type company_name: str
+        :param key: YouGile API key
+        :type key: str
+        """
+        salt = os.urandom(16)
+        self.entries[self.entry_id(login, company_name)] = {
+            "key": key,
+            "salt": salt.hex(),
+            "password_hash": self.hash_password(password, salt),
+        }
+        self.save()
+
+    def remove(self, login: str, company_name: str):
+        """Remove stored key.
+
+        :param login: User login
+        :type login: str
+        :param company_name: Company name
+        :type company_name: str
+        """
+        if self.entries.pop(self.entry_id(login, company_name), None):
+            self.save()
+
+    def save(self):
+        """Write keys to the file readable only by the user."""
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        # A leftover file would keep its mode, so it is created anew.
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as fout:
+            json.dump(self.entries, fout)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,345 @@
+"""Conversion of YouGile task descriptions to plain text.
+
+Descriptions are Markdown with embedded HTML. markdown_to_text extracts
+their text in one pass without building HTML, producing the same text as
+rendering Markdown with the markdown package and then collecting text
+nodes with BeautifulSoup. The following subset is supported: paragraphs,
+line breaks, headings, horizontal rules, code blocks, blockquotes,
+lists, emphasis, code spans, links, images, autolinks, backslash
+escapes, HTML tags, comments and entities.
+"""
+
+import bisect
+import html
+import itertools
+import re
+from typing import List, Tuple
+
+try:
+    from bs4 import BeautifulSoup
+    from markdown import markdown
+except ImportError:
+    BeautifulSoup = None
+    markdown = None
+
+BLOCK_TAGS = frozenset(
+    (
+        "address article aside blockquote canvas dd div dl dt fieldset "
+        "figcaption figure footer form h1 h2 h3 h4 h5 h6 header hgroup hr "
+        "iframe li main nav noscript ol output p pre section table tbody "
+        "td tfoot th thead tr ul video"
+    ).split()
+)
+
+VOID_TAGS = frozenset(
+    "area base br col embed hr img input link meta source track wbr".split()
+)
+
+_HTML_BLOCK = re.compile(r"<([A-Za-z][A-Za-z0-9]*)[\s/>]")
+_TAG = re.compile(
+    r"<!--(?P<comment>.*?)-->"
+    r"|<(?P<close>/?)(?P<name>[A-Za-z][A-Za-z0-9]*)(?:\s[^>]*)?/?>",
+    re.S,
+)
+_ATX = re.compile(r"(#{1,6})(.*?)#*\s*$")
+_SETEXT = re.compile(r"(=+|-+)\s*$")
+_HR = re.compile(r" {0,3}([-*_])(?: *\1){2,} *$")
+_QUOTE = re.compile(r" {0,3}> ?(.*)$")
+_ITEM = re.compile(r" {0,3}(?:[*+-]|\d+\.) +(.*)$")
+_INLINE = re.compile(
+    r"\\(?P<escape>[\\`*_{}\[\]()#+\-.!])"
+    r"|(?P<ticks>`+)(?P<code>.+?)(?<!`)(?P=ticks)(?!`)"
+    r"|!\[[^\]]*\]\([^)]*\)"
+    r"|\[(?P<link>[^\]]*)\]\([^)]*\)"
+    r"|<(?P<autolink>(?:https?|ftp)://[^>\s]+)>"
+    r"|<!--(?P<comment>.*?)-->"
+    r"|</?[A-Za-z][A-Za-z0-9]*(?:\s[^>]*)?/?>"
+    r"|\*\*\*(?=\S)(?P<strong_em>.+?)(?<=\S)\*\*\*"
+    r"|\*\*(?=\S)(?P<strong>.+?)(?<=\S)\*\*"
+    r"|(?<!\w)__(?=\S)(?P<strong_u>.+?)(?<=\S)__(?!\w)"
+    r"|\*(?=\S)(?P<em>.+?)(?<![\s*])\*(?!\*)"
+    r"|(?<!\w)_(?=\S)(?P<em_u>.+?)(?<![\s_])_(?!\w)",
+    re.S,
+)
+_EMPHASIS = ("strong_em", "strong", "strong_u", "em", "em_u", "link")
+
+
+def inline_to_text(text: str) -> str:
+    """Extract text from Markdown inline elements and HTML tags.
+
+    :param text: Markdown text of one block
+    :type text: str
+    :return: Plain text
+    :rtype: str
+    """
+    parts = []
+    pos = 0
+    for match in _INLINE.finditer(text):
+        start, end = match.span()
+        parts.append(html.unescape(text[pos:start]))
+        pos = end
+        group = match.lastgroup
+        if group in ("escape", "comment", "autolink"):
+            parts.append(match.group(group))
+        elif group == "code":
+            parts.append(match.group("code").strip())
+        elif group in _EMPHASIS:
+            parts.append(inline_to_text(match.group(group)))
+    parts.append(html.unescape(text[pos:]))
+    return "".join(parts)
+
+
+def html_to_text(text: str) -> str:
+    """Extract text from HTML, keeping comment contents like BeautifulSoup
+    does.
+
+    :param text: HTML
+    :type text: str
+    :return: Plain text
+    :rtype: str
+    """
+    return html.unescape(
+        _TAG.sub(lambda match: match.group("comment") or "", text)
+    )
+
+
+def _starts_html_block(line: str) -> bool:
+    if line.startswith("<!--"):
+        return True
+    match = _HTML_BLOCK.match(line)
+    return match is not None and match.group(1).lower() in BLOCK_TAGS
+
+
+def _interrupts_list(line: str) -> bool:
+    return (
+        _ATX.match(line) is not None
+        or _HR.match(line) is not None
+        or _starts_html_block(line)
+    )
+
+
+def _interrupts_paragraph(line: str) -> bool:
+    return _interrupts_list(line) or _QUOTE.match(line) is not None
+
+
+def _html_end(text: str, pos: int) -> int:
+    """Find the end of top level HTML element starting at pos."""
+    if text.startswith("<!--", pos):
+        close = text.find("-->", pos)
+        return len(text) if close < 0 else close + 3
+    name = _HTML_BLOCK.match(text, pos).group(1).lower()
+    depth = 0
+    for match in _TAG.finditer(text, pos):
+        tag = match.group("name")
+        if tag is None or tag.lower() != name:
+            continue
+        if match.group("close"):
+            depth -= 1
+        elif name not in VOID_TAGS and not match.group(0).endswith("/>"):
+            depth += 1
+        if depth <= 0:
+            return match.end()
+    return len(text)
+
+
+def _parse_html(
+    lines: List[str], i: int, text: str, line_ends: List[int]
+) -> Tuple[int, List[str]]:
+    """Parse top level HTML elements starting at line i.
+
+    :param text: Lines joined by newlines, lines[i] is a suffix of its
+        line in the text
+    :param line_ends: Offsets after the newline of every line in the text
+    """
+    pos = line_ends[i] - 1 - len(lines[i])
+    texts = []
+    while True:
+        end = _html_end(text, pos)
+        texts.append(html_to_text(text[pos:end]))
+        i = bisect.bisect_right(line_ends, end)
+        line_end = line_ends[i] - 1
+        tail = text[end:line_end].lstrip()
+        if not tail:
+            return i + 1, texts
+        lines[i] = tail
+        if not _starts_html_block(tail):
+            return i, texts
+        pos = line_end - len(tail)
+
+
+def _parse_list(lines: List[str], i: int) -> Tuple[int, str]:
+    """Parse list starting at line i."""
+    items: List[List[str]] = []
+    loose: List[bool] = []
+    nested_from: List[int] = []
+    blank = False
+    while i < len(lines):
+        line = lines[i]
+        match = _ITEM.match(line)
+        if _interrupts_list(line):
+            break
+        if match and not line.startswith("    "):
+            if blank and items:
+                loose[-1] = True
+            items.append([match.group(1)])
+            loose.append(blank)
+            nested_from.append(0)
+            blank = False
+        elif not line.strip():
+            j = i
+            while j < len(lines) and not lines[j].strip():
+                j += 1
+            if j == len(lines) or not (
+                _ITEM.match(lines[j]) or lines[j].startswith("    ")
+            ):
+                break
+            blank = True
+            i = j
+            continue
+        elif blank:
+            items[-1] += ["", line[4:]]
+            loose[-1] = True
+            blank = False
+        elif line.startswith("    ") and (
+            nested_from[-1] or _ITEM.match(line[4:])
+        ):
+            # Nested list can't be a part of the item paragraph.
+            nested_from[-1] = nested_from[-1] or len(items[-1])
+            items[-1].append(line[4:])
+        else:
+            items[-1].append(line)
+        i += 1
+
+    texts = []
+    for content, is_loose, k in zip(items, loose, nested_from):
+        if k:
+            blocks = _parse_blocks(content[:k]) + _parse_blocks(content[k:])
+        else:
+            blocks = _parse_blocks(content)
+        if not is_loose and blocks and blocks[0][0]:
+            head, blocks = blocks[0][1], blocks[1:]
+        elif blocks:
+            head = "\n"
+        else:
+            head = ""
+        texts.append(head + "".join(text + "\n" for _, text in blocks))
+    return i, "\n" + "".join(text + "\n" for text in texts)
+
+
+def _parse_blocks(lines: List[str]) -> List[Tuple[bool, str]]:
+    """Parse blocks and extract their texts.
+
+    :return: List of flags whether the block is a paragraph and block
+        texts
+    """
+    blocks: List[Tuple[bool, str]] = []
+    # Elements may span lines, so HTML is parsed in the joined text,
+    # which is built once for all HTML blocks.
+    joined = None
+    line_ends: List[int] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+        elif _starts_html_block(line):
+            if joined is None:
+                joined = "\n".join(lines)
+                line_ends = list(
+                    itertools.accumulate(len(line) + 1 for line in lines)
+                )
+            i, texts = _parse_html(lines, i, joined, line_ends)
+            blocks += [(False, text) for text in texts]
+        elif line.startswith("    "):
+            code = []
+            while i < len(lines) and (
+                lines[i].startswith("    ") or not lines[i].strip()
+            ):
+                code.append(lines[i][4:])
+                i += 1
+            while not code[-1].strip():
+                code.pop()
+            blocks.append((False, "\n".join(code) + "\n"))
+        elif _HR.match(line):
+            blocks.append((False, ""))
+            i += 1
+        elif _ATX.match(line):
+            blocks.append((False, inline_to_text(_ATX.match(line)[2].strip())))
+            i += 1
+        elif _QUOTE.match(line):
+            quote = []
+            while i < len(lines):
+                match = _QUOTE.match(lines[i])
+                if match:
+                    quote.append(match.group(1))
+                elif (
+                    lines[i].strip()
+                    and quote[-1].strip()
+                    and not _interrupts_list(lines[i])
+                ):
+                    quote.append(lines[i])
+                elif not lines[i].strip() and i + 1 < len(lines):
+                    if not _QUOTE.match(lines[i + 1]):
+                        break
+                    quote.append("")
+                else:
+                    break
+                i += 1
+            inner = _parse_blocks(quote)
+            blocks.append(
+                (False, "\n" + "".join(text + "\n" for _, text in inner))
+            )
+        elif _ITEM.match(line):
+            i, text = _parse_list(lines, i)
+            blocks.append((False, text))
+        else:
+            paragraph = [line.lstrip()]
+            i += 1
+            if i < len(lines) and _SETEXT.match(lines[i]):
+                blocks.append((False, inline_to_text(paragraph[0].strip())))
+                i += 1
+                continue
+            while (
+                i < len(lines)
+                and lines[i].strip()
+                and not _interrupts_paragraph(lines[i])
+            ):
+                paragraph.append(lines[i])
+                i += 1
+            text = re.sub(r" {2,}\n", "\n", "\n".join(paragraph))
+            blocks.append((True, inline_to_text(text)))
+    return blocks
+
+
+def markdown_to_text(text: str) -> str:
+    """Convert Markdown text with embedded HTML to plain text.
+
+    :param text: Markdown text
+    :type text: str
+    :return: Plain text
+    :rtype: str
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").expandtabs(4)
+    blocks = _parse_blocks(lines.split("\n"))
+    return "\n".join(text for _, text in blocks)
+
+
+def reference_markdown_to_text(text: str) -> str:
+    """Convert Markdown text to plain text by rendering HTML with markdown and
+    parsing it with BeautifulSoup.
+
+    Much slower than markdown_to_text, but handles full Markdown syntax.
+    Requires optional markdown and bs4 packages.
+
+    :param text: Markdown text
+    :type text: str
+    :raises ImportError: markdown or bs4 are not installed
+    :return: Plain text
+    :rtype: str
+    """
+    if markdown is None or BeautifulSoup is None:
+        raise ImportError("markdown and bs4 are required")
+    html_text = markdown(text)
+    return "".join(
+        BeautifulSoup(html_text, features="html.parser").findAll(text=True)
+    )
@@ -1,30 +1,331 @@
 """Models for communication with YouGile API and invoking algorithms."""
 
-from datetime import datetime
-from typing import List, Optional
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
+import requests
 import yougile
 import yougile.models as models
+from requests.adapters import HTTPAdapter
 
-from scheduler.algorithms import sort_tasks
-from scheduler.data_structures import Board, Project, Task
+from scheduler import algorithms, data_structures
+from scheduler.algorithms import build_schedule, build_team_plan
+from scheduler.cache import CachedResponse, ResponseCache
+from scheduler.data_structures import Board, BoardSnapshot, Project, Task
+from scheduler.formula import Formula, compile_formula
+from scheduler.index import IntervalIndex
+from scheduler.keystore import KeyStore
+from scheduler.parsing import hash_object, hash_snapshot
+from scheduler.table import TaskRanking, TaskTable
+
+YOUGILE_URL = "https://ru.yougile.com"
+
+
+class Transport:
+    """HTTP transport for YouGile requests over one keep-alive session.
+
+    Connections are pooled and reused by all requests of the session, so
+    TLS handshake is done once per connection instead of per request.
+
+    :param base_url: YouGile server URL
+    :param timeout: Timeout in seconds for connect and read operations
+    :param session: HTTP session with mounted connection pool
+    """
+
+    def __init__(
+        self,
+        base_url: str = YOUGILE_URL,
+        pool_size: int = 10,
+        timeout: float = 30,
+    ):
+        """Create transport with connection pool.
+
+        :param base_url: YouGile server URL
+        :type base_url: str
+        :param pool_size: Maximum number of kept-alive connections
+        :type pool_size: int
+        :param timeout: Timeout in seconds for connect and read
+            operations
+        :type timeout: float
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def query(
+        self,
+        model: yougile.BaseModel,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """Send YouGile request the same way as yougile.query does.
+
+        :param model: YouGile request
+        :type model: yougile.BaseModel
+        :param headers: Additional HTTP headers
+        :type headers: Optional[Dict[str, str]]
+        :return: Server response
+        :rtype: requests.Response
+        """
+        url = model._url
+        fields = model.model_dump()
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        token = fields.pop("token", None)
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        for name in getattr(model, "_url_parse", ()):
+            url = url.format(**{name: fields.pop(name)})
+        params = {}
+        for name in getattr(model, "_url_params", ()):
+            value = fields.pop(name)
+            if value is not None:
+                params[name] = value
+        body = {
+            name: value for name, value in fields.items() if value is not None
+        }
+        return self.session.request(
+            model._method,
+            self.base_url + url,
+            params=params or None,
+            headers=headers,
+            json=body or None,
+            timeout=self.timeout,
+        )
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+class CachingTransport:
+    """Transport serving GET requests from persistent ResponseCache.
+
+    Fresh responses are returned without network access. Stale responses
+    are returned immediately and revalidated in the background, using
+    If-None-Match when the server provided ETag.
+
+    :param transport: Transport for requests missing in the cache
+    :param cache: Response storage
+    :param revalidating: Cache keys of responses being revalidated
+    :param stale_served: Number of stale responses returned so far
+    """
+
+    def __init__(self, transport: Transport, cache: ResponseCache):
+        """Create caching transport.
+
+        :param transport: Transport for requests missing in the cache
+        :type transport: Transport
+        :param cache: Response storage
+        :type cache: ResponseCache
+        """
+        self.transport = transport
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.revalidating: Set[str] = set()
+        self.stale_served = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(model: yougile.BaseModel) -> str:
+        """Get cache key of request by its endpoint and parameters.
+
+        The key is hashed, so tokens are not stored in the cache.
+
+        :param model: YouGile request
+        :type model: yougile.BaseModel
+        :return: Cache key
+        :rtype: str
+        """
+        fields = json.dumps(model.model_dump(), sort_keys=True, default=str)
+        key = f"{type(model).__name__}:{model._url}:{fields}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def query(
+        self, model: yougile.BaseModel
+    ) -> requests.Response | CachedResponse:
+        """Send YouGile request or get its response from the cache.
+
+        :param model: YouGile request
+        :type model: yougile.BaseModel
+        :return: Server or cached response
+        :rtype: requests.Response | CachedResponse
+        """
+        if model._method.lower() != "get":
+            return self.transport.query(model)
+        key = self.cache_key(model)
+        cached = self.cache.get(key, type(model).__name__)
+        if cached is None:
+            return self.fetch(model, key)
+        if not cached.fresh:
+            with self.lock:
+                self.stale_served += 1
+            self.revalidate(model, key, cached.etag)
+        return cached
+
+    def fetch(
+        self,
+        model: yougile.BaseModel,
+        key: str,
+        etag: Optional[str] = None,
+    ) -> requests.Response:
+        """Send request and store successful response in the cache.
+
+        :param model: YouGile request
+        :type model: yougile.BaseModel
+        :param key: Cache key of the request
+        :type key: str
+        :param etag: ETag of the stored response to revalidate
+        :type etag: Optional[str]
+        :return: Server response
+        :rtype: requests.Response
+        """
+        if etag is None:
+            response = self.transport.query(model)
+        else:
+            response = self.transport.query(
+                model, headers={"If-None-Match": etag}
+            )
+        if response.status_code == 304:
+            self.cache.touch(key)
+        elif response.status_code == 200:
+            self.cache.put(
+                key,
+                type(model).__name__,
+                response.json(),
+                response.headers.get("ETag"),
+            )
+        return response
+
+    def revalidate(
+        self, model: yougile.BaseModel, key: str, etag: Optional[str]
+    ):
+        """Refresh stale response in the background.
+
+        :param model: YouGile request
+        :type model: yougile.BaseModel
+        :param key: Cache key of the request
+        :type key: str
+        :param etag: ETag of the stored response
+        :type etag: Optional[str]
+        """
+        with self.lock:
+            if key in self.revalidating:
+                return
+            self.revalidating.add(key)
+
+        # The caller may change its model after this call, for example
+        # to request the next page.
+        model = model.model_copy()
+
+        def task():
+            try:
+                self.fetch(model, key, etag)
+            except (requests.RequestException, ValueError):
+                # Stale response stays in the cache and is revalidated
+                # again on the next request.
+                pass
+            finally:
+                with self.lock:
+                    self.revalidating.discard(key)
+
+        self.executor.submit(task)
+
+    def close(self):
+        """Wait for background revalidation and close the transport."""
+        self.executor.shutdown(wait=True)
+        self.transport.close()
+
+
+def merge_columns(columns: List[Tuple[int, List[dict]]]) -> List[dict]:
+    """Merge task objects of columns loaded in any order.
+
+    :param columns: Column positions on the board and task objects
+    :type columns: List[Tuple[int, List[dict]]]
+    :return: Task objects in the order of columns
+    :rtype: List[dict]
+    """
+    columns = sorted(columns, key=lambda column: column[0])
+    return [obj for _, objects in columns for obj in objects]
 
 
 class AppLogicModel:
     """Logic for communication with YouGile and invoking algorithms.
 
     :param token: Token for YouGile authorization
+    :param credentials: Login, password and company of authorized user
     :param chosen_board: Board user project to sort tasks from
+    :param snapshots: Last synchronized tasks by board ID
+    :param tables: Columnar copies of snapshot tasks by board ID
+    :param metric_cache: Priorities of ranked tables by snapshot version
+        and time interval
+    :param indexes: Interval indexes of snapshot tasks by board ID
+    :param priority_formula: User-defined priority formula, the built-in
+        priority metric is used if None
+    :param max_workers: Maximum number of columns fetched concurrently
+    :param page_size: Number of objects requested per YouGile page
+    :param transport: Transport used for all YouGile requests
     """
 
-    def __init__(self):
-        """Create AppLogicModel instance with empty fields."""
+    def __init__(
+        self,
+        max_workers: int = 8,
+        page_size: int = 1000,
+        transport: Optional[Transport] = None,
+        cache: Optional[ResponseCache] = None,
+        key_store: Optional[KeyStore] = None,
+    ):
+        """Create AppLogicModel instance with empty fields.
+
+        :param max_workers: Maximum number of columns fetched
+            concurrently, 1 disables concurrent fetching
+        :type max_workers: int
+        :param page_size: Number of objects requested per YouGile page,
+            at most 1000
+        :type page_size: int
+        :param transport: Transport used for all YouGile requests,
+            by default pooled Transport sized for max_workers
+        :type transport: Optional[Transport]
+        :param cache: Persistent cache for GET requests, disabled if
+            not specified
+        :type cache: Optional[ResponseCache]
+        :param key_store: Storage of API keys reused between sessions,
+            keys are requested on every authorization if not specified
+        :type key_store: Optional[KeyStore]
+        """
         self.token = ""
+        self.credentials: Optional[Tuple[str, str, str]] = None
+        self.key_store = key_store
+        self.auth_lock = threading.Lock()
         self.chosen_board: Optional[Board] = None
+        self.snapshots: Dict[str, BoardSnapshot] = {}
+        self.tables: Dict[str, TaskTable] = {}
+        self.metric_cache = algorithms.MetricCache()
+        self.indexes: Dict[str, IntervalIndex] = {}
+        self.priority_formula: Optional[Formula] = None
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.transport = (
+            transport
+            if transport is not None
+            else Transport(pool_size=max(max_workers, 1))
+        )
+        if cache is not None:
+            self.transport = CachingTransport(self.transport, cache)
 
     def auth(self, login: str, password: str, company_name: str):
         """Authorize to YouGile and save token.
 
+        Key stored for the login, company and password is reused without
+        requests to YouGile, it is checked by the first request using
+        it. A wrong password doesn't match the stored key, so it is
+        checked by YouGile.
+
         :param login: User login
         :type login: str
         :param password: User password
@@ -33,10 +334,33 @@ class AppLogicModel:
         :type company_name: str
         :raises ValueError: Authorization error
         """
+        key = None
+        if self.key_store is not None:
+            key = self.key_store.get(login, password, company_name)
+        if key is None:
+            key = self.request_key(login, password, company_name)
+            if self.key_store is not None:
+                self.key_store.put(login, password, company_name, key)
+        self.token = key
+        self.credentials = (login, password, company_name)
+
+    def request_key(self, login: str, password: str, company_name: str) -> str:
+        """Get API key from YouGile, creating it if the user has none.
+
+        :param login: User login
+        :type login: str
+        :param password: User password
+        :type password: str
+        :param company_name: Company name
+        :type company_name: str
+        :raises ValueError: Authorization error
+        :return: API key
+        :rtype: str
+        """
         model = models.AuthKeyController_companiesList(
             login=login, password=password, name=company_name
         )
-        response = yougile.query(model)
+        response = self.transport.query(model)
         if response.status_code != 200:
             raise ValueError()
 
@@ -48,19 +372,42 @@ class AppLogicModel:
         model = models.AuthKeyController_search(
             login=login, password=password, companyId=company_id
         )
-        response = yougile.query(model)
+        response = self.transport.query(model)
         if response.status_code != 200:
             raise ValueError()
         if len(response.json()) != 0:
-            self.token = response.json()[0]["key"]
-        else:
-            model = models.AuthKeyController_create(
-                login=login, password=password, companyId=company_id
-            )
-            response = yougile.query(model)
-            if response.status_code != 201:
-                raise ValueError()
-            self.token = response.json()["key"]
+            return response.json()[0]["key"]
+
+        model = models.AuthKeyController_create(
+            login=login, password=password, companyId=company_id
+        )
+        response = self.transport.query(model)
+        if response.status_code != 201:
+            raise ValueError()
+        return response.json()["key"]
+
+    def query(self, model: yougile.BaseModel) -> requests.Response:
+        """Send YouGile request, authorizing again if the key is rejected.
+
+        :param model: YouGile request with token
+        :type model: yougile.BaseModel
+        :raises ValueError: Authorization error
+        :return: Server response
+        :rtype: requests.Response
+        """
+        response = self.transport.query(model)
+        if response.status_code != 401 or self.credentials is None:
+            return response
+
+        with self.auth_lock:
+            # Key may be already renewed by a concurrent request.
+            if model.token == self.token:
+                login, password, company_name = self.credentials
+                if self.key_store is not None:
+                    self.key_store.remove(login, company_name)
+                self.auth(login, password, company_name)
+        model.token = self.token
+        return self.transport.query(model)
 
     def get_projects(self) -> List[Project]:
         """Get project list in user company.
@@ -70,7 +417,7 @@ class AppLogicModel:
         :rtype: List[Project]
         """
         model = models.ProjectController_search(token=self.token)
-        response = yougile.query(model)
+        response = self.query(model)
         status = response.status_code
         if status != 200:
             raise ValueError()
@@ -93,7 +440,7 @@ class AppLogicModel:
         model = models.BoardController_search(
             token=self.token, projectId=project.id
         )
-        response = yougile.query(model)
+        response = self.query(model)
         status = response.status_code
         if status != 200:
             raise ValueError()
@@ -104,48 +451,542 @@ class AppLogicModel:
             boards.append(bd)
         return boards
 
-    def get_tasks_by_board(
-        self, board: Board, start_date: datetime, end_date: datetime
-    ) -> List[Task]:
-        """Get tasks list from all columns of specified board.
+    def iter_content(self, model: yougile.BaseModel) -> Iterator[dict]:
+        """Iterate over objects of YouGile list request page by page.
+
+        Pages are requested lazily, so only one page is kept in memory.
+        Every page is requested by its own copy of the model, which
+        isn't changed after the request.
+
+        :param model: YouGile list request with limit and offset fields
+        :type model: yougile.BaseModel
+        :raises ValueError: Bad response
+        :return: Iterator over objects from "content" of every page
+        :rtype: Iterator[dict]
+        """
+        model = model.model_copy(update={"limit": self.page_size, "offset": 0})
+        while True:
+            response = self.query(model)
+            status = response.status_code
+            if status != 200:
+                raise ValueError()
+
+            page = response.json()
+            content = page["content"]
+            yield from content
+            if not content or not page.get("paging", {}).get("next"):
+                return
+            # The copy keeps the token renewed by query().
+            model = model.model_copy(
+                update={"offset": model.offset + len(content)}
+            )
+
+    def get_column_ids(self, board: Board) -> List[str]:
+        """Get IDs of all columns of specified board.
 
         :param board: YouGile board
         :type board: Board
         :raises ValueError: Bad response
-        :return: Tasks list
-        :rtype: List[Task]
+        :return: Column IDs list
+        :rtype: List[str]
         """
         model = models.BoardController_get(token=self.token, id=board.id)
-        response = yougile.query(model)
+        response = self.query(model)
         status = response.status_code
         if status != 200:
             raise ValueError()
 
-        board = response.json()
-
         model = models.ColumnController_search(
-            token=self.token, boardId=board["id"]
+            token=self.token, boardId=response.json()["id"]
         )
-        response = yougile.query(model)
-        status = response.status_code
-        if status != 200:
-            raise ValueError()
+        return [column["id"] for column in self.iter_content(model)]
+
+    def iter_tasks_by_column(self, column_id: str) -> Iterator[Task]:
+        """Iterate over tasks of the specified column page by page.
+
+        :param column_id: YouGile column ID
+        :type column_id: str
+        :raises ValueError: Bad response
+        :return: Tasks iterator
+        :rtype: Iterator[Task]
+        """
+        model = models.TaskController_search(
+            token=self.token, columnId=column_id
+        )
+        for obj in self.iter_content(model):
+            yield Task(obj)
+
+    def get_tasks_by_column(self, column_id: str) -> List[Task]:
+        """Get tasks list from the specified column.
+
+        :param column_id: YouGile column ID
+        :type column_id: str
+        :raises ValueError: Bad response
+        :return: Tasks list
+        :rtype: List[Task]
+        """
+        return list(self.iter_tasks_by_column(column_id))
+
+    def iter_tasks(self, board: Board) -> Iterator[Task]:
+        """Iterate over tasks from all columns of specified board.
+
+        Columns and their pages are fetched lazily one after another, so
+        memory usage doesn't depend on the column size.
+
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Tasks iterator
+        :rtype: Iterator[Task]
+        """
+        for column_id in self.get_column_ids(board):
+            yield from self.iter_tasks_by_column(column_id)
+
+    def get_objects_by_column(self, column_id: str) -> List[dict]:
+        """Get YouGile task objects from the specified column.
+
+        :param column_id: YouGile column ID
+        :type column_id: str
+        :raises ValueError: Bad response
+        :return: Task objects list
+        :rtype: List[dict]
+        """
+        model = models.TaskController_search(
+            token=self.token, columnId=column_id
+        )
+        return list(self.iter_content(model))
+
+    def iter_column_objects(
+        self, board: Board
+    ) -> Iterator[Tuple[int, List[dict]]]:
+        """Load YouGile task objects of specified board column by column.
+
+        Columns are fetched concurrently and every column is yielded as
+        soon as it is loaded, so columns may come in any order.
+
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Iterator over column positions on the board and task
+            objects of the columns
+        :rtype: Iterator[Tuple[int, List[dict]]]
+        """
+        column_ids = self.get_column_ids(board)
+        if self.max_workers <= 1:
+            for position, column_id in enumerate(column_ids):
+                yield position, self.get_objects_by_column(column_id)
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, max(len(column_ids), 1))
+        )
+        try:
+            futures = {
+                executor.submit(self.get_objects_by_column, column_id): i
+                for i, column_id in enumerate(column_ids)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Columns not started yet are dropped if the caller stops
+            # early or a column fails.
+            executor.shutdown(cancel_futures=True)
+
+    def load_objects_by_board(self, board: Board) -> List[dict]:
+        """Load YouGile task objects from all columns of specified board.
+
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Task objects list in the order of columns
+        :rtype: List[dict]
+        """
+        return merge_columns(list(self.iter_column_objects(board)))
+
+    def sync_board(self, board: Board) -> data_structures.SyncResult:
+        """Synchronize snapshot of specified board with YouGile.
 
-        board_tasks = list()
-        for column in response.json()["content"]:
-            model = models.TaskController_search(
-                token=self.token, columnId=column["id"]
+        Only tasks which content hash differs from the previous sync are
+        parsed again, unchanged Task objects are reused. Tasks missing
+        in YouGile are removed from the snapshot.
+
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Numbers of added, updated and removed tasks
+        :rtype: data_structures.SyncResult
+        """
+        served = self.count_stale_responses()
+        objects = self.load_objects_by_board(board)
+        stale = self.count_stale_responses() != served
+        return self.update_snapshot(board, objects, stale)
+
+    def count_stale_responses(self) -> int:
+        """Get number of stale cached responses returned so far.
+
+        :return: Number of stale responses, 0 without the cache
+        :rtype: int
+        """
+        if isinstance(self.transport, CachingTransport):
+            return self.transport.stale_served
+        return 0
+
+    def update_snapshot(
+        self,
+        board: Board,
+        objects: List[dict],
+        stale: bool = False,
+        parsed_tasks: Optional[List[Task]] = None,
+    ) -> data_structures.SyncResult:
+        """Replace snapshot of specified board by loaded task objects, reusing
+        tasks which didn't change.
+
+        :param board: YouGile board
+        :type board: Board
+        :param objects: Task objects of all columns in the order of
+            columns
+        :type objects: List[dict]
+        :param stale: Some objects came from stale cached responses
+        :type stale: bool
+        :param parsed_tasks: Tasks already created from the objects, in
+            the same order, objects are parsed if not specified
+        :type parsed_tasks: Optional[List[Task]]
+        :return: Numbers of added, updated and removed tasks
+        :rtype: data_structures.SyncResult
+        """
+        snapshot = self.snapshots.get(board.id)
+        old_tasks = (
+            {task.id: task for task in snapshot.tasks} if snapshot else {}
+        )
+        old_hashes = snapshot.hashes if snapshot else {}
+
+        index = self.indexes.get(board.id)
+        result = data_structures.SyncResult()
+        tasks = []
+        hashes = {}
+        for i, obj in enumerate(objects):
+            task_id = obj["id"]
+            if task_id in hashes:
+                continue
+            hashes[task_id] = hash_object(obj)
+            if old_hashes.get(task_id) == hashes[task_id]:
+                tasks.append(old_tasks[task_id])
+                continue
+            tasks.append(
+                Task(obj) if parsed_tasks is None else parsed_tasks[i]
             )
-            response = yougile.query(model)
-            status = response.status_code
-            if status != 200:
-                raise ValueError()
+            if index is not None:
+                index.add(tasks[-1])
+            if task_id in old_tasks:
+                result.updated += 1
+            else:
+                result.added += 1
+        removed = old_tasks.keys() - hashes.keys()
+        result.removed = len(removed)
+        if index is not None:
+            for task_id in removed:
+                index.remove(task_id)
+
+        version = hash_snapshot(hashes)
+        self.snapshots[board.id] = BoardSnapshot(
+            board, tasks, hashes, stale=stale, version=version
+        )
+        table = self.tables.get(board.id)
+        # Unchanged tasks are reused, so the table of the same version
+        # stays valid.
+        if table is not None and table.version != version:
+            del self.tables[board.id]
+        return result
+
+    def iter_partial_rankings(
+        self, board: Board, start_date: datetime, end_date: datetime
+    ) -> Iterator[List[Task]]:
+        """Load the snapshot of specified board if it isn't loaded yet,
+        yielding sorted tasks of the loaded columns after every column.
+
+        The partial rankings ignore dependencies between tasks. When the
+        iterator is exhausted, the snapshot is loaded and
+        rank_tasks_by_board gives the final ranking. Tasks created for
+        the partial rankings are reused by the snapshot. Nothing is
+        yielded if the board already has a snapshot.
+
+        :param board: YouGile board
+        :type board: Board
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :raises ValueError: Bad response
+        :return: Iterator over sorted relevant tasks of loaded columns
+        :rtype: Iterator[List[Task]]
+        """
+        if board.id in self.snapshots:
+            return
+        ranking = algorithms.RunningRanking(
+            start_date, end_date, self.priority_formula
+        )
+        served = self.count_stale_responses()
+        columns = []
+        column_tasks = {}
+        for position, objects in self.iter_column_objects(board):
+            columns.append((position, objects))
+            column_tasks[position] = [Task(obj) for obj in objects]
+            ranking.add(column_tasks[position])
+            yield ranking.tasks
+        stale = self.count_stale_responses() != served
+        tasks = [
+            task
+            for position in sorted(column_tasks)
+            for task in column_tasks[position]
+        ]
+        self.update_snapshot(board, merge_columns(columns), stale, tasks)
+
+    def get_board_snapshot(self, board: Board) -> BoardSnapshot:
+        """Get tasks of specified board, loading them only if the board has no
+        snapshot yet.
+
+        A snapshot built from stale cached responses is synchronized
+        again once their background revalidation has finished, so
+        revalidated data reaches it without Refresh.
+
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Board snapshot
+        :rtype: BoardSnapshot
+        """
+        snapshot = self.snapshots.get(board.id)
+        if snapshot is None or (
+            snapshot.stale
+            and isinstance(self.transport, CachingTransport)
+            and not self.transport.revalidating
+        ):
+            self.sync_board(board)
+        return self.snapshots[board.id]
+
+    def get_task_table(self, board: Board) -> TaskTable:
+        """Get columnar table of the board snapshot tasks, building it again
+        only when the snapshot version changes.
+
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Task table
+        :rtype: TaskTable
+        """
+        return self.get_snapshot_table(self.get_board_snapshot(board))
+
+    def get_snapshot_table(self, snapshot: BoardSnapshot) -> TaskTable:
+        """Get columnar table of specified snapshot tasks.
+
+        :param snapshot: Board snapshot, which may be already replaced
+            by a newer synchronization
+        :type snapshot: BoardSnapshot
+        :return: Task table
+        :rtype: TaskTable
+        """
+        board_id = snapshot.board.id
+        table = self.tables.get(board_id)
+        if table is not None and table.version == snapshot.version:
+            return table
+        table = TaskTable(snapshot.tasks, snapshot.version)
+        # A table of an old snapshot doesn't replace the current one.
+        if self.snapshots.get(board_id) is snapshot:
+            self.tables[board_id] = table
+        return table
+
+    def get_task_index(self, board: Board) -> IntervalIndex:
+        """Get interval index of the board snapshot tasks.
+
+        The index is built once and then updated by synchronizations.
+
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Interval index
+        :rtype: IntervalIndex
+        """
+        snapshot = self.get_board_snapshot(board)
+        if board.id not in self.indexes:
+            self.indexes[board.id] = IntervalIndex(snapshot.tasks)
+        return self.indexes[board.id]
+
+    def get_relevant_tasks_by_board(
+        self, board: Board, start_date: datetime, end_date: datetime
+    ) -> List[Task]:
+        """Get tasks of specified board which may be done during time interval
+        using the interval index.
+
+        :param board: YouGile board
+        :type board: Board
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :raises ValueError: Bad response
+        :return: Relevant tasks
+        :rtype: List[Task]
+        """
+        return self.get_task_index(board).relevant(start_date, end_date)
 
-            board_tasks += [Task(obj) for obj in response.json()["content"]]
+    def refresh_board(self, board: Board) -> data_structures.SyncResult:
+        """Drop cached board responses and synchronize board snapshot.
 
-        sorted_tasks = sort_tasks(board_tasks, start_date, end_date)
+        :param board: YouGile board
+        :type board: Board
+        :raises ValueError: Bad response
+        :return: Numbers of added, updated and removed tasks
+        :rtype: data_structures.SyncResult
+        """
+        if isinstance(self.transport, CachingTransport):
+            self.transport.cache.clear(
+                [
+                    "BoardController_get",
+                    "ColumnController_search",
+                    "TaskController_search",
+                ]
+            )
+        return self.sync_board(board)
 
-        return sorted_tasks
+    def get_tasks_by_board(
+        self, board: Board, start_date: datetime, end_date: datetime
+    ) -> List[Task]:
+        """Get sorted tasks list from all columns of specified board.
+
+        Tasks are loaded once and then only ranked by their TaskTable
+        for every new time interval until the board is synchronized
+        again.
+
+        :param board: YouGile board
+        :type board: Board
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :raises ValueError: Bad response
+        :return: Tasks list
+        :rtype: List[Task]
+        """
+        return self.get_task_table(board).sort_tasks(
+            start_date, end_date, self.priority_formula
+        )
+
+    def get_tasks_by_board_windows(
+        self, board: Board, windows: List[Tuple[datetime, datetime]]
+    ) -> List[List[Task]]:
+        """Get sorted tasks lists of specified board for many time intervals at
+        once.
+
+        :param board: YouGile board
+        :type board: Board
+        :param windows: Start and end dates of time intervals
+        :type windows: List[Tuple[datetime, datetime]]
+        :raises ValueError: Bad response
+        :return: Tasks lists for every time interval
+        :rtype: List[List[Task]]
+        """
+        return self.get_task_table(board).sort_tasks_by_windows(
+            windows, self.priority_formula
+        )
+
+    def build_schedule_by_board(
+        self,
+        board: Board,
+        start_day: date,
+        end_day: date,
+        daily_capacity: float,
+    ) -> data_structures.Schedule:
+        """Distribute remaining hours of specified board tasks over days.
+
+        :param board: YouGile board
+        :type board: Board
+        :param start_day: First day of the span
+        :type start_day: date
+        :param end_day: Last day of the span
+        :type end_day: date
+        :param daily_capacity: Working hours per day
+        :type daily_capacity: float
+        :raises ValueError: Bad response
+        :return: Schedule of every day and hours which didn't fit
+        :rtype: data_structures.Schedule
+        """
+        snapshot = self.get_board_snapshot(board)
+        return build_schedule(
+            snapshot.tasks, start_day, end_day, daily_capacity
+        )
+
+    def build_team_plan_by_board(
+        self,
+        board: Board,
+        start_date: datetime,
+        end_date: datetime,
+        capacities: Dict[str, float],
+    ) -> data_structures.TeamPlan:
+        """Distribute remaining hours of specified board tasks between people.
+
+        :param board: YouGile board
+        :type board: Board
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :param capacities: Working hours during the interval by user ID
+        :type capacities: Dict[str, float]
+        :raises ValueError: Bad response
+        :return: Plan of every person and hours which didn't fit
+        :rtype: data_structures.TeamPlan
+        """
+        snapshot = self.get_board_snapshot(board)
+        return build_team_plan(
+            snapshot.tasks, start_date, end_date, capacities
+        )
+
+    def rank_tasks_by_board(
+        self, board: Board, start_date: datetime, end_date: datetime
+    ) -> TaskRanking:
+        """Rank tasks of specified board to take them page by page.
+
+        :param board: YouGile board
+        :type board: Board
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :raises ValueError: Bad response
+        :return: Ranking of relevant tasks
+        :rtype: TaskRanking
+        """
+        return self.rank_snapshot(
+            self.get_board_snapshot(board), start_date, end_date
+        )
+
+    def rank_snapshot(
+        self, snapshot: BoardSnapshot, start_date: datetime, end_date: datetime
+    ) -> TaskRanking:
+        """Rank tasks of specified snapshot to take them page by page.
+
+        :param snapshot: Board snapshot
+        :type snapshot: BoardSnapshot
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :return: Ranking of relevant tasks
+        :rtype: TaskRanking
+        """
+        return self.get_snapshot_table(snapshot).ranking(
+            start_date, end_date, self.priority_formula, self.metric_cache
+        )
+
+    def set_priority_formula(self, text: Optional[str]):
+        """Rank tasks by user-defined priority formula.
+
+        :param text: Formula text, see scheduler.formula, the built-in
+            priority metric is used if not specified
+        :type text: Optional[str]
+        :raises FormulaError: Formula has bad syntax or uses unknown names
+        """
+        self.priority_formula = None if text is None else compile_formula(text)
 
     def save_board(self, board: Board):
         """Save board chosen by the user.
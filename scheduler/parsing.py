@@ -0,0 +1,33 @@
+"""Hashing of YouGile task objects.
+
+Every object is hashed to detect changes between syncs, so unchanged
+tasks are reused instead of being parsed again.
+"""
+
+import hashlib
+import json
+from typing import Dict
+
+
+def hash_object(obj: dict) -> str:
+    """Compute hash of YouGile object content.
+
+    :param obj: YouGile object
+    :type obj: dict
+    :return: Content hash
+    :rtype: str
+    """
+    content = json.dumps(obj, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def hash_snapshot(hashes: Dict[str, str]) -> str:
+    """Compute hash of board content from hashes of its task objects.
+
+    :param hashes: Content hashes by task ID in the order of tasks
+    :type hashes: Dict[str, str]
+    :return: Content hash of the board
+    :rtype: str
+    """
+    content = "".join(f"{task_id}:{h}\n" for task_id, h in hashes.items())
+    return hashlib.sha1(content.encode()).hexdigest()
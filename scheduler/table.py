@@ -0,0 +1,566 @@
+"""Columnar storage of tasks for vectorized ranking.
+
+TaskTable keeps task fields used by the scheduling metrics in NumPy
+arrays, so relevance and priority of all tasks are computed by a few
+array operations instead of Python calls per task. Results are the same
+as of the functions in scheduler.algorithms: sort_tasks, or
+sort_tasks_by_dependencies if some tasks have subtasks.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from scheduler.algorithms import MetricCache
+from scheduler.data_structures import Task, to_epoch_ms
+from scheduler.dependencies import order_by_dependencies
+from scheduler.formula import Formula, Sticker, sticker_matches
+
+
+def _select_top(keys: np.ndarray, rows: np.ndarray, k: int) -> np.ndarray:
+    """Get positions of k smallest keys sorted by key and then by row using
+    partial selection."""
+    if k < len(keys):
+        threshold = np.partition(keys, k - 1)[k - 1]
+        # All rows tied at the threshold are kept, so the choice among
+        # them is made by row order and pages are deterministic. NaN
+        # keys are kept too, lexsort places them last.
+        (candidates,) = np.nonzero(~(keys > threshold))
+    else:
+        candidates = np.arange(len(keys))
+    order = np.lexsort((rows[candidates], keys[candidates]))
+    return candidates[order[:k]]
+
+
+class TaskTable:
+    """Tasks with metric fields stored in columns.
+
+    :param tasks: Tasks in the order of rows
+    :param archived: Archived flags
+    :param completed: Completed flags
+    :param has_deadline: Flags of tasks with deadline
+    :param deadline_ms: Due dates in epoch milliseconds, 0 if missing
+    :param has_start_date: Flags of deadlines with start date
+    :param start_date_ms: Start dates in epoch milliseconds, 0 if
+        missing
+    :param has_time_tracking: Flags of tasks with time tracking
+    :param plan: Planned hours, 0 if missing
+    :param work: Completed hours, 0 if missing
+    :param m_time_tracking: Time tracking metric, which doesn't depend
+        on time interval
+    :param has_dependencies: Flag whether some tasks have subtasks, which
+        have to be ranked before them
+    :param sticker_columns: Flags of tasks with stickers used in
+        formulas, filled on the first use
+    :param version: Content version of the tasks, None if unknown
+    """
+
+    def __init__(self, tasks: Iterable[Task], version: Optional[str] = None):
+        """Fill columns from tasks.
+
+        :param tasks: Tasks to store, may be a lazy iterator
+        :type tasks: Iterable[Task]
+        :param version: Content version of the tasks, such as
+            BoardSnapshot.version, rankings aren't cached without it
+        :type version: Optional[str]
+        """
+        self.tasks: List[Task] = list(tasks)
+        self.version = version
+        n = len(self.tasks)
+        self.archived = np.fromiter(
+            (task.archived for task in self.tasks), dtype=bool, count=n
+        )
+        self.completed = np.fromiter(
+            (task.completed for task in self.tasks), dtype=bool, count=n
+        )
+        deadlines = [task.deadline for task in self.tasks]
+        self.has_deadline = np.fromiter(
+            (dl is not None for dl in deadlines), dtype=bool, count=n
+        )
+        self.deadline_ms = np.fromiter(
+            (dl.deadline_ms if dl is not None else 0 for dl in deadlines),
+            dtype=np.int64,
+            count=n,
+        )
+        self.has_start_date = np.fromiter(
+            (
+                dl is not None and dl.start_date_ms is not None
+                for dl in deadlines
+            ),
+            dtype=bool,
+            count=n,
+        )
+        self.start_date_ms = np.fromiter(
+            (
+                (
+                    dl.start_date_ms
+                    if dl is not None and dl.start_date_ms is not None
+                    else 0
+                )
+                for dl in deadlines
+            ),
+            dtype=np.int64,
+            count=n,
+        )
+        time_trackings = [task.time_tracking for task in self.tasks]
+        self.has_time_tracking = np.fromiter(
+            (tt is not None for tt in time_trackings), dtype=bool, count=n
+        )
+        self.plan = np.fromiter(
+            (tt.plan if tt is not None else 0 for tt in time_trackings),
+            dtype=np.float64,
+            count=n,
+        )
+        self.work = np.fromiter(
+            (tt.work if tt is not None else 0 for tt in time_trackings),
+            dtype=np.float64,
+            count=n,
+        )
+        self.m_time_tracking = self.time_tracking_metric()
+        self.has_dependencies = any(task.subtasks for task in self.tasks)
+        self.sticker_columns: Dict[Sticker, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        """Get number of tasks.
+
+        :return: Number of tasks
+        :rtype: int
+        """
+        return len(self.tasks)
+
+    def relevant_mask(self, start_ms: int, end_ms: int) -> np.ndarray:
+        """Check which tasks may be done during time interval.
+
+        :param start_ms: Start of time interval in epoch milliseconds
+        :type start_ms: int
+        :param end_ms: End of time interval in epoch milliseconds
+        :type end_ms: int
+        :return: Boolean mask of relevant tasks
+        :rtype: np.ndarray
+        """
+        in_interval = (self.deadline_ms > start_ms) & (
+            ~self.has_start_date | (self.start_date_ms < end_ms)
+        )
+        return (
+            ~self.archived
+            & ~self.completed
+            & (~self.has_deadline | in_interval)
+        )
+
+    def deadline_metric(
+        self, start_ms: int, end_ms: int, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Compute deadline metric of tasks.
+
+        Values of tasks which deadline isn't after the interval start
+        are undefined, such tasks are never relevant.
+
+        :param start_ms: Start of time interval in epoch milliseconds
+        :type start_ms: int
+        :param end_ms: End of time interval in epoch milliseconds
+        :type end_ms: int
+        :param rows: Indices of tasks to compute metric for, all tasks
+            if not specified
+        :type rows: Optional[np.ndarray]
+        :return: Metric values
+        :rtype: np.ndarray
+        """
+        rows = slice(None) if rows is None else rows
+        delta_deadline = (self.deadline_ms[rows] - start_ms) / 1000
+        delta_start = np.where(
+            self.has_start_date[rows],
+            (end_ms - self.start_date_ms[rows]) / (end_ms - start_ms),
+            1.0,
+        )
+        np.minimum(delta_start, 1, out=delta_start)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            metric = delta_start / delta_deadline**2
+        return np.where(self.has_deadline[rows], metric, 0.0)
+
+    def time_tracking_metric(self) -> np.ndarray:
+        """Compute time tracking metric of all tasks.
+
+        :return: Metric values
+        :rtype: np.ndarray
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            metric = (self.plan - self.work) / self.plan
+        # Like count_time_tracking_metric, zero planned hours give 0.
+        return np.where(self.has_time_tracking & (self.plan != 0), metric, 0.0)
+
+    def sticker_column(self, sticker: Sticker) -> np.ndarray:
+        """Get flags of tasks with sticker used in formula.
+
+        :param sticker: Sticker ID and state, None for any state
+        :type sticker: Sticker
+        :return: 1 for tasks with the sticker, 0 otherwise
+        :rtype: np.ndarray
+        """
+        column = self.sticker_columns.get(sticker)
+        if column is None:
+            column = np.fromiter(
+                (
+                    sticker_matches(task.stickers, sticker)
+                    for task in self.tasks
+                ),
+                dtype=np.float64,
+                count=len(self.tasks),
+            )
+            self.sticker_columns[sticker] = column
+        return column
+
+    def formula_columns(
+        self,
+        formula: Formula,
+        start_ms: int,
+        end_ms: int,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[np.ndarray]:
+        """Compute columns of variables and stickers used in formula.
+
+        :param formula: Compiled priority formula
+        :type formula: Formula
+        :param start_ms: Start of time interval in epoch milliseconds
+        :type start_ms: int
+        :param end_ms: End of time interval in epoch milliseconds
+        :type end_ms: int
+        :param rows: Indices of tasks to compute columns for, all tasks
+            if not specified
+        :type rows: Optional[np.ndarray]
+        :return: Arguments of the formula vector evaluator
+        :rtype: List[np.ndarray]
+        """
+        selected = slice(None) if rows is None else rows
+        columns = []
+        for name in formula.variables:
+            if name == "m_deadline":
+                column = self.deadline_metric(start_ms, end_ms, rows)
+            elif name == "deadline_hours":
+                column = np.where(
+                    self.has_deadline[selected],
+                    (self.deadline_ms[selected] - start_ms) / 3600000,
+                    np.inf,
+                )
+            elif name == "has_deadline":
+                column = self.has_deadline[selected].astype(np.float64)
+            elif name == "start_overlap":
+                column = np.where(
+                    self.has_start_date[selected],
+                    (end_ms - self.start_date_ms[selected])
+                    / (end_ms - start_ms),
+                    1.0,
+                )
+                np.minimum(column, 1, out=column)
+            elif name == "remaining":
+                column = self.m_time_tracking[selected]
+            elif name == "remaining_hours":
+                column = self.plan[selected] - self.work[selected]
+            else:
+                column = self.has_time_tracking[selected].astype(np.float64)
+            columns.append(column)
+        for sticker in formula.stickers:
+            columns.append(self.sticker_column(sticker)[selected])
+        return columns
+
+    def priority(
+        self,
+        start_ms: int,
+        end_ms: int,
+        rows: Optional[np.ndarray] = None,
+        formula: Optional[Formula] = None,
+    ) -> np.ndarray:
+        """Compute priority metric of tasks.
+
+        :param start_ms: Start of time interval in epoch milliseconds
+        :type start_ms: int
+        :param end_ms: End of time interval in epoch milliseconds
+        :type end_ms: int
+        :param rows: Indices of tasks to compute metric for, all tasks
+            if not specified
+        :type rows: Optional[np.ndarray]
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :return: Metric values
+        :rtype: np.ndarray
+        """
+        if formula is not None:
+            return formula.evaluate_columns(
+                self.formula_columns(formula, start_ms, end_ms, rows),
+                len(self.tasks) if rows is None else len(rows),
+            )
+        m_deadline = self.deadline_metric(start_ms, end_ms, rows)
+        m_time_tracking = self.m_time_tracking[
+            slice(None) if rows is None else rows
+        ]
+        return np.where(
+            m_deadline == 0,
+            m_time_tracking,
+            np.where(
+                m_time_tracking == 0, m_deadline, m_deadline * m_time_tracking
+            ),
+        )
+
+    def order(self, rows: np.ndarray, priority: np.ndarray) -> np.ndarray:
+        """Order rows by priority, placing subtasks before their parents.
+
+        :param rows: Row indices of relevant tasks
+        :type rows: np.ndarray
+        :param priority: Priorities of rows
+        :type priority: np.ndarray
+        :return: Row indices with most prioritized tasks in the
+            beginning
+        :rtype: np.ndarray
+        """
+        if not self.has_dependencies:
+            return rows[np.argsort(-priority, kind="stable")]
+        tasks = self.tasks
+        order = order_by_dependencies(
+            [tasks[row] for row in rows], priority.tolist()
+        )
+        return rows[np.array(order, dtype=np.intp)]
+
+    def rank(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        formula: Optional[Formula] = None,
+    ) -> np.ndarray:
+        """Get row indices of relevant tasks ordered by priority.
+
+        Tasks with equal priority keep their order, like in sort_tasks.
+        Subtasks go before their parents.
+
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :return: Row indices with most prioritized tasks in the
+            beginning
+        :rtype: np.ndarray
+        """
+        start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+        (rows,) = np.nonzero(self.relevant_mask(start_ms, end_ms))
+        return self.order(rows, self.priority(start_ms, end_ms, rows, formula))
+
+    def sort_tasks(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        formula: Optional[Formula] = None,
+    ) -> List[Task]:
+        """Sort relevant tasks according to their priority.
+
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :return: Sorted list of tasks with most prioritized tasks in the
+            beginning
+        :rtype: List[Task]
+        """
+        tasks = self.tasks
+        return [tasks[row] for row in self.rank(start_date, end_date, formula)]
+
+    def sort_tasks_by_windows(
+        self,
+        windows: Iterable[Tuple[datetime, datetime]],
+        formula: Optional[Formula] = None,
+    ) -> List[List[Task]]:
+        """Sort relevant tasks according to their priority for every time
+        interval.
+
+        Archived and completed tasks are dropped once for all intervals
+        and the time tracking metric is shared between them.
+
+        :param windows: Start and end dates of time intervals
+        :type windows: Iterable[Tuple[datetime, datetime]]
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :return: Results of sort_tasks for every time interval
+        :rtype: List[List[Task]]
+        """
+        (active,) = np.nonzero(~self.archived & ~self.completed)
+        deadline_ms = self.deadline_ms[active]
+        start_date_ms = self.start_date_ms[active]
+        has_deadline = self.has_deadline[active]
+        has_start_date = self.has_start_date[active]
+        tasks = self.tasks
+        rankings = []
+        for start_date, end_date in windows:
+            start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+            mask = ~has_deadline | (
+                (deadline_ms > start_ms)
+                & (~has_start_date | (start_date_ms < end_ms))
+            )
+            rows = active[mask]
+            priority = self.priority(start_ms, end_ms, rows, formula)
+            order = self.order(rows, priority)
+            rankings.append([tasks[row] for row in order])
+        return rankings
+
+    def ranking(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        formula: Optional[Formula] = None,
+        cache: Optional[MetricCache] = None,
+    ) -> "TaskRanking":
+        """Compute priorities of relevant tasks to take them page by page.
+
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :param cache: Cache of priorities by table version and time
+            interval, priorities are always computed if not specified
+        :type cache: Optional[MetricCache]
+        :return: Ranking of relevant tasks
+        :rtype: TaskRanking
+        """
+        return TaskRanking(self, start_date, end_date, formula, cache)
+
+    def top_k(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        k: int,
+        formula: Optional[Formula] = None,
+    ) -> List[Task]:
+        """Get k most prioritized tasks without sorting all of them.
+
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :param k: Number of tasks to return
+        :type k: int
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :return: First k tasks of sort_tasks result
+        :rtype: List[Task]
+        """
+        return self.ranking(start_date, end_date, formula).next_page(k)
+
+
+class TaskRanking:
+    """Relevant tasks of TaskTable which are sorted by priority only when they
+    are taken.
+
+    Pages follow each other in the order of TaskTable.sort_tasks, ties
+    are broken by the table row. If the table has dependencies, the
+    whole order is computed at once and pages are its slices.
+
+    :param table: Ranked table
+    :param rows: Rows of relevant tasks not taken yet
+    :param keys: Negated priorities of rows, None if rows are already
+        ordered
+    """
+
+    def __init__(
+        self,
+        table: TaskTable,
+        start_date: datetime,
+        end_date: datetime,
+        formula: Optional[Formula] = None,
+        cache: Optional[MetricCache] = None,
+    ):
+        """Compute priorities of relevant tasks.
+
+        :param table: Table to rank
+        :type table: TaskTable
+        :param start_date: Start date of time interval
+        :type start_date: datetime
+        :param end_date: End date of time interval
+        :type end_date: datetime
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :param cache: Cache of priorities by table version and time
+            interval, used only if the table has a version
+        :type cache: Optional[MetricCache]
+        """
+        start_ms, end_ms = to_epoch_ms(start_date), to_epoch_ms(end_date)
+        self.table = table
+        self.rows: np.ndarray
+        self.keys: Optional[np.ndarray]
+        if cache is None or table.version is None:
+            self.rows, self.keys = self.compute(start_ms, end_ms, formula)
+            return
+        key = (
+            table.version,
+            start_ms,
+            end_ms,
+            None if formula is None else formula.text,
+        )
+        # Taking pages replaces the arrays instead of changing them, so
+        # cached arrays are shared between rankings.
+        self.rows, self.keys = cache.lookup(
+            key, lambda: self.compute(start_ms, end_ms, formula)
+        )
+
+    def compute(
+        self, start_ms: int, end_ms: int, formula: Optional[Formula]
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Compute relevant rows and their keys.
+
+        :param start_ms: Start of time interval in epoch milliseconds
+        :type start_ms: int
+        :param end_ms: End of time interval in epoch milliseconds
+        :type end_ms: int
+        :param formula: User-defined priority formula, the built-in
+            metric if not specified
+        :type formula: Optional[Formula]
+        :return: Rows of relevant tasks and their negated priorities,
+            or ordered rows and None if the table has dependencies
+        :rtype: Tuple[np.ndarray, Optional[np.ndarray]]
+        """
+        table = self.table
+        (rows,) = np.nonzero(table.relevant_mask(start_ms, end_ms))
+        keys = -table.priority(start_ms, end_ms, rows, formula)
+        if table.has_dependencies:
+            return table.order(rows, -keys), None
+        return rows, keys
+
+    def __len__(self) -> int:
+        """Get number of tasks not taken yet.
+
+        :return: Number of remaining tasks
+        :rtype: int
+        """
+        return len(self.rows)
+
+    def next_page(self, k: int) -> List[Task]:
+        """Take next k most prioritized tasks.
+
+        :param k: Page size
+        :type k: int
+        :return: At most k tasks with most prioritized tasks in the
+            beginning
+        :rtype: List[Task]
+        """
+        if k <= 0 or not len(self.rows):
+            return []
+        tasks = self.table.tasks
+        if self.keys is None:
+            page_rows, self.rows = self.rows[:k], self.rows[k:]
+            return [tasks[row] for row in page_rows]
+        positions = _select_top(self.keys, self.rows, k)
+        page_rows = self.rows[positions]
+        remaining = np.ones(len(self.rows), dtype=bool)
+        remaining[positions] = False
+        self.rows = self.rows[remaining]
+        self.keys = self.keys[remaining]
+        return [tasks[row] for row in page_rows]
@@ -1,15 +1,48 @@
 import datetime
+import json
+import math
+import os
+import random
+import stat
+import tempfile
+import threading
 import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from unittest import mock
 
-from scheduler import controllers, data_structures
+import numpy as np
+import yougile.models
+
+from scheduler import controllers, data_structures, markup, models, views
 from scheduler.algorithms import (
+    MetricCache,
+    RunningRanking,
+    build_schedule,
+    build_team_plan,
     count_deadline_metric,
     count_priority_metric,
     count_time_tracking_metric,
+    formula_metric_ms,
     get_relevant_tasks,
+    iter_ranked_tasks,
+    sort_tasks,
+    sort_tasks_by_dependencies,
+    sort_tasks_by_windows,
+    top_k_tasks,
 )
+from scheduler.background import BackgroundRunner
+from scheduler.cache import ResponseCache
+from scheduler.data_structures import to_epoch_ms
+from scheduler.dependencies import DependencyGraph
+from scheduler.formula import DEFAULT_FORMULA, FormulaError, compile_formula
+from scheduler.index import IntervalIndex
+from scheduler.keystore import KeyStore
+from scheduler.markup import markdown_to_text, reference_markdown_to_text
 from scheduler.models import Task
+from scheduler.parsing import hash_object
+from scheduler.table import TaskTable, _select_top
 
 
 class FindByTitleTests(unittest.TestCase):
@@ -613,3 +646,1993 @@ class PriorityMetricTests(unittest.TestCase):
         )
         self.assertTrue(abs(pr_metric - dl_metric * tt_metric) < 1e-9)
         self.assertTrue(abs(pr_metric - 1.34e-11) < 1e-11)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeYouGile:
+    def __init__(self, columns, failed_columns=(), key=None):
+        self.columns = columns
+        self.failed_columns = failed_columns
+        self.queries = []
+        self.key = key
+        self.password = "password"
+
+    @staticmethod
+    def page(model, objects):
+        start, end = model.offset, model.offset + model.limit
+        content = objects[start:end]
+        return FakeResponse(
+            {
+                "paging": {
+                    "count": len(content),
+                    "limit": model.limit,
+                    "offset": model.offset,
+                    "next": end < len(objects),
+                },
+                "content": content,
+            }
+        )
+
+    def auth(self, model):
+        if model.password != self.password:
+            return FakeResponse({}, 401)
+        if isinstance(model, yougile.models.AuthKeyController_companiesList):
+            return FakeResponse({"content": [{"id": "company"}]})
+        if isinstance(model, yougile.models.AuthKeyController_search):
+            return FakeResponse([{"key": self.key}] if self.key else [])
+        self.key = f"key{len(self.queries)}"
+        return FakeResponse({"key": self.key}, 201)
+
+    def query(self, model):
+        self.queries.append(model.model_copy())
+        if model._url.startswith("/api-v2/auth"):
+            return self.auth(model)
+        if self.key is not None and model.token != self.key:
+            return FakeResponse({}, 401)
+        if isinstance(model, yougile.models.ProjectController_search):
+            return FakeResponse({"content": []})
+        if isinstance(model, yougile.models.BoardController_get):
+            return FakeResponse({"id": model.id})
+        if isinstance(model, yougile.models.ColumnController_search):
+            return self.page(
+                model, [{"id": column} for column in self.columns]
+            )
+        if isinstance(model, yougile.models.TaskController_search):
+            if model.columnId in self.failed_columns:
+                return FakeResponse({}, 500)
+            return self.page(model, self.columns[model.columnId])
+        raise AssertionError(f"Unexpected query {model}")
+
+    def close(self):
+        pass
+
+
+class GetTasksByBoardTests(unittest.TestCase):
+    COLUMNS = {
+        f"column{i}": [
+            {
+                "id": f"{i}-{j}",
+                "title": f"task{i}-{j}",
+                "timeTracking": {"plan": 10, "work": 10 - i},
+            }
+            for j in range(3)
+        ]
+        for i in range(1, 6)
+    }
+    START = datetime.datetime.strptime("03/05/2024 18:00", "%d/%m/%Y %H:%M")
+    END = datetime.datetime.strptime("06/05/2024 18:00", "%d/%m/%Y %H:%M")
+
+    def get_task_ids(self, max_workers):
+        model = models.AppLogicModel(
+            max_workers=max_workers, transport=FakeYouGile(self.COLUMNS)
+        )
+        tasks = model.get_tasks_by_board(
+            data_structures.Board("board", "board"), self.START, self.END
+        )
+        return [task.id for task in tasks]
+
+    def test_concurrent_same_as_sequential(self):
+        sequential = self.get_task_ids(1)
+        self.assertEqual(len(sequential), 15)
+        self.assertEqual(sequential[:3], ["5-0", "5-1", "5-2"])
+        for _ in range(5):
+            self.assertEqual(self.get_task_ids(4), sequential)
+
+    def test_failed_column(self):
+        model = models.AppLogicModel(
+            max_workers=4,
+            transport=FakeYouGile(self.COLUMNS, failed_columns=("column3",)),
+        )
+        with self.assertRaises(ValueError):
+            model.get_tasks_by_board(
+                data_structures.Board("board", "board"), self.START, self.END
+            )
+
+
+class IterTasksTests(unittest.TestCase):
+    COLUMNS = {
+        "column1": [{"id": str(i), "title": f"task{i}"} for i in range(7)],
+        "column2": [],
+        "column3": [{"id": str(i), "title": f"task{i}"} for i in range(7, 9)],
+    }
+
+    def test_all_pages(self):
+        fake = FakeYouGile(self.COLUMNS)
+        model = models.AppLogicModel(page_size=3, transport=fake)
+        tasks = list(model.iter_tasks(data_structures.Board("board", "board")))
+        self.assertEqual([task.id for task in tasks], list(map(str, range(9))))
+        task_queries = [
+            (query.columnId, query.offset, query.limit)
+            for query in fake.queries
+            if isinstance(query, yougile.models.TaskController_search)
+        ]
+        self.assertEqual(
+            task_queries,
+            [
+                ("column1", 0, 3),
+                ("column1", 3, 3),
+                ("column1", 6, 3),
+                ("column2", 0, 3),
+                ("column3", 0, 3),
+            ],
+        )
+
+    def test_lazy(self):
+        fake = FakeYouGile(self.COLUMNS)
+        model = models.AppLogicModel(page_size=3, transport=fake)
+        tasks = model.iter_tasks(data_structures.Board("board", "board"))
+        self.assertEqual(len(fake.queries), 0)
+        next(tasks)
+        n_queries = len(fake.queries)
+        for _ in range(2):
+            next(tasks)
+        self.assertEqual(len(fake.queries), n_queries)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append(
+            (
+                self.client_address[1],
+                self.path,
+                self.headers.get("Authorization"),
+            )
+        )
+        body = json.dumps({"content": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TransportTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.transport = models.Transport(
+            base_url=f"http://{host}:{port}/", timeout=5
+        )
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_request_format(self):
+        response = self.transport.query(
+            yougile.models.ColumnController_search(
+                token="key", boardId="board", limit=10
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        _, path, authorization = self.server.requests[0]
+        self.assertEqual(
+            path, "/api-v2/columns?boardId=board&limit=10&offset=0"
+        )
+        self.assertEqual(authorization, "Bearer key")
+
+    def test_connection_reused(self):
+        model = models.AppLogicModel(transport=self.transport)
+        model.token = "key"
+        model.get_projects()
+        model.get_projects()
+        model.get_projects()
+        ports = {port for port, _, _ in self.server.requests}
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(ports), 1)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    COLUMNS = {"column1": [{"id": "1", "title": "task1"}]}
+
+    def query_columns(self, transport):
+        return transport.query(
+            yougile.models.ColumnController_search(token="key", boardId="b")
+        ).json()
+
+    def test_fresh_hit(self):
+        fake = FakeYouGile(self.COLUMNS)
+        transport = models.CachingTransport(fake, ResponseCache())
+        first = self.query_columns(transport)
+        second = self.query_columns(transport)
+        self.assertEqual(first, second)
+        self.assertEqual(len(fake.queries), 1)
+
+    def test_stale_while_revalidate(self):
+        fake = FakeYouGile(self.COLUMNS)
+        transport = models.CachingTransport(
+            fake, ResponseCache(ttls={"ColumnController_search": 0})
+        )
+        self.query_columns(transport)
+        fake.columns = {"column2": []}
+        stale = self.query_columns(transport)
+        self.assertEqual(stale["content"], [{"id": "column1"}])
+        transport.close()
+        self.assertEqual(len(fake.queries), 2)
+        revalidated = transport.cache.get(
+            models.CachingTransport.cache_key(
+                yougile.models.ColumnController_search(
+                    token="key", boardId="b"
+                )
+            ),
+            "ColumnController_search",
+        )
+        self.assertEqual(revalidated.json()["content"], [{"id": "column2"}])
+
+    def test_expired(self):
+        fake = FakeYouGile(self.COLUMNS)
+        transport = models.CachingTransport(
+            fake,
+            ResponseCache(ttls={"ColumnController_search": 0}, stale_ttl=0),
+        )
+        self.query_columns(transport)
+        self.query_columns(transport)
+        self.assertEqual(len(fake.queries), 2)
+
+    def test_not_modified(self):
+        cache = ResponseCache(ttls={"ColumnController_search": 0})
+        cache.put("key", "ColumnController_search", {"content": []}, "v1")
+        self.assertFalse(cache.get("key", "ColumnController_search").fresh)
+        cache.ttls = {"ColumnController_search": 60}
+        cache.touch("key")
+        self.assertTrue(cache.get("key", "ColumnController_search").fresh)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "TaskController_search", 1)
+        cache.put("b", "TaskController_search", 2)
+        time.sleep(0.01)
+        cache.get("a", "TaskController_search")
+        cache.put("c", "TaskController_search", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b", "TaskController_search"))
+        self.assertEqual(cache.get("a", "TaskController_search").json(), 1)
+
+    def test_revalidated_pages(self):
+        columns = {"column1": [{"id": "1"}, {"id": "2"}]}
+        fake = FakeYouGile(columns)
+        cache = ResponseCache(ttls={"TaskController_search": 0})
+        model = models.AppLogicModel(
+            page_size=1, transport=fake, cache=ResponseCache()
+        )
+        model.transport = models.CachingTransport(fake, cache)
+        for _ in range(3):
+            objects = model.get_objects_by_column("column1")
+            self.assertEqual([obj["id"] for obj in objects], ["1", "2"])
+        model.transport.close()
+        # Every page is stored under its own key after revalidation.
+        cache.ttls = {"TaskController_search": 60}
+        objects = model.get_objects_by_column("column1")
+        self.assertEqual([obj["id"] for obj in objects], ["1", "2"])
+
+    def test_stale_snapshot_synchronized(self):
+        fake = FakeYouGile({"column1": [{"id": "1", "title": "old"}]})
+        cache = ResponseCache(ttls={"TaskController_search": 0})
+        model = models.AppLogicModel(transport=fake, cache=ResponseCache())
+        model.transport = models.CachingTransport(fake, cache)
+        board = data_structures.Board("board", "board")
+        model.sync_board(board)
+        self.assertFalse(model.get_board_snapshot(board).stale)
+        fake.columns["column1"] = [{"id": "1", "title": "new"}]
+        model.sync_board(board)
+        self.assertTrue(model.snapshots[board.id].stale)
+        self.assertEqual(model.snapshots[board.id].tasks[0].title, "old")
+        model.transport.executor.shutdown(wait=True)
+        cache.ttls = {"TaskController_search": 60}
+        snapshot = model.get_board_snapshot(board)
+        self.assertFalse(snapshot.stale)
+        self.assertEqual(snapshot.tasks[0].title, "new")
+
+    def test_board_from_cache(self):
+        fake = FakeYouGile(self.COLUMNS)
+        model = models.AppLogicModel(transport=fake, cache=ResponseCache())
+        board = data_structures.Board("board", "board")
+        start = datetime.datetime(2024, 5, 3)
+        end = datetime.datetime(2024, 5, 6)
+        model.get_tasks_by_board(board, start, end)
+        n_queries = len(fake.queries)
+        tasks = model.get_tasks_by_board(board, start, end)
+        self.assertEqual([task.id for task in tasks], ["1"])
+        self.assertEqual(len(fake.queries), n_queries)
+
+
+class BoardSnapshotTests(unittest.TestCase):
+    COLUMNS = {
+        "column1": [
+            {
+                "id": "1",
+                "title": "task1",
+                "deadline": {
+                    "deadline": datetime.datetime(2024, 5, 5).timestamp()
+                    * 1000
+                },
+            },
+            {
+                "id": "2",
+                "title": "task2",
+                "deadline": {
+                    "deadline": datetime.datetime(2024, 5, 10).timestamp()
+                    * 1000
+                },
+            },
+        ]
+    }
+    BOARD = data_structures.Board("board", "board")
+
+    def test_rerank_without_fetch(self):
+        fake = FakeYouGile(self.COLUMNS)
+        model = models.AppLogicModel(transport=fake)
+        tasks = model.get_tasks_by_board(
+            self.BOARD,
+            datetime.datetime(2024, 5, 1),
+            datetime.datetime(2024, 5, 3),
+        )
+        self.assertEqual([task.id for task in tasks], ["1", "2"])
+        n_queries = len(fake.queries)
+        tasks = model.get_tasks_by_board(
+            self.BOARD,
+            datetime.datetime(2024, 5, 6),
+            datetime.datetime(2024, 5, 8),
+        )
+        self.assertEqual([task.id for task in tasks], ["2"])
+        self.assertEqual(len(fake.queries), n_queries)
+
+    def test_refresh(self):
+        fake = FakeYouGile(self.COLUMNS)
+        model = models.AppLogicModel(transport=fake, cache=ResponseCache())
+        start = datetime.datetime(2024, 5, 1)
+        end = datetime.datetime(2024, 5, 3)
+        model.get_tasks_by_board(self.BOARD, start, end)
+        fake.columns = {"column1": [{"id": "3", "title": "task3"}]}
+        model.refresh_board(self.BOARD)
+        tasks = model.get_tasks_by_board(self.BOARD, start, end)
+        self.assertEqual([task.id for task in tasks], ["3"])
+
+    def test_other_board(self):
+        fake = FakeYouGile(self.COLUMNS)
+        model = models.AppLogicModel(transport=fake)
+        snapshot = model.get_board_snapshot(self.BOARD)
+        other = model.get_board_snapshot(data_structures.Board("o", "o"))
+        self.assertIsNot(other, snapshot)
+        self.assertIs(model.get_board_snapshot(self.BOARD), snapshot)
+
+
+class SyncBoardTests(unittest.TestCase):
+    BOARD = data_structures.Board("board", "board")
+
+    def test_delta(self):
+        fake = FakeYouGile(
+            {
+                "column1": [
+                    {"id": "1", "title": "task1"},
+                    {"id": "2", "title": "task2"},
+                ],
+                "column2": [{"id": "3", "title": "task3"}],
+            }
+        )
+        model = models.AppLogicModel(transport=fake)
+        result = model.sync_board(self.BOARD)
+        self.assertEqual(result, data_structures.SyncResult(3, 0, 0))
+        old_tasks = {
+            task.id: task
+            for task in model.get_board_snapshot(self.BOARD).tasks
+        }
+
+        fake.columns = {
+            "column1": [
+                {"id": "1", "title": "task1"},
+                {"id": "4", "title": "task4"},
+            ],
+            "column2": [
+                {"id": "3", "title": "task3", "archived": True},
+                {"id": "5", "title": "task5"},
+            ],
+        }
+        result = model.sync_board(self.BOARD)
+        self.assertEqual(result, data_structures.SyncResult(2, 1, 1))
+        tasks = model.get_board_snapshot(self.BOARD).tasks
+        self.assertEqual([task.id for task in tasks], ["1", "4", "3", "5"])
+        self.assertIs(tasks[0], old_tasks["1"])
+        self.assertTrue(tasks[2].archived)
+
+        result = model.sync_board(self.BOARD)
+        self.assertEqual(result, data_structures.SyncResult(0, 0, 0))
+
+
+class KeyStoreTests(unittest.TestCase):
+    def test_wrong_password(self):
+        store = KeyStore(iterations=1)
+        store.put("user", "password", "company", "key")
+        self.assertEqual(store.get("user", "password", "company"), "key")
+        self.assertIsNone(store.get("user", "wrong", "company"))
+        self.assertIsNone(store.get("user", "password", "other"))
+        self.assertIsNone(store.get("other", "password", "company"))
+        store.remove("user", "company")
+        self.assertIsNone(store.get("user", "password", "company"))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "keys", "keys.json")
+            KeyStore(path, iterations=1).put("user", "pwd", "company", "key")
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            with open(path) as fin:
+                self.assertNotIn("pwd", fin.read())
+            store = KeyStore(path, iterations=1)
+            self.assertEqual(store.get("user", "pwd", "company"), "key")
+
+    def test_leftover_tmp_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "keys.json")
+            with open(f"{path}.tmp", "w") as fout:
+                fout.write("leftover")
+            os.chmod(f"{path}.tmp", 0o644)
+            KeyStore(path, iterations=1).put("user", "pwd", "company", "key")
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            store = KeyStore(path, iterations=1)
+            self.assertEqual(store.get("user", "pwd", "company"), "key")
+
+    def test_reuse_key(self):
+        fake = FakeYouGile({})
+        store = KeyStore(iterations=1)
+        model = models.AppLogicModel(transport=fake, key_store=store)
+        model.auth("user", "password", "company")
+        self.assertEqual(len(fake.queries), 3)
+
+        fake.queries = []
+        model = models.AppLogicModel(transport=fake, key_store=store)
+        model.auth("user", "password", "company")
+        self.assertEqual(len(fake.queries), 0)
+        model.get_projects()
+        self.assertEqual(len(fake.queries), 1)
+
+    def test_wrong_password_not_authorized(self):
+        fake = FakeYouGile({})
+        store = KeyStore(iterations=1)
+        models.AppLogicModel(transport=fake, key_store=store).auth(
+            "user", "password", "company"
+        )
+        fake.queries = []
+        model = models.AppLogicModel(transport=fake, key_store=store)
+        with self.assertRaises(ValueError):
+            model.auth("user", "wrong", "company")
+        # The stored key isn't given out, YouGile checks the password.
+        self.assertEqual(len(fake.queries), 1)
+        self.assertEqual(model.token, "")
+
+    def test_rejected_key(self):
+        fake = FakeYouGile({}, key="new")
+        store = KeyStore(iterations=1)
+        store.put("user", "password", "company", "old")
+        model = models.AppLogicModel(transport=fake, key_store=store)
+        model.auth("user", "password", "company")
+        self.assertEqual(model.token, "old")
+        model.get_projects()
+        self.assertEqual(model.token, "new")
+        self.assertEqual(store.get("user", "password", "company"), "new")
+
+    def test_changed_password(self):
+        fake = FakeYouGile({}, key="key")
+        store = KeyStore(iterations=1)
+        store.put("user", "password", "company", "old")
+        fake.password = "new password"
+        model = models.AppLogicModel(transport=fake, key_store=store)
+        model.auth("user", "password", "company")
+        with self.assertRaises(ValueError):
+            model.get_projects()
+
+
+class TaskDescriptionTests(unittest.TestCase):
+    def test_plain_text(self):
+        task = Task(
+            {
+                "id": "1",
+                "title": "task1",
+                "description": "**Bold** and [link](http://example.com)",
+            }
+        )
+        self.assertEqual(task.description, "Bold and link")
+        self.assertEqual(Task({"id": "2", "title": "task2"}).description, "")
+
+    def test_lazy(self):
+        with mock.patch(
+            "scheduler.data_structures.markdown_to_text",
+            side_effect=lambda text: text.upper(),
+        ) as converter:
+            task = Task({"id": "1", "title": "task1", "description": "text"})
+            self.assertEqual(converter.call_count, 0)
+            self.assertEqual(task.description, "TEXT")
+            self.assertEqual(task.description, "TEXT")
+            self.assertEqual(converter.call_count, 1)
+
+
+DESCRIPTIONS = {
+    "": "",
+    "Fix login button": "Fix login button",
+    "<p>Обновить документацию</p>": "Обновить документацию",
+    "<p>Steps:</p><ol><li>Open app</li><li>Press <b>Login</b></li></ol>": (
+        "Steps:\nOpen appPress Login"
+    ),
+    "<div>Line one<br>Line two&nbsp;&amp; more</div>": (
+        "Line oneLine two\xa0& more"
+    ),
+    "# Release\n\nShip **version 2** before _Friday_.": (
+        "Release\nShip version 2 before Friday."
+    ),
+    "- write tests\n- fix `models.py`\n- update [docs](http://example.com)": (
+        "\nwrite tests\nfix models.py\nupdate docs\n"
+    ),
+    "1. design\n2. review\n\n3. deploy": "\ndesign\n\nreview\n\n\ndeploy\n\n",
+    "> Customer says:\n> it crashes on start": (
+        "\nCustomer says:\nit crashes on start\n"
+    ),
+    "Intro\n\n    code block\n    second line\n\nOutro": (
+        "Intro\ncode block\nsecond line\n\nOutro"
+    ),
+    "See <https://yougile.com> and ![screenshot](shot.png)": (
+        "See https://yougile.com and "
+    ),
+    "Title\n=====\nText with trailing spaces  \nnext line": (
+        "Title\nText with trailing spaces\nnext line"
+    ),
+    "<!-- note -->\nVisible \\*text\\*": " note \nVisible *text*",
+    "---\n<p>Задача &laquo;важная&raquo;</p>\n* one\n    * nested": (
+        "\nЗадача «важная»\n\none\nnested\n\n\n"
+    ),
+}
+
+
+class MarkdownToTextTests(unittest.TestCase):
+    def test_descriptions(self):
+        for text, expected in DESCRIPTIONS.items():
+            with self.subTest(text=text):
+                self.assertEqual(markdown_to_text(text), expected)
+
+    def test_windows_newlines(self):
+        self.assertEqual(
+            markdown_to_text("# Release\r\n\r\nShip it"), "Release\nShip it"
+        )
+
+    def test_many_html_blocks(self):
+        expected = "\n".join(["a"] * 3000)
+        self.assertEqual(markdown_to_text("<p>a</p>" * 3000), expected)
+        self.assertEqual(markdown_to_text("<p>a</p>\n" * 3000), expected)
+
+    @unittest.skipIf(
+        markup.markdown is None or markup.BeautifulSoup is None,
+        "markdown and bs4 are not installed",
+    )
+    def test_same_as_reference(self):
+        for text in DESCRIPTIONS:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    markdown_to_text(text), reference_markdown_to_text(text)
+                )
+
+
+class CompactTaskTests(unittest.TestCase):
+    def test_slots(self):
+        task = Task(
+            {
+                "id": "1",
+                "title": "task1",
+                "deadline": {"deadline": 1700000000000},
+                "timeTracking": {"plan": 2, "work": 1},
+            }
+        )
+        for obj in (task, task.deadline, task.time_tracking):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+    def test_epoch_ms(self):
+        task = Task(
+            {
+                "id": "1",
+                "title": "task1",
+                "deadline": {
+                    "deadline": 1700000000123,
+                    "startDate": 1690000000000,
+                },
+            }
+        )
+        self.assertEqual(task.deadline.deadline_ms, 1700000000123)
+        self.assertEqual(
+            task.deadline.deadline,
+            datetime.datetime.fromtimestamp(1700000000.123),
+        )
+        self.assertEqual(
+            task.deadline.start_date,
+            datetime.datetime.fromtimestamp(1690000000),
+        )
+        self.assertEqual(
+            task.deadline,
+            data_structures.Deadline(
+                task.deadline.deadline, task.deadline.start_date
+            ),
+        )
+        task.deadline.start_date = None
+        self.assertIsNone(task.deadline.start_date_ms)
+
+
+def random_task_objects(n: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    base = 1700000000000
+    day = 24 * 60 * 60 * 1000
+    objects = []
+    for i in range(n):
+        obj = {
+            "id": str(i),
+            "title": f"task{i}",
+            "archived": rng.random() < 0.1,
+            "completed": rng.random() < 0.1,
+        }
+        if rng.random() < 0.8:
+            obj["deadline"] = {"deadline": base + rng.randrange(-10, 30) * day}
+            if rng.random() < 0.5:
+                obj["deadline"]["startDate"] = (
+                    base + rng.randrange(-20, 20) * day
+                )
+        if rng.random() < 0.6:
+            plan = rng.randrange(1, 10)
+            obj["timeTracking"] = {"plan": plan, "work": rng.randrange(plan)}
+        objects.append(obj)
+    return objects
+
+
+class ManualScheduler:
+    """Fake Tk after method running scheduled calls on demand."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ms, function):
+        self.calls.append(function)
+
+    def run(self, timeout=10, until=None):
+        deadline = time.monotonic() + timeout
+        while self.calls and time.monotonic() < deadline:
+            if until is not None and until():
+                return
+            self.calls.pop(0)()
+            time.sleep(0.001)
+
+
+class TaskTableTests(unittest.TestCase):
+    def test_same_order_as_sort_tasks(self):
+        tasks = [Task(obj) for obj in random_task_objects(2000)]
+        table = TaskTable(tasks)
+        start = datetime.datetime.fromtimestamp(1700000000)
+        for days in (1, 7, 30):
+            end = start + datetime.timedelta(days=days)
+            with self.subTest(days=days):
+                self.assertEqual(
+                    [task.id for task in table.sort_tasks(start, end)],
+                    [task.id for task in sort_tasks(tasks, start, end)],
+                )
+
+    def test_empty(self):
+        table = TaskTable([])
+        start = datetime.datetime.fromtimestamp(1700000000)
+        self.assertEqual(
+            table.sort_tasks(start, start + datetime.timedelta(days=1)), []
+        )
+
+    def test_rebuilt_after_sync(self):
+        model = models.AppLogicModel(max_workers=1)
+        fake = FakeYouGile({"c1": random_task_objects(10)})
+        model.transport = fake
+        board = data_structures.Board("b1", "board")
+        table = model.get_task_table(board)
+        self.assertIs(model.get_task_table(board), table)
+        model.sync_board(board)
+        self.assertIs(model.get_task_table(board), table)
+        fake.columns["c1"][0]["title"] = "changed"
+        model.sync_board(board)
+        self.assertIsNot(model.get_task_table(board), table)
+
+
+class MetricCacheTests(unittest.TestCase):
+    START = datetime.datetime.fromtimestamp(1700000000)
+    END = START + datetime.timedelta(days=7)
+
+    def test_lookup(self):
+        cache = MetricCache(max_size=2)
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            return value
+
+        self.assertEqual(cache.lookup("a", lambda: compute(1)), 1)
+        self.assertEqual(cache.lookup("a", lambda: compute(2)), 1)
+        self.assertEqual(cache.lookup("b", lambda: compute(3)), 3)
+        self.assertEqual(cache.lookup("a", lambda: compute(4)), 1)
+        # "b" was used before "a", so it is evicted.
+        self.assertEqual(cache.lookup("c", lambda: compute(5)), 5)
+        self.assertEqual(cache.lookup("a", lambda: compute(6)), 1)
+        self.assertEqual(cache.lookup("b", lambda: compute(7)), 7)
+        self.assertEqual(calls, [1, 3, 5, 7])
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (3, 4, 2))
+        self.assertAlmostEqual(cache.hit_rate(), 3 / 7)
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_board_rankings(self):
+        objects = random_task_objects(300)
+        fake = FakeYouGile({"c1": objects})
+        model = models.AppLogicModel(max_workers=1, transport=fake)
+        board = data_structures.Board("b1", "board")
+        cache = model.metric_cache
+
+        def ranked(start, end):
+            ranking = model.rank_tasks_by_board(board, start, end)
+            return [task.id for task in ranking.next_page(len(objects))]
+
+        expected = ranked(self.START, self.END)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        # Pages taken from the first ranking don't change cached keys.
+        self.assertEqual(ranked(self.START, self.END), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        later = self.END + datetime.timedelta(days=1)
+        ranked(self.START, later)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        # Refresh without changes keeps the snapshot version.
+        model.sync_board(board)
+        self.assertEqual(ranked(self.START, self.END), expected)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+        objects[0]["timeTracking"] = {"plan": 1, "work": 0}
+        objects[0]["deadline"] = {"deadline": to_epoch_ms(self.END)}
+        objects[0].pop("archived", None)
+        objects[0].pop("completed", None)
+        model.sync_board(board)
+        tasks = [Task(obj) for obj in objects]
+        self.assertEqual(
+            ranked(self.START, self.END),
+            [task.id for task in sort_tasks(tasks, self.START, self.END)],
+        )
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+
+class TopKTests(unittest.TestCase):
+    START = datetime.datetime.fromtimestamp(1700000000)
+    END = START + datetime.timedelta(days=7)
+
+    def setUp(self):
+        self.tasks = [Task(obj) for obj in random_task_objects(500)]
+        self.expected = [
+            task.id for task in sort_tasks(self.tasks, self.START, self.END)
+        ]
+
+    def test_top_k_tasks(self):
+        for k in (0, 1, 10, 100, len(self.tasks)):
+            with self.subTest(k=k):
+                tasks = top_k_tasks(self.tasks, self.START, self.END, k)
+                self.assertEqual(
+                    [task.id for task in tasks], self.expected[:k]
+                )
+
+    def test_iter_ranked_tasks(self):
+        tasks = iter_ranked_tasks(self.tasks, self.START, self.END)
+        self.assertEqual([task.id for task in tasks], self.expected)
+
+    def test_table_pages(self):
+        table = TaskTable(self.tasks)
+        self.assertEqual(
+            [task.id for task in table.top_k(self.START, self.END, 10)],
+            self.expected[:10],
+        )
+        ranking = table.ranking(self.START, self.END)
+        pages = []
+        while len(ranking):
+            pages.append(ranking.next_page(7))
+        self.assertEqual(
+            [task.id for page in pages for task in page], self.expected
+        )
+        self.assertEqual(ranking.next_page(7), [])
+
+    def test_zero_plan(self):
+        objects = [
+            {"id": "1", "title": "t1", "timeTracking": {"plan": 0, "work": 0}},
+            {"id": "2", "title": "t2", "timeTracking": {"plan": 0, "work": 2}},
+            {"id": "3", "title": "t3", "timeTracking": {"plan": 4, "work": 1}},
+            {"id": "4", "title": "t4"},
+        ]
+        tasks = [Task(obj) for obj in objects]
+        # Zero planned hours count like missing time tracking.
+        self.assertEqual(count_time_tracking_metric(tasks[0]), 0)
+        self.assertEqual(count_time_tracking_metric(tasks[1]), 0)
+        table = TaskTable(tasks)
+        self.assertEqual(table.m_time_tracking.tolist(), [0, 0, 0.75, 0])
+        expected = [
+            task.id for task in sort_tasks(tasks, self.START, self.END)
+        ]
+        self.assertEqual(expected, ["3", "1", "2", "4"])
+        ranking = table.ranking(self.START, self.END)
+        self.assertEqual(
+            [task.id for task in ranking.next_page(2)], ["3", "1"]
+        )
+        self.assertEqual(
+            [task.id for task in ranking.next_page(2)], ["2", "4"]
+        )
+
+    def test_select_top_with_nan(self):
+        keys = np.array([np.nan, -1.0, np.nan, -2.0])
+        rows = np.arange(4)
+        self.assertEqual(_select_top(keys, rows, 1).tolist(), [3])
+        # NaN keys go last instead of being dropped.
+        self.assertEqual(_select_top(keys, rows, 3).tolist(), [3, 1, 0])
+        self.assertEqual(_select_top(keys[[0, 2]], rows[:2], 1).tolist(), [0])
+
+    def test_controller_pages(self):
+        model = models.AppLogicModel(
+            max_workers=1,
+            transport=FakeYouGile({"c1": random_task_objects(9)}),
+        )
+        model.save_board(data_structures.Board("b1", "board"))
+        app = mock.Mock()
+        app.get_model.return_value = model
+        scheduler = ManualScheduler()
+        app.get_runner.return_value = BackgroundRunner(scheduler)
+        controller = controllers.TasksController(app, page_size=4)
+        view = mock.Mock()
+        controller.get_filtered_tasks(view, self.START.date(), self.END.date())
+        view.show_loading.assert_called_once()
+        scheduler.run()
+        count = view.show_tasks.call_args.args[0]
+        self.assertEqual(count, controller.get_tasks_count())
+        # Cards are requested in any order while scrolling.
+        last = controller.get_card_text(count - 1)
+        texts = [controller.get_card_text(i) for i in range(count)]
+        self.assertEqual(texts[-1], last)
+        all_texts = [
+            controller.card_text(task)
+            for task in model.get_tasks_by_board(
+                model.get_board(),
+                datetime.datetime.combine(self.START.date(), datetime.time()),
+                datetime.datetime.combine(
+                    self.END.date(), datetime.time(23, 59, 59)
+                ),
+            )
+        ]
+        self.assertEqual(texts, all_texts)
+        view.on_error.assert_not_called()
+
+
+class CardTextCacheTests(unittest.TestCase):
+    START = datetime.datetime.fromtimestamp(1700000000)
+
+    def setUp(self):
+        self.objects = random_task_objects(40)
+        self.model = models.AppLogicModel(
+            max_workers=1, transport=FakeYouGile({"c1": self.objects})
+        )
+        self.model.save_board(data_structures.Board("b1", "board"))
+        app = mock.Mock()
+        app.get_model.return_value = self.model
+        self.scheduler = ManualScheduler()
+        app.get_runner.return_value = BackgroundRunner(self.scheduler)
+        self.controller = controllers.TasksController(app)
+        self.view = mock.Mock()
+
+    def show(self, days):
+        begin = self.START.date()
+        self.controller.get_filtered_tasks(
+            self.view, begin, begin + datetime.timedelta(days=days)
+        )
+        self.scheduler.run()
+        count = self.controller.get_tasks_count()
+        return [self.controller.get_card_text(i) for i in range(count)]
+
+    def test_only_changed_tasks_rendered(self):
+        controller = self.controller
+        with mock.patch.object(
+            controller, "card_text", wraps=controller.card_text
+        ) as card_text:
+            texts = self.show(30)
+            self.assertEqual(card_text.call_count, len(texts))
+            seen = {task.id for task in controller.tasks}
+            texts = self.show(3)
+            seen |= {task.id for task in controller.tasks}
+            self.assertEqual(card_text.call_count, len(seen))
+            render = controllers.TasksController.card_text
+            self.assertEqual(
+                texts, [render(controller, task) for task in controller.tasks]
+            )
+
+            changed = controller.tasks[0].id
+            for obj in self.objects:
+                if obj["id"] == changed:
+                    obj["title"] = "Changed title"
+            self.model.refresh_board(self.model.get_board())
+            calls = card_text.call_count
+            texts = self.show(3)
+            self.assertEqual(card_text.call_count, calls + 1)
+            position = [task.id for task in controller.tasks].index(changed)
+            self.assertTrue(texts[position].startswith("Changed title"))
+
+    def test_refresh_shows_changes(self):
+        self.show(30)
+        self.objects[0]["title"] = "Changed title"
+        self.objects.append({"id": "new", "title": "New task"})
+        del self.objects[1]
+        self.controller.refresh_tasks(self.view)
+        self.scheduler.run()
+        self.view.show_status.assert_called_once_with(
+            "Refreshed: 1 new, 1 changed, 1 removed"
+        )
+        self.view.on_get_tasks.assert_called_once()
+
+    def test_versions_of_ranked_snapshot(self):
+        self.show(30)
+        changed = self.controller.tasks[0].id
+        get_board_snapshot = self.model.get_board_snapshot
+
+        def read_then_sync(board):
+            # The board is synchronized again right after the snapshot
+            # is read, like after background revalidation.
+            snapshot = get_board_snapshot(board)
+            for obj in self.objects:
+                if obj["id"] == changed:
+                    obj["title"] = "Changed title"
+            self.model.sync_board(board)
+            return snapshot
+
+        with mock.patch.object(
+            self.model, "get_board_snapshot", side_effect=read_then_sync
+        ):
+            self.show(30)
+        ranked = {task.id: task for task in self.controller.tasks}
+        # Old tasks keep their old versions, so their texts aren't
+        # cached under the hashes of the changed tasks.
+        self.assertEqual(ranked[changed].title, "task" + changed)
+        self.assertNotEqual(
+            self.controller.versions[changed],
+            self.model.snapshots["b1"].hashes[changed],
+        )
+
+
+class IntervalIndexTests(unittest.TestCase):
+    START = datetime.datetime.fromtimestamp(1700000000)
+    WINDOWS = [
+        (shift, datetime.timedelta(days=days))
+        for shift in (-15, 0, 10)
+        for days in (1, 7, 30)
+    ]
+
+    def assert_same_as_scan(self, index, tasks, ordered=True):
+        for shift, length in self.WINDOWS:
+            start = self.START + datetime.timedelta(days=shift)
+            expected = [
+                task.id
+                for task in get_relevant_tasks(tasks, start, start + length)
+            ]
+            found = [task.id for task in index.relevant(start, start + length)]
+            if not ordered:
+                expected, found = sorted(expected), sorted(found)
+            self.assertEqual(found, expected)
+
+    def test_same_as_scan(self):
+        tasks = [Task(obj) for obj in random_task_objects(3000)]
+        index = IntervalIndex(tasks)
+        self.assertEqual(
+            len(index),
+            len([t for t in tasks if not t.archived and not t.completed]),
+        )
+        self.assert_same_as_scan(index, tasks)
+
+    def test_incremental_updates(self):
+        objects = random_task_objects(600)
+        tasks = {obj["id"]: Task(obj) for obj in objects[:300]}
+        index = IntervalIndex(tasks.values())
+        rng = random.Random(1)
+        changed = random_task_objects(600, seed=2)
+        for i in range(300, 600):
+            # Add new task, change existing one and remove another one.
+            tasks[str(i)] = Task(objects[i])
+            index.add(tasks[str(i)])
+            task_id = rng.choice(list(tasks))
+            tasks[task_id] = Task(changed[int(task_id)])
+            index.add(tasks[task_id])
+            task_id = rng.choice(list(tasks))
+            del tasks[task_id]
+            index.remove(task_id)
+            if i % 50 == 0:
+                self.assert_same_as_scan(index, tasks.values(), False)
+        self.assert_same_as_scan(index, tasks.values(), False)
+
+    def test_updated_by_sync(self):
+        objects = random_task_objects(100)
+        fake = FakeYouGile({"c1": objects})
+        model = models.AppLogicModel(max_workers=1, transport=fake)
+        board = data_structures.Board("b1", "board")
+        index = model.get_task_index(board)
+        fake.columns["c1"] = objects[1:] + [
+            {"id": "new", "title": "new", "deadline": {"deadline": 1.8e12}}
+        ]
+        model.sync_board(board)
+        self.assertIs(model.get_task_index(board), index)
+        self.assertNotIn(objects[0]["id"], index)
+        self.assertIn("new", index)
+        self.assert_same_as_scan(
+            index, model.get_board_snapshot(board).tasks, False
+        )
+
+
+class SortTasksByWindowsTests(unittest.TestCase):
+    START = datetime.datetime.fromtimestamp(1700000000)
+
+    def test_same_as_sort_tasks(self):
+        tasks = [Task(obj) for obj in random_task_objects(1000)]
+        windows = []
+        for day in range(-5, 25, 3):
+            start = self.START + datetime.timedelta(days=day)
+            windows.append((start, start + datetime.timedelta(days=1)))
+        expected = [
+            [task.id for task in sort_tasks(tasks, start, end)]
+            for start, end in windows
+        ]
+        for rankings in (
+            sort_tasks_by_windows(iter(tasks), windows),
+            TaskTable(tasks).sort_tasks_by_windows(windows),
+        ):
+            self.assertEqual(
+                [[task.id for task in tasks] for tasks in rankings], expected
+            )
+
+    def test_daily_plan(self):
+        model = models.AppLogicModel(
+            max_workers=1,
+            transport=FakeYouGile({"c1": random_task_objects(50)}),
+        )
+        model.save_board(data_structures.Board("b1", "board"))
+        app = mock.Mock()
+        app.get_model.return_value = model
+        scheduler = ManualScheduler()
+        app.get_runner.return_value = BackgroundRunner(scheduler)
+        controller = controllers.TasksController(app, plan_size=3)
+        view = mock.Mock()
+        begin = self.START.date()
+        controller.get_daily_plan(
+            view, begin, begin + datetime.timedelta(days=6)
+        )
+        scheduler.run()
+        plan = view.show_plan.call_args.args[0]
+        self.assertEqual(len(plan), 7)
+        for i, (day, titles) in enumerate(plan):
+            start = datetime.datetime.combine(
+                begin + datetime.timedelta(days=i), datetime.time()
+            )
+            end = start.replace(hour=23, minute=59, second=59)
+            self.assertEqual(day, start.strftime("%d/%m/%Y"))
+            self.assertEqual(
+                titles,
+                [
+                    task.title
+                    for task in model.get_tasks_by_board(
+                        model.get_board(), start, end
+                    )[:3]
+                ],
+            )
+        controller.get_daily_plan(
+            view, begin, begin - datetime.timedelta(days=1)
+        )
+        view.on_error.assert_called_once()
+        view.show_plan.assert_called_once()
+
+
+class BuildScheduleTests(unittest.TestCase):
+    DAY = datetime.date(2024, 5, 6)
+
+    def make_task(
+        self, id, plan, work=0, deadline=None, start=None, subtasks=()
+    ):
+        obj = {
+            "id": id,
+            "title": id,
+            "timeTracking": {"plan": plan, "work": work},
+            "subtasks": list(subtasks),
+        }
+        if deadline is not None:
+            obj["deadline"] = {
+                "deadline": self.ms(self.DAY, deadline, 18),
+            }
+            if start is not None:
+                obj["deadline"]["startDate"] = self.ms(self.DAY, start, 9)
+        return Task(obj)
+
+    @staticmethod
+    def ms(day, offset, hour):
+        moment = datetime.datetime.combine(
+            day + datetime.timedelta(days=offset), datetime.time(hour)
+        )
+        return moment.timestamp() * 1000
+
+    def plan(self, schedule):
+        return [
+            [(slot.task.id, slot.hours) for slot in day.slots]
+            for day in schedule.days
+        ]
+
+    def test_earliest_deadline_first(self):
+        tasks = [
+            self.make_task("late", 6, deadline=4),
+            self.make_task("early", 10, work=2, deadline=1),
+            self.make_task("free", 4),
+        ]
+        schedule = build_schedule(
+            tasks, self.DAY, self.DAY + datetime.timedelta(days=2), 6
+        )
+        self.assertEqual(
+            self.plan(schedule),
+            [
+                [("early", 6)],
+                [("early", 2), ("late", 4)],
+                [("late", 2), ("free", 4)],
+            ],
+        )
+        self.assertEqual([day.free_hours for day in schedule.days], [0, 0, 0])
+        self.assertEqual(schedule.unscheduled, {})
+
+    def test_start_date_and_missed_deadline(self):
+        tasks = [
+            self.make_task("later", 3, deadline=5, start=2),
+            self.make_task("tight", 10, deadline=0),
+            self.make_task("done", 5, work=5),
+        ]
+        schedule = build_schedule(
+            tasks, self.DAY, self.DAY + datetime.timedelta(days=3), 4
+        )
+        self.assertEqual(
+            self.plan(schedule), [[("tight", 4)], [], [("later", 3)], []]
+        )
+        self.assertEqual(schedule.unscheduled, {"tight": 6})
+        self.assertEqual(schedule.days[3].free_hours, 4)
+
+    def test_thousands_of_tasks(self):
+        rng = random.Random(0)
+        tasks = [
+            self.make_task(
+                str(i),
+                rng.randrange(1, 20),
+                deadline=rng.randrange(0, 90),
+                start=rng.randrange(-10, 0),
+            )
+            for i in range(5000)
+        ]
+        end = self.DAY + datetime.timedelta(days=89)
+        schedule = build_schedule(tasks, self.DAY, end, 8)
+        self.assertEqual(len(schedule.days), 90)
+        scheduled = {}
+        for day in schedule.days:
+            self.assertAlmostEqual(
+                sum(slot.hours for slot in day.slots) + day.free_hours, 8
+            )
+            for slot in day.slots:
+                scheduled[slot.task.id] = (
+                    scheduled.get(slot.task.id, 0) + slot.hours
+                )
+        for task in tasks:
+            left = task.time_tracking.plan - task.time_tracking.work
+            self.assertAlmostEqual(
+                scheduled.get(task.id, 0)
+                + schedule.unscheduled.get(task.id, 0),
+                left,
+            )
+
+    def test_subtasks_first(self):
+        tasks = [
+            self.make_task("parent", 4, deadline=3, subtasks=["child"]),
+            self.make_task("child", 6, deadline=5),
+            self.make_task("other", 4, deadline=2),
+        ]
+        schedule = build_schedule(
+            tasks, self.DAY, self.DAY + datetime.timedelta(days=2), 5
+        )
+        self.assertEqual(
+            self.plan(schedule),
+            [
+                [("other", 4), ("child", 1)],
+                [("child", 5)],
+                [("parent", 4)],
+            ],
+        )
+        self.assertEqual(schedule.unscheduled, {})
+
+    def test_missed_subtask_blocks_parent(self):
+        tasks = [
+            self.make_task("parent", 2, subtasks=["child"]),
+            self.make_task("child", 10, deadline=0),
+        ]
+        schedule = build_schedule(
+            tasks, self.DAY, self.DAY + datetime.timedelta(days=1), 4
+        )
+        self.assertEqual(self.plan(schedule), [[("child", 4)], []])
+        self.assertEqual(schedule.unscheduled, {"child": 6, "parent": 2})
+
+
+class DependencyGraphTests(unittest.TestCase):
+    START = datetime.datetime(2024, 5, 6)
+    END = datetime.datetime(2024, 5, 13)
+
+    def make_task(self, id, plan=4, work=0, subtasks=()):
+        return Task(
+            {
+                "id": id,
+                "title": id,
+                "timeTracking": {"plan": plan, "work": work},
+                "subtasks": list(subtasks),
+            }
+        )
+
+    def test_order_and_propagation(self):
+        tasks = [
+            self.make_task("a", subtasks=["b", "missing"]),
+            self.make_task("b", subtasks=["c"]),
+            self.make_task("c"),
+        ]
+        graph = DependencyGraph(tasks)
+        self.assertEqual(graph.order, ["c", "b", "a"])
+        self.assertEqual(graph.cycles, [])
+        self.assertEqual(
+            graph.propagate({"a": 5, "b": 1, "c": 3}),
+            {"a": 5, "b": 5, "c": 5},
+        )
+        self.assertEqual(
+            graph.propagate({"a": 5, "b": 1, "c": 3}, min),
+            {"a": 5, "b": 1, "c": 1},
+        )
+
+    def test_cycles_are_reported(self):
+        tasks = [
+            self.make_task("a", subtasks=["b"]),
+            self.make_task("b", subtasks=["a"]),
+            self.make_task("c", subtasks=["c", "a"]),
+        ]
+        graph = DependencyGraph(tasks)
+        self.assertEqual(
+            sorted(sorted(cycle) for cycle in graph.cycles),
+            [["a", "b"], ["c"]],
+        )
+        self.assertEqual(sorted(graph.order), ["a", "b", "c"])
+        self.assertLess(graph.order.index("a"), graph.order.index("c"))
+
+    def test_long_chain(self):
+        n = 20000
+        tasks = [
+            self.make_task(str(i), subtasks=[str(i + 1)]) for i in range(n)
+        ]
+        graph = DependencyGraph(tasks)
+        self.assertEqual(graph.order, [str(i) for i in reversed(range(n))])
+        tasks.append(self.make_task(str(n), subtasks=["0"]))
+        graph = DependencyGraph(tasks)
+        self.assertEqual(len(graph.cycles), 1)
+        self.assertEqual(len(graph.cycles[0]), n + 1)
+
+    def test_subtasks_ranked_before_parents(self):
+        tasks = [
+            self.make_task("parent", subtasks=["child"]),
+            self.make_task("other", work=2),
+            self.make_task("child", work=3),
+            self.make_task("free", work=1),
+        ]
+        self.assertEqual(
+            [task.id for task in sort_tasks(tasks, self.START, self.END)],
+            ["parent", "free", "other", "child"],
+        )
+        expected = ["child", "parent", "free", "other"]
+        self.assertEqual(
+            [
+                task.id
+                for task in sort_tasks_by_dependencies(
+                    tasks, self.START, self.END
+                )
+            ],
+            expected,
+        )
+        table = TaskTable(tasks)
+        self.assertEqual(
+            [task.id for task in table.sort_tasks(self.START, self.END)],
+            expected,
+        )
+        ranking = table.ranking(self.START, self.END)
+        pages = ranking.next_page(3) + ranking.next_page(3)
+        self.assertEqual([task.id for task in pages], expected)
+
+
+class BuildTeamPlanTests(unittest.TestCase):
+    START = datetime.datetime(2024, 5, 6)
+    END = datetime.datetime(2024, 5, 11)
+
+    def make_task(self, id, plan, work=0, assigned=()):
+        return Task(
+            {
+                "id": id,
+                "title": id,
+                "timeTracking": {"plan": plan, "work": work},
+                "assigned": list(assigned),
+            }
+        )
+
+    def plan(self, team_plan):
+        return {
+            user_id: [(slot.task.id, slot.hours) for slot in worker.slots]
+            for user_id, worker in team_plan.workers.items()
+        }
+
+    def test_assignees_and_capacity(self):
+        tasks = [
+            self.make_task("a", 8, assigned=["ann"]),
+            self.make_task("b", 6, work=1, assigned=["ann", "bob"]),
+            self.make_task("c", 10, work=6),
+            self.make_task("d", 5, work=1, assigned=["eve"]),
+            self.make_task("e", 20, work=10, assigned=["bob"]),
+        ]
+        team_plan = build_team_plan(
+            tasks, self.START, self.END, {"ann": 10, "bob": 12}
+        )
+        self.assertEqual(
+            self.plan(team_plan),
+            {"ann": [("a", 8)], "bob": [("b", 5), ("c", 4)]},
+        )
+        self.assertEqual(team_plan.workers["ann"].free_hours, 2)
+        self.assertEqual(team_plan.workers["bob"].free_hours, 3)
+        self.assertEqual(team_plan.unscheduled, {"d": 4, "e": 10})
+
+    def test_many_people(self):
+        rng = random.Random(0)
+        people = [str(i) for i in range(300)]
+        tasks = [
+            self.make_task(
+                str(i),
+                rng.randrange(1, 10),
+                assigned=rng.sample(people, rng.randrange(0, 3)),
+            )
+            for i in range(30000)
+        ]
+        capacities = {user_id: 40 for user_id in people}
+        team_plan = build_team_plan(tasks, self.START, self.END, capacities)
+        planned = set(team_plan.unscheduled)
+        for user_id, worker in team_plan.workers.items():
+            self.assertGreaterEqual(worker.free_hours, 0)
+            self.assertEqual(
+                sum(slot.hours for slot in worker.slots) + worker.free_hours,
+                40,
+            )
+            for slot in worker.slots:
+                self.assertIn(user_id, slot.task.assigned or (user_id,))
+                planned.add(slot.task.id)
+        self.assertEqual(planned, {task.id for task in tasks})
+
+
+class FormulaTests(unittest.TestCase):
+    START = datetime.datetime.fromtimestamp(1700000000)
+    END = START + datetime.timedelta(days=7)
+
+    def setUp(self):
+        objects = random_task_objects(2000)
+        rng = random.Random(1)
+        for obj in objects:
+            if rng.random() < 0.3:
+                obj["stickers"] = {"s1": rng.choice(["a", "b", ""])}
+        self.tasks = [Task(obj) for obj in objects]
+        self.table = TaskTable(self.tasks)
+
+    def values(self, formula):
+        start_ms, end_ms = to_epoch_ms(self.START), to_epoch_ms(self.END)
+        (rows,) = np.nonzero(self.table.relevant_mask(start_ms, end_ms))
+        scalar = [
+            formula_metric_ms(self.tasks[row], formula, start_ms, end_ms)
+            for row in rows
+        ]
+        vector = self.table.priority(start_ms, end_ms, rows, formula)
+        return scalar, vector
+
+    def test_default_formula_is_builtin_metric(self):
+        formula = compile_formula(DEFAULT_FORMULA)
+        expected = [
+            task.id for task in sort_tasks(self.tasks, self.START, self.END)
+        ]
+        self.assertEqual(
+            [
+                task.id
+                for task in sort_tasks(
+                    self.tasks, self.START, self.END, formula=formula
+                )
+            ],
+            expected,
+        )
+        self.assertEqual(
+            [
+                task.id
+                for task in self.table.sort_tasks(
+                    self.START, self.END, formula
+                )
+            ],
+            expected,
+        )
+
+    def test_scalar_and_vector_agree(self):
+        for text in (
+            "deadline_hours / remaining_hours",
+            "1 / deadline_hours ** 2 * start_overlap + has_time_tracking",
+            "max(remaining, 0.5, -m_deadline) - log(remaining_hours)",
+            "where(sticker('s1', 'a'), 10, sticker('s1')) + has_deadline",
+            "sqrt(remaining - 0.5) * exp(-deadline_hours / 24)",
+            "(remaining > 0.5) * abs(-remaining_hours) ** 0.5",
+            "2",
+            "m_deadline * 2 ** -1",
+            "remaining + 2 ** 70",
+            "remaining * 10**30",
+            "min(1, sqrt(remaining - 2))",
+            "max(sqrt(remaining - 2), 1, remaining)",
+        ):
+            with self.subTest(text=text):
+                scalar, vector = self.values(compile_formula(text))
+                np.testing.assert_allclose(scalar, vector)
+                self.assertFalse(np.isnan(vector).any())
+        scalar, _ = self.values(compile_formula("remaining + 2 ** 70"))
+        self.assertEqual(scalar[0], 2.0**70)
+        scalar, _ = self.values(compile_formula("min(1, sqrt(-1))"))
+        self.assertEqual(scalar[0], -np.inf)
+
+    def test_special_values_agree(self):
+        special = [0.0, -0.0, np.inf, -np.inf, np.nan, 1.0, -1.0, 0.5, -2.5]
+        special += [3.0, 1e308, -1e308, 1e-320]
+        pairs = [(a, b) for a in special for b in special]
+        columns = [
+            np.array([a for a, _ in pairs]),
+            np.array([b for _, b in pairs]),
+        ]
+        for text in (
+            "remaining / remaining_hours",
+            "remaining ** remaining_hours",
+            "remaining ** 0.5 + remaining_hours ** -1",
+            "(-remaining) ** -3 - remaining_hours ** 2.5",
+            "min(remaining, remaining_hours) / max(remaining_hours, 0)",
+            "max(remaining, -remaining_hours, 0) ** -1",
+            "1 / min(0, remaining * remaining_hours)",
+            "(remaining < remaining_hours) ** -remaining",
+            "sqrt(remaining) / log(remaining_hours)",
+            "exp(remaining) * remaining_hours",
+            "where(remaining, 1 / remaining, remaining_hours ** -1)",
+            "(0 * -2) ** 0.5 + remaining * remaining_hours",
+        ):
+            with self.subTest(text=text):
+                formula = compile_formula(text)
+                vector = formula.evaluate_columns(columns, len(pairs))
+                for (a, b), value in zip(pairs, vector):
+                    scalar = formula.evaluate([a, b])
+                    # Signs of zeros and infinities have to match too.
+                    self.assertEqual(
+                        (scalar, math.copysign(1, scalar)),
+                        (value, math.copysign(1, value)),
+                        (a, b),
+                    )
+
+    def test_ranking_by_formula(self):
+        formula = compile_formula("remaining_hours + 100 * sticker('s1')")
+        expected = [
+            task.id
+            for task in sort_tasks(
+                self.tasks, self.START, self.END, formula=formula
+            )
+        ]
+        ranking = self.table.ranking(self.START, self.END, formula)
+        pages = []
+        while len(ranking):
+            pages += ranking.next_page(50)
+        self.assertEqual([task.id for task in pages], expected)
+        first = self.tasks[int(expected[0])]
+        self.assertIn(first.stickers.get("s1"), ("a", "b"))
+
+    def test_compiled_once(self):
+        self.assertIs(
+            compile_formula("remaining * 2"), compile_formula("remaining * 2")
+        )
+
+    def test_bad_formulas(self):
+        for text in (
+            "remaining +",
+            "unknown * 2",
+            "remaining.real",
+            "__import__('os')",
+            "'text'",
+            "True",
+            "0 < remaining < 1",
+            "min(remaining)",
+            "where(remaining, 1)",
+            "sticker(remaining)",
+            "log(x=remaining)",
+            "[remaining]",
+            "remaining + 1" + "0" * 400,
+            "remaining if remaining else 1",
+            "remaining // 2",
+            "1" * 2000,
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(FormulaError):
+                    compile_formula(text)
+
+
+class FirstSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.objects = random_task_objects(300)
+        for i, obj in enumerate(self.objects):
+            obj["description"] = f"**task** {i}"
+
+    def test_first_sync(self):
+        model = models.AppLogicModel(max_workers=1)
+        model.transport = FakeYouGile({"c1": self.objects})
+        board = data_structures.Board("b1", "board")
+        result = model.sync_board(board)
+        self.assertEqual(result.added, len(self.objects))
+        snapshot = model.get_board_snapshot(board)
+        self.assertEqual(
+            [task.id for task in snapshot.tasks],
+            [obj["id"] for obj in self.objects],
+        )
+        self.assertEqual(snapshot.hashes["0"], hash_object(self.objects[0]))
+        # Descriptions are converted only when they are shown.
+        self.assertTrue(
+            all(task._description is None for task in snapshot.tasks)
+        )
+        self.objects[0]["title"] = "changed"
+        result = model.sync_board(board)
+        self.assertEqual((result.added, result.updated), (0, 1))
+
+
+class BackgroundRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = ManualScheduler()
+        self.runner = BackgroundRunner(self.scheduler)
+        self.addCleanup(self.runner.shutdown)
+        self.delivered = []
+
+    def deliver(self, value):
+        self.delivered.append((value, threading.current_thread()))
+
+    def test_newer_request_supersedes(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return "slow"
+
+        self.runner.submit("tasks", slow, self.deliver)
+        started.wait(5)
+        queued = self.runner.submit("tasks", lambda: "queued", self.deliver)
+        self.runner.submit("tasks", lambda: "last", self.deliver)
+        self.runner.submit("boards", lambda: "boards", self.deliver)
+        release.set()
+        self.scheduler.run()
+        self.assertTrue(queued.future.cancelled())
+        self.assertEqual(
+            sorted(value for value, _ in self.delivered), ["boards", "last"]
+        )
+        self.assertTrue(
+            all(
+                thread is threading.main_thread()
+                for _, thread in self.delivered
+            )
+        )
+        self.assertFalse(self.runner.is_pending("tasks"))
+        self.assertFalse(self.runner.polling)
+
+    def test_errors_and_cancel(self):
+        errors = []
+        self.runner.submit("a", lambda: 1 / 0, self.deliver, errors.append)
+        self.runner.submit("b", lambda: "b", self.deliver)
+        self.runner.cancel("b")
+        self.scheduler.run()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+        self.assertEqual(self.delivered, [])
+
+    def test_stream(self):
+        progress = []
+        gate = threading.Event()
+
+        def stream():
+            yield 1
+            gate.wait(5)
+            yield 2
+            yield 3
+            return 4
+
+        request = self.runner.submit_stream(
+            "tasks", stream, progress.append, self.deliver
+        )
+        self.scheduler.run(until=lambda: progress)
+        self.assertEqual(progress, [1])
+        gate.set()
+        request.future.result(5)
+        self.scheduler.run()
+        # Results queued together are delivered as the newest one.
+        self.assertEqual(progress, [1])
+        self.assertEqual([value for value, _ in self.delivered], [4])
+
+    def test_stream_cancel(self):
+        closed = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield None
+                    time.sleep(0.001)
+            finally:
+                closed.set()
+
+        request = self.runner.submit_stream(
+            "tasks", endless, self.deliver, self.deliver
+        )
+        while self.runner.results.empty():
+            time.sleep(0.001)
+        self.runner.cancel("tasks")
+        self.assertTrue(closed.wait(5))
+        request.future.result(5)
+        self.scheduler.run()
+        self.assertEqual(self.delivered, [])
+
+    def test_board_names(self):
+        model = mock.Mock()
+        model.get_projects.return_value = [
+            data_structures.Project("p1", "project")
+        ]
+        model.get_boards_by_project.return_value = [
+            data_structures.Board("b1", "board")
+        ]
+        app = mock.Mock()
+        app.get_model.return_value = model
+        app.get_runner.return_value = self.runner
+        controller = controllers.BoardController(app)
+        view = mock.Mock()
+        controller.get_project_names(view)
+        view.show_projects_loading.assert_called_once()
+        self.scheduler.run()
+        view.show_project_names.assert_called_once_with(["project"])
+        controller.get_board_names_by_project_name(view, "project")
+        view.show_boards_loading.assert_called_once()
+        self.scheduler.run()
+        view.show_board_names.assert_called_once_with(["board"])
+        self.assertEqual(
+            controller.boards, [data_structures.Board("b1", "board")]
+        )
+        controller.get_board_names_by_project_name(view, "missing")
+        view.display_internal_error.assert_called_once()
+        self.assertEqual(controller.boards, [])
+
+
+class GatedYouGile(FakeYouGile):
+    """YouGile answering for the gated column only after release."""
+
+    def __init__(self, columns, gated):
+        super().__init__(columns)
+        self.gated = gated
+        self.release = threading.Event()
+
+    def query(self, model):
+        if (
+            isinstance(model, yougile.models.TaskController_search)
+            and model.columnId == self.gated
+        ):
+            self.release.wait(5)
+        return super().query(model)
+
+
+class ProgressiveLoadingTests(unittest.TestCase):
+    START = datetime.datetime.fromtimestamp(1700000000)
+    END = START + datetime.timedelta(days=7)
+    BOARD = data_structures.Board("b1", "board")
+
+    def setUp(self):
+        self.objects = random_task_objects(120)
+        bounds = [0, 30, 60, 90, 120]
+        self.columns = {
+            f"c{i}": self.objects[start:end]
+            for i, (start, end) in enumerate(zip(bounds, bounds[1:]))
+        }
+
+    def test_running_ranking(self):
+        tasks = [Task(obj) for obj in random_task_objects(200)]
+        bounds = [0, 1, 50, 120, 200]
+        for formula in (None, compile_formula("remaining_hours - 1")):
+            ranking = RunningRanking(self.START, self.END, formula)
+            for start, end in zip(bounds, bounds[1:]):
+                ranking.add(tasks[start:end])
+                expected = sort_tasks(
+                    tasks[:end], self.START, self.END, formula=formula
+                )
+                self.assertEqual(ranking.tasks, expected)
+            ranking.add(tasks[:10])
+            self.assertEqual(ranking.tasks, expected)
+
+    def test_final_ranking_same_as_batch(self):
+        batch = models.AppLogicModel(
+            max_workers=1, transport=FakeYouGile(self.columns)
+        )
+        expected = batch.get_tasks_by_board(self.BOARD, self.START, self.END)
+        for max_workers in (1, 4):
+            model = models.AppLogicModel(
+                max_workers=max_workers, transport=FakeYouGile(self.columns)
+            )
+            previews = list(
+                model.iter_partial_rankings(self.BOARD, self.START, self.END)
+            )
+            self.assertEqual(len(previews), 4)
+            tasks = model.get_tasks_by_board(self.BOARD, self.START, self.END)
+            self.assertEqual(
+                [task.id for task in tasks], [task.id for task in expected]
+            )
+            self.assertEqual(
+                {task.id for task in previews[-1]},
+                {task.id for task in tasks},
+            )
+            # The snapshot keeps the tasks created for the previews.
+            snapshot_tasks = {
+                id(task) for task in model.get_board_snapshot(self.BOARD).tasks
+            }
+            self.assertTrue(
+                all(id(task) in snapshot_tasks for task in previews[-1])
+            )
+            self.assertEqual(
+                model.get_board_snapshot(self.BOARD).hashes,
+                batch.get_board_snapshot(self.BOARD).hashes,
+            )
+            self.assertEqual(
+                list(
+                    model.iter_partial_rankings(
+                        self.BOARD, self.START, self.END
+                    )
+                ),
+                [],
+            )
+
+    def test_controller_shows_loaded_columns(self):
+        transport = GatedYouGile(self.columns, "c3")
+        model = models.AppLogicModel(max_workers=1, transport=transport)
+        model.save_board(self.BOARD)
+        app = mock.Mock()
+        app.get_model.return_value = model
+        scheduler = ManualScheduler()
+        runner = BackgroundRunner(scheduler)
+        self.addCleanup(runner.shutdown)
+        app.get_runner.return_value = runner
+        controller = controllers.TasksController(app)
+        view = mock.Mock()
+        controller.get_filtered_tasks(view, self.START.date(), self.END.date())
+        # The controller ranks whole days.
+        begin = datetime.datetime.combine(self.START.date(), datetime.time())
+        end = datetime.datetime.combine(
+            self.END.date(), datetime.time(23, 59, 59)
+        )
+        scheduler.run(until=lambda: view.show_tasks.called)
+        # Cards of loaded columns are shown while the last one is loading.
+        self.assertNotIn(self.BOARD.id, model.snapshots)
+        partial = [
+            [
+                task.id
+                for task in sort_tasks(
+                    [Task(obj) for obj in self.objects[:loaded]], begin, end
+                )
+            ]
+            for loaded in (30, 60, 90)
+        ]
+        self.assertIn([task.id for task in controller.tasks], partial)
+        count = view.show_tasks.call_args.args[0]
+        self.assertEqual(count, len(controller.tasks))
+        texts = [controller.get_card_text(i) for i in range(count)]
+        self.assertEqual(texts[0], controller.card_text(controller.tasks[0]))
+
+        transport.release.set()
+        scheduler.run()
+        count = view.show_tasks.call_args.args[0]
+        texts = [controller.get_card_text(i) for i in range(count)]
+        expected = model.get_tasks_by_board(self.BOARD, begin, end)
+        self.assertEqual(
+            texts, [controller.card_text(task) for task in expected]
+        )
+
+
+class ListWindowTests(unittest.TestCase):
+    def test_constant_pool(self):
+        window = views.ListWindow(row_height=100, buffer=2)
+        window.resize(450)
+        window.set_count(50000)
+        self.assertEqual(window.pool_size(), 8)
+        offsets = [0, 130, 99999, 4999550, 2500000]
+        for offset in offsets:
+            window.scroll_to(offset)
+            rows = window.rows()
+            self.assertLessEqual(len(rows), 8)
+            slots = {index % window.pool_size() for index, _ in rows}
+            self.assertEqual(len(slots), len(rows))
+            first, y = rows[0]
+            self.assertLessEqual(y, 0)
+            self.assertGreater(y + 100, 0)
+            # Rows cover the whole viewport.
+            self.assertGreaterEqual(rows[-1][1] + 100, 450)
+        self.assertEqual(window.rows()[0], (25000, 0))
+
+    def test_scrolling_bounds(self):
+        window = views.ListWindow(row_height=100)
+        window.resize(450)
+        window.set_count(10)
+        window.scroll_by(-50)
+        self.assertEqual(window.offset, 0)
+        window.moveto(1.0)
+        self.assertEqual(window.offset, 550)
+        self.assertEqual(window.fraction(), (0.55, 1.0))
+        self.assertEqual(window.rows()[-1][0], 9)
+        window.set_count(3)
+        self.assertEqual(window.offset, 0)
+        self.assertEqual(window.fraction(), (0.0, 1.0))
+        self.assertEqual([index for index, _ in window.rows()], [0, 1, 2])
+        window.set_count(0)
+        self.assertEqual(window.rows(), [])
+
+    def test_row_at(self):
+        window = views.ListWindow(row_height=100)
+        window.resize(450)
+        window.set_count(10)
+        self.assertEqual(window.row_at(0), 0)
+        self.assertEqual(window.row_at(99.5), 0)
+        self.assertEqual(window.row_at(100), 1)
+        self.assertIsNone(window.row_at(-1))
+        window.scroll_to(130)
+        self.assertEqual(window.row_at(0), 1)
+        self.assertEqual(window.row_at(449), 5)
+        window.set_count(2)
+        self.assertEqual(window.row_at(150), 1)
+        self.assertIsNone(window.row_at(250))
+
+
+class FitTextTests(unittest.TestCase):
+    def test_fits_card(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            words = [
+                "x" * rng.randrange(0, 30) for _ in range(rng.randrange(50))
+            ]
+            text = "\n".join(
+                " ".join(words[i:][:7]) for i in range(0, len(words), 7)
+            )
+            width, max_lines = rng.randrange(5, 40), rng.randrange(1, 8)
+            fitted = views.fit_text(text, width, max_lines, len)
+            lines = fitted.split("\n")
+            self.assertLessEqual(len(lines), max_lines)
+            self.assertTrue(all(len(line) <= width for line in lines))
+            if not fitted.endswith(views.ELLIPSIS):
+                self.assertEqual(
+                    "".join(fitted.split()), "".join(text.split())
+                )
+
+    def test_short_and_long_texts(self):
+        card = "Title\n\nDescription\n\tDeadline: 01/01/2024 00:00\n"
+        self.assertEqual(views.fit_text(card, 40, 6, len), card.rstrip("\n"))
+        self.assertEqual(
+            views.fit_text("aaa bbb ccc ddd eee", 7, 2, len),
+            "aaa bbb\nccc dd" + views.ELLIPSIS,
+        )
+        self.assertEqual(
+            views.fit_text("abcdefghij", 4, 5, len), "abcd\nefgh\nij"
+        )
+
+
+class FakeLabel:
+    """Label recording calls which change it."""
+
+    def __init__(self, style):
+        self.style = style
+        self.options = {}
+        self.packed = False
+        self.changes = 0
+
+    def configure(self, **options):
+        self.options.update(options)
+        self.changes += 1
+
+    def pack(self, **options):
+        self.packed = True
+        self.changes += 1
+
+    def pack_configure(self, **options):
+        self.changes += 1
+
+    def pack_forget(self):
+        self.packed = False
+        self.changes += 1
+
+
+class LabelPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+        def create(style):
+            self.created.append(FakeLabel(style))
+            return self.created[-1]
+
+        self.pool = views.LabelPool(
+            create,
+            {
+                "day": ({"font": "bold"}, {"pady": 10}),
+                "title": ({"font": "normal"}, {"pady": 2}),
+            },
+        )
+
+    def shown(self):
+        return [
+            (label.options["font"], label.options["text"])
+            for label in self.pool.labels
+            if label.packed
+        ]
+
+    def test_reuse(self):
+        self.pool.show([("day", "Mon"), ("title", "a"), ("title", "b")])
+        self.assertEqual(len(self.created), 3)
+        self.pool.show([("title", "Loading...")])
+        self.assertEqual(self.shown(), [("normal", "Loading...")])
+        self.pool.show([("day", "Tue"), ("title", "c")])
+        self.assertEqual(len(self.created), 3)
+        self.assertEqual(self.shown(), [("bold", "Tue"), ("normal", "c")])
+        self.pool.show(
+            [("day", "Tue"), ("title", "c"), ("day", "Wed"), ("title", "d")]
+        )
+        self.assertEqual(len(self.created), 4)
+        self.assertEqual(
+            self.shown(),
+            [
+                ("bold", "Tue"),
+                ("normal", "c"),
+                ("bold", "Wed"),
+                ("normal", "d"),
+            ],
+        )
+
+    def test_unchanged_items(self):
+        items = [("day", "Mon"), ("title", "a")]
+        self.pool.show(items)
+        changes = [label.changes for label in self.created]
+        self.pool.show(list(items))
+        self.assertEqual([label.changes for label in self.created], changes)
+        # Only the changed label is configured.
+        self.pool.show([("day", "Mon"), ("title", "b")])
+        self.assertEqual(self.created[0].changes, changes[0])
+        self.assertEqual(self.created[1].changes, changes[1] + 1)
@@ -1,7 +1,8 @@
 import gettext
+import math
 import os
 from datetime import date
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import customtkinter as tk
 from tkcalendar import DateEntry
@@ -88,26 +89,23 @@ class LoginView(tk.CTkFrame):
 class IBoardController:
     """Board controller interface to be used by BoardView."""
 
-    def get_project_names(self) -> List[str]:
-        """Returns project names. Always requested by BoardView.
+    def get_project_names(self, view):
+        """Start loading project names, they are passed to
+        view.show_project_names. Always requested by BoardView.
 
-        :return: list of project names
-        :rtype: List[str]
+        :param view: the view
+        :type view: views.BoardView
         """
         raise NotImplementedError()
 
-    def get_board_names_by_project_name(
-        self, view, project_name: str
-    ) -> List[str]:
-        """Given the project name returns list of borad names to display in
-        BoardView.
+    def get_board_names_by_project_name(self, view, project_name: str):
+        """Given the project name start loading board names, they are passed to
+        view.show_board_names.
 
         :param view: the view
         :type view: views.BoardView
         :param project_name: project name
         :type project_name: str
-        :return: list of board names
-        :rtype: List[str]
         """
         raise NotImplementedError()
 
@@ -150,7 +148,7 @@ class BoardView(tk.CTkFrame):
         )
         self.projects_combo = tk.CTkComboBox(
             self,
-            values=controller.get_project_names(),
+            values=[],
             command=lambda choice: self.on_project_choice(choice),
             font=PARAGRAPH_FONT,
             dropdown_font=PARAGRAPH_FONT,
@@ -191,15 +189,44 @@ class BoardView(tk.CTkFrame):
             text_color="red",
         ).place(rely=0.62, relwidth=1)
 
+        controller.get_project_names(self)
+
     def on_project_choice(self, choice):
-        """Display list of boards connected to project."""
+        """Load list of boards connected to project."""
         self.selected_project = choice
-        self.boards_combo.configure(
-            values=self.controller.get_board_names_by_project_name(
-                self, self.selected_project
-            )
+        self.selected_board = None
+        self.controller.get_board_names_by_project_name(
+            self, self.selected_project
         )
 
+    def show_projects_loading(self):
+        """Disable project choice while project names are loaded."""
+        self.projects_combo.set(_("Loading..."))
+        self.projects_combo.configure(state="disabled")
+
+    def show_project_names(self, names: List[str]):
+        """Display loaded project names.
+
+        :param names: project names
+        :type names: List[str]
+        """
+        self.projects_combo.configure(values=names, state="normal")
+        self.projects_combo.set("")
+
+    def show_boards_loading(self):
+        """Disable board choice while board names are loaded."""
+        self.boards_combo.set(_("Loading..."))
+        self.boards_combo.configure(state="disabled")
+
+    def show_board_names(self, names: List[str]):
+        """Display loaded board names.
+
+        :param names: board names
+        :type names: List[str]
+        """
+        self.boards_combo.configure(values=names, state="normal")
+        self.boards_combo.set("")
+
     def on_board_choice(self, choice: str):
         """Set the board chosen.
 
@@ -217,14 +244,474 @@ class BoardView(tk.CTkFrame):
         self.error.set(_("Board is not chosen!"))
 
 
+ELLIPSIS = "\u2026"
+
+
+def _split_word(
+    word: str, width: int, measure: Callable[[str], int]
+) -> List[str]:
+    """Split word wider than width into pieces fitting the width."""
+    pieces = []
+    while word:
+        # The longest prefix which fits, at least one character.
+        low, high = 1, len(word)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if measure(word[:middle]) <= width:
+                low = middle
+            else:
+                high = middle - 1
+        pieces.append(word[:low])
+        word = word[low:]
+    return pieces
+
+
+def fit_text(
+    text: str, width: int, max_lines: int, measure: Callable[[str], int]
+) -> str:
+    """Wrap text into lines not wider than width like Tk labels do and cut it
+    to max_lines lines, ending the last line with an ellipsis if some text is
+    cut.
+
+    :param text: text with lines separated by newlines
+    :type text: str
+    :param width: maximum line width in pixels
+    :type width: int
+    :param max_lines: maximum number of lines
+    :type max_lines: int
+    :param measure: function returning width of a string in pixels
+    :type measure: Callable[[str], int]
+    :return: text with lines separated by newlines
+    :rtype: str
+    """
+    lines: List[str] = []
+    for paragraph in text.rstrip("\n").split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if measure(candidate) <= width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            pieces = _split_word(word, width, measure) or [""]
+            lines += pieces[:-1]
+            line = pieces[-1]
+            if len(lines) > max_lines:
+                break
+        lines.append(line)
+        if len(lines) > max_lines:
+            break
+    if len(lines) <= max_lines:
+        return "\n".join(lines)
+    last = lines[max_lines - 1].rstrip()
+    while last and measure(last + ELLIPSIS) > width:
+        last = last[:-1].rstrip()
+    return "\n".join(lines[: max_lines - 1] + [last + ELLIPSIS])
+
+
+class ListWindow:
+    """Rows of a virtual list which are visible in its viewport.
+
+    Rows have the same height, so visible rows are computed from the
+    scroll offset without measuring widgets. Every row index is bound to
+    the slot index % pool_size, so rows keep their widgets while they
+    stay visible.
+    """
+
+    def __init__(self, row_height: int, buffer: int = 2):
+        """Create window of an empty list.
+
+        :param row_height: height of a row in pixels
+        :type row_height: int
+        :param buffer: number of rows prepared below the viewport
+        :type buffer: int
+        """
+        self.row_height = row_height
+        self.buffer = buffer
+        self.count = 0
+        self.height = 0
+        self.offset = 0
+
+    def pool_size(self) -> int:
+        """Get number of row widgets needed for the viewport height.
+
+        :return: number of row widgets
+        :rtype: int
+        """
+        return math.ceil(self.height / self.row_height) + 1 + self.buffer
+
+    def max_offset(self) -> int:
+        """Get offset of the viewport scrolled to the end.
+
+        :return: offset in pixels
+        :rtype: int
+        """
+        return max(0, self.count * self.row_height - self.height)
+
+    def set_count(self, count: int, keep_offset: bool = False):
+        """Set number of rows and scroll to the beginning unless the offset is
+        kept.
+
+        :param count: number of rows
+        :type count: int
+        :param keep_offset: keep the viewport where it is if the list is
+            still long enough, for example when rows are added
+        :type keep_offset: bool
+        """
+        self.count = count
+        self.scroll_to(self.offset if keep_offset else 0)
+
+    def resize(self, height: int):
+        """Set viewport height.
+
+        :param height: height in pixels
+        :type height: int
+        """
+        self.height = height
+        self.scroll_to(self.offset)
+
+    def scroll_to(self, offset: float):
+        """Scroll to offset keeping the viewport inside the list.
+
+        :param offset: offset of the viewport top in pixels
+        :type offset: float
+        """
+        self.offset = int(min(max(offset, 0), self.max_offset()))
+
+    def scroll_by(self, pixels: float):
+        """Scroll down by pixels, up if negative.
+
+        :param pixels: number of pixels
+        :type pixels: float
+        """
+        self.scroll_to(self.offset + pixels)
+
+    def moveto(self, fraction: float):
+        """Scroll to the fraction of the list like a scrollbar does.
+
+        :param fraction: fraction of the list above the viewport
+        :type fraction: float
+        """
+        self.scroll_to(fraction * self.count * self.row_height)
+
+    def fraction(self) -> Tuple[float, float]:
+        """Get fractions of the list above the viewport top and bottom.
+
+        :return: first and last visible fractions for a scrollbar
+        :rtype: Tuple[float, float]
+        """
+        total = self.count * self.row_height
+        if total <= self.height:
+            return 0.0, 1.0
+        return self.offset / total, (self.offset + self.height) / total
+
+    def rows(self) -> List[Tuple[int, int]]:
+        """Get rows which should have widgets.
+
+        :return: row indices and their positions relative to the
+            viewport top
+        :rtype: List[Tuple[int, int]]
+        """
+        first = self.offset // self.row_height
+        last = min(first + self.pool_size(), self.count)
+        return [
+            (index, index * self.row_height - self.offset)
+            for index in range(first, last)
+        ]
+
+    def row_at(self, y: float) -> Optional[int]:
+        """Get row under the point of the viewport.
+
+        :param y: position relative to the viewport top in pixels
+        :type y: float
+        :return: row index or None if there is no row at the point
+        :rtype: Optional[int]
+        """
+        index = int((self.offset + y) // self.row_height)
+        if y < 0 or index >= self.count:
+            return None
+        return index
+
+
+class VirtualList(tk.CTkFrame):
+    """Scrollable list of text cards creating widgets only for the visible
+    cards.
+
+    The number of label widgets depends only on the viewport height,
+    labels are moved and get texts of other cards while scrolling. Texts
+    and positions of labels are remembered, so labels are configured
+    only when they change and showing the same list again is almost
+    free. Cards have the same height, so texts are wrapped and cut to
+    the lines fitting a card, and clicking a card passes its index to
+    on_open to show the full text.
+    """
+
+    def __init__(
+        self,
+        parent,
+        get_text: Callable[[int], str],
+        font: tk.CTkFont,
+        on_open: Callable[[int], None],
+        row_height: int = 160,
+        buffer: int = 2,
+    ):
+        """Create empty list.
+
+        :param parent: CTk parent
+        :type parent:
+        :param get_text: function returning text of the card by index
+        :type get_text: Callable[[int], str]
+        :param font: font of card texts
+        :type font: tk.CTkFont
+        :param on_open: function called with index of a clicked card
+        :type on_open: Callable[[int], None]
+        :param row_height: height of a card with padding in pixels
+        :type row_height: int
+        :param buffer: number of cards prepared below the viewport
+        :type buffer: int
+        """
+        tk.CTkFrame.__init__(self, parent)
+        self.get_text = get_text
+        self.font = font
+        self.on_open = on_open
+        self.window = ListWindow(row_height, buffer)
+        self.body = tk.CTkFrame(self, fg_color="transparent")
+        self.body.place(relx=0, rely=0, relheight=1, relwidth=0.97)
+        self.scrollbar = tk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.place(relx=1, rely=0, relheight=1, anchor="ne")
+        self.labels: List[tk.CTkLabel] = []
+        self.label_indices: List[Optional[int]] = []
+        self.label_texts: List[Optional[str]] = []
+        self.label_ys: List[Optional[int]] = []
+        self.wraplength: Optional[int] = None
+        self.max_lines = max(1, (row_height - 20) // font.metrics("linespace"))
+        self.shown_fraction: Optional[Tuple[float, float]] = None
+        self.body.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self.body)
+
+    def bind_wheel(self, widget):
+        """Scroll the list by mouse wheel over the widget.
+
+        :param widget: widget receiving wheel events
+        :type widget:
+        """
+        widget.bind(
+            "<MouseWheel>", lambda event: self.scroll(-event.delta / 120)
+        )
+        widget.bind("<Button-4>", lambda event: self.scroll(-1))
+        widget.bind("<Button-5>", lambda event: self.scroll(1))
+
+    def scroll(self, units: float):
+        """Scroll by units of a third of a card.
+
+        :param units: number of units, negative to scroll up
+        :type units: float
+        """
+        self.window.scroll_by(units * self.window.row_height / 3)
+        self.refresh()
+
+    def on_click(self, label, event):
+        """Open the card under the mouse pointer.
+
+        :param label: clicked label
+        :type label:
+        :param event: click event with position relative to the label
+        :type event:
+        """
+        # Labels are placed in the body relative to the viewport top.
+        y = (label.winfo_y() + event.y) / self._get_widget_scaling()
+        index = self.window.row_at(y)
+        if index is not None:
+            self.on_open(index)
+
+    def on_scrollbar(self, action: str, value: str, unit: str = ""):
+        """Scroll by scrollbar command.
+
+        :param action: "moveto" or "scroll"
+        :type action: str
+        :param value: fraction for moveto or number of units
+        :type value: str
+        :param unit: "units" or "pages"
+        :type unit: str
+        """
+        if action == "moveto":
+            self.window.moveto(float(value))
+        elif unit == "pages":
+            self.window.scroll_by(float(value) * self.window.height)
+        else:
+            self.window.scroll_by(float(value) * self.window.row_height / 3)
+        self.refresh()
+
+    def on_resize(self, event):
+        """Create or destroy labels to fill the new viewport height."""
+        # Event sizes are in pixels, CTk sizes and fonts are scaled.
+        scaling = self._get_widget_scaling()
+        self.window.resize(round(event.height / scaling))
+        while len(self.labels) < self.window.pool_size():
+            label = tk.CTkLabel(
+                self.body,
+                text="",
+                font=self.font,
+                anchor="nw",
+                justify="left",
+                bg_color="gray28",
+                height=self.window.row_height - 10,
+                cursor="hand2",
+            )
+            self.bind_wheel(label)
+            label.bind(
+                "<Button-1>",
+                lambda event, label=label: self.on_click(label, event),
+            )
+            self.labels.append(label)
+            self.label_texts.append("")
+            self.label_ys.append(None)
+            if self.wraplength is not None:
+                label.configure(wraplength=self.wraplength)
+        while len(self.labels) > self.window.pool_size():
+            self.labels.pop().destroy()
+            self.label_texts.pop()
+            self.label_ys.pop()
+        wraplength = max(round(event.width / scaling) - 30, 100)
+        if wraplength != self.wraplength:
+            self.wraplength = wraplength
+            for label in self.labels:
+                label.configure(wraplength=wraplength)
+        # Slots of rows depend on the pool size.
+        self.label_indices = [None] * len(self.labels)
+        self.refresh()
+
+    def set_count(self, count: int, keep_offset: bool = False):
+        """Show first cards of the new list, or the same cards if the scroll
+        position is kept.
+
+        :param count: number of cards
+        :type count: int
+        :param keep_offset: keep the scroll position and update texts of
+            the visible cards, for example when the list grows while
+            loading
+        :type keep_offset: bool
+        """
+        self.window.set_count(count, keep_offset)
+        self.label_indices = [None] * len(self.labels)
+        self.refresh()
+
+    def refresh(self):
+        """Place labels of the visible cards, getting texts only of the cards
+        which just became visible and configuring only labels which texts or
+        positions changed."""
+        used = set()
+        if self.labels:
+            for index, y in self.window.rows():
+                slot = index % len(self.labels)
+                label = self.labels[slot]
+                if self.label_indices[slot] != index:
+                    text = fit_text(
+                        self.get_text(index),
+                        self.wraplength,
+                        self.max_lines,
+                        self.font.measure,
+                    )
+                    if self.label_texts[slot] != text:
+                        label.configure(text=text)
+                        self.label_texts[slot] = text
+                    self.label_indices[slot] = index
+                if self.label_ys[slot] != y:
+                    label.place(x=5, y=y + 5, relwidth=0.98)
+                    self.label_ys[slot] = y
+                used.add(slot)
+        for slot, label in enumerate(self.labels):
+            if slot not in used:
+                if self.label_ys[slot] is not None:
+                    label.place_forget()
+                    self.label_ys[slot] = None
+                self.label_indices[slot] = None
+        fraction = self.window.fraction()
+        if fraction != self.shown_fraction:
+            self.scrollbar.set(*fraction)
+            self.shown_fraction = fraction
+
+
+class LabelPool:
+    """Labels packed into a frame which are reused between updates.
+
+    Labels are never destroyed: an update changes texts and styles only
+    of labels which show something else, packs missing labels and
+    forgets extra ones. Updating with the shown items does nothing.
+
+    :param create: function creating a label by style name
+    :param styles: label options and pack options by style name
+    :param labels: created labels in the packing order
+    :param shown: style names and texts of the packed labels
+    """
+
+    def __init__(
+        self,
+        create: Callable[[str], Any],
+        styles: Dict[str, Tuple[dict, dict]],
+    ):
+        """Create empty pool.
+
+        :param create: function creating a label by style name
+        :type create: Callable[[str], Any]
+        :param styles: label options and pack options by style name
+        :type styles: Dict[str, Tuple[dict, dict]]
+        """
+        self.create = create
+        self.styles = styles
+        self.labels: List[Any] = []
+        self.shown: List[Tuple[str, str]] = []
+
+    def show(self, items: List[Tuple[str, str]]):
+        """Show labels with given styles and texts in the order of items.
+
+        :param items: style names and texts
+        :type items: List[Tuple[str, str]]
+        """
+        if items == self.shown:
+            return
+        for i, (style, text) in enumerate(items):
+            options, pack_options = self.styles[style]
+            if i == len(self.labels):
+                self.labels.append(self.create(style))
+                self.labels[i].configure(text=text, **options)
+            elif i >= len(self.shown) or self.shown[i][0] != style:
+                self.labels[i].configure(text=text, **options)
+            elif self.shown[i][1] != text:
+                self.labels[i].configure(text=text)
+            if i >= len(self.shown):
+                # Only the tail is forgotten, so packing to the end keeps
+                # the order of labels.
+                self.labels[i].pack(**pack_options)
+            elif self.shown[i][0] != style:
+                self.labels[i].pack_configure(**pack_options)
+        for i in range(len(items), len(self.shown)):
+            self.labels[i].pack_forget()
+        self.shown = list(items)
+
+
 class ITasksController:
     """Tasks controller interface to be implemented."""
 
-    def get_filtered_tasks(
-        self, view, begin_date: date, end_date: date
-    ) -> List[str]:
-        """Get card texts by the begin and end dates. Should be called from
-        TasksView.
+    def get_filtered_tasks(self, view, begin_date: date, end_date: date):
+        """Start loading card texts by the begin and end dates, their number is
+        passed to view.show_tasks, possibly several times while the board is
+        loading. Should be called from TasksView.
+
+        :param view: the view
+        :type view: views.TasksView
+        :param begin_date: the begin date
+        :type begin_date: date
+        :param end_date: the end date
+        :type end_date: date
+        """
+        raise NotImplementedError()
+
+    def get_daily_plan(self, view, begin_date: date, end_date: date):
+        """Start loading titles of the most prioritized tasks for every day
+        between the begin and end dates, they are passed to view.show_plan.
+        Should be called from TasksView.
 
         :param view: the view
         :type view: views.TasksView
@@ -232,8 +719,32 @@ class ITasksController:
         :type begin_date: date
         :param end_date: the end date
         :type end_date: date
-        :return: list of card texts
-        :rtype: List[str]
+        """
+        raise NotImplementedError()
+
+    def get_tasks_count(self) -> int:
+        """Get number of cards for the last requested dates.
+
+        :return: number of cards
+        :rtype: int
+        """
+        raise NotImplementedError()
+
+    def get_card_text(self, index: int) -> str:
+        """Get text of the card by its position for the last requested dates.
+
+        :param index: position of the card
+        :type index: int
+        :return: card text
+        :rtype: str
+        """
+        raise NotImplementedError()
+
+    def refresh_tasks(self, view):
+        """Synchronize loaded tasks with YouGile and show them again.
+
+        :param view: the view
+        :type view: views.TasksView
         """
         raise NotImplementedError()
 
@@ -257,7 +768,9 @@ class TasksView(tk.CTkFrame):
         tk.CTkFrame.__init__(self, parent)
 
         HEADER2_FONT = tk.CTkFont(size=22)
+        HEADER3_FONT = tk.CTkFont(size=18, weight="bold")
         PARAGRAPH_FONT = tk.CTkFont(size=16)
+        TEXT_COLOR = tk.ThemeManager.theme["CTkLabel"]["text_color"]
 
         self.controller = controller
 
@@ -273,9 +786,74 @@ class TasksView(tk.CTkFrame):
             rely=0.05, relx=0.2, relwidth=0.6
         )
 
+        tk.CTkButton(
+            self,
+            text=_("Refresh"),
+            font=PARAGRAPH_FONT,
+            command=lambda: self.controller.refresh_tasks(self),
+        ).place(rely=0.05, relx=0.8, relheight=0.05, relwidth=0.15)
+
+        self.status = tk.CTkLabel(self, text="", font=PARAGRAPH_FONT)
+        self.status.place(rely=0.1, relx=0.2, relwidth=0.6)
+
+        # Plans and messages are shown in tasks_area, ranked cards are
+        # shown in the virtual list in the same place.
         self.tasks_area = tk.CTkScrollableFrame(self)
         self.tasks_area.place(rely=0.15, relheight=0.55, relwidth=1)
-        self.tasks: List[tk.CTkLabel] = []
+        self.showing_cards = False
+        # Every style sets all options which differ between styles, so a
+        # label can be switched to any of them.
+        self.tasks = LabelPool(
+            lambda style: tk.CTkLabel(self.tasks_area),
+            {
+                "message": (
+                    dict(
+                        font=PARAGRAPH_FONT,
+                        anchor="center",
+                        justify="center",
+                        bg_color="transparent",
+                        text_color=TEXT_COLOR,
+                    ),
+                    dict(fill="none", padx=0, pady=0),
+                ),
+                "error": (
+                    dict(
+                        font=PARAGRAPH_FONT,
+                        anchor="center",
+                        justify="center",
+                        bg_color="transparent",
+                        text_color="red",
+                    ),
+                    dict(fill="none", padx=0, pady=0),
+                ),
+                "day": (
+                    dict(
+                        font=HEADER3_FONT,
+                        anchor="w",
+                        justify="left",
+                        bg_color="transparent",
+                        text_color=TEXT_COLOR,
+                    ),
+                    dict(fill="x", padx=5, pady=(10, 0)),
+                ),
+                "title": (
+                    dict(
+                        font=PARAGRAPH_FONT,
+                        anchor="w",
+                        justify="left",
+                        bg_color="gray28",
+                        text_color=TEXT_COLOR,
+                    ),
+                    dict(fill="x", padx=5, pady=2),
+                ),
+            },
+        )
+        self.cards = VirtualList(
+            self,
+            self.controller.get_card_text,
+            PARAGRAPH_FONT,
+            self.show_card,
+        )
 
         tk.CTkLabel(self, text=_("From"), font=PARAGRAPH_FONT).place(
             rely=0.75, relx=0.2, relwidth=0.2
@@ -301,42 +879,94 @@ class TasksView(tk.CTkFrame):
             text=_("Get tasks"),
             font=PARAGRAPH_FONT,
             command=lambda: self.on_get_tasks(),
-        ).place(rely=0.9, relx=0.2, relwidth=0.6)
+        ).place(rely=0.9, relx=0.2, relwidth=0.29)
+
+        tk.CTkButton(
+            self,
+            text=_("Plan by days"),
+            font=PARAGRAPH_FONT,
+            command=lambda: self.on_get_plan(),
+        ).place(rely=0.9, relx=0.51, relwidth=0.29)
 
     def on_get_tasks(self):
         """Event happening on button pressed."""
-        PARAGRAPH_FONT = tk.CTkFont(size=16)
+        self.controller.get_filtered_tasks(
+            self, self.begin_date.get_date(), self.end_date.get_date()
+        )
 
-        new_task_texts = self.controller.get_filtered_tasks(
+    def on_get_plan(self):
+        """Event happening on plan button pressed."""
+        self.controller.get_daily_plan(
             self, self.begin_date.get_date(), self.end_date.get_date()
         )
-        for task in self.tasks:
-            task.pack_forget()
-            task.destroy()
-
-        self.tasks = []
-        for text in new_task_texts:
-            task = tk.CTkLabel(
-                self.tasks_area,
-                text=text,
-                font=PARAGRAPH_FONT,
-                anchor="w",
-                justify="left",
-                bg_color="gray28",
-            )
-            self.tasks.append(task)
-            task.pack(fill="x", padx=5, pady=5)
+
+    def show_area(self, items: List[Tuple[str, str]]):
+        """Show the area for plans and messages instead of the cards.
+
+        :param items: style names and texts of labels in the area
+        :type items: List[Tuple[str, str]]
+        """
+        if self.showing_cards:
+            self.cards.place_forget()
+            self.tasks_area.place(rely=0.15, relheight=0.55, relwidth=1)
+            self.showing_cards = False
+        self.tasks.show(items)
+
+    def show_loading(self):
+        """Show that tasks are being loaded."""
+        self.show_area([("message", _("Loading..."))])
+
+    def show_tasks(self, count: int):
+        """Replace the list by loaded cards, which texts are requested from the
+        controller when they become visible. If cards are already shown, for
+        example while tasks are still loading, the scroll position is kept.
+
+        :param count: number of cards
+        :type count: int
+        """
+        if self.showing_cards:
+            self.cards.set_count(count, keep_offset=True)
+            return
+        self.tasks_area.place_forget()
+        self.cards.place(rely=0.15, relheight=0.55, relwidth=1)
+        self.showing_cards = True
+        self.cards.set_count(count)
+
+    def show_plan(self, plan: List[Tuple[str, List[str]]]):
+        """Replace the list by loaded plan.
+
+        :param plan: list of day names and task titles
+        :type plan: List[Tuple[str, List[str]]]
+        """
+        items = []
+        for day, titles in plan:
+            items.append(("day", day))
+            items.extend(("title", title) for title in titles)
+        self.show_area(items)
+
+    def show_card(self, index: int):
+        """Show full text of the card in a separate window.
+
+        :param index: index of the card
+        :type index: int
+        """
+        window = tk.CTkToplevel(self)
+        window.title(_("Task"))
+        window.geometry("500x400")
+        text = tk.CTkTextbox(window, font=self.cards.font, wrap="word")
+        text.insert("1.0", self.controller.get_card_text(index))
+        text.configure(state="disabled")
+        text.pack(fill="both", expand=True, padx=10, pady=10)
+        window.after(100, window.focus)
+
+    def show_status(self, text: str):
+        """Show result of the last refresh above the list.
+
+        :param text: status text
+        :type text: str
+        """
+        self.status.configure(text=text)
 
     def on_error(self):
         """Print error on a screen."""
-        PARAGRAPH_FONT = tk.CTkFont(size=16)
-
-        self.tasks = [
-            tk.CTkLabel(
-                self.tasks_area,
-                text=_("Couldn't load tasks!"),
-                font=PARAGRAPH_FONT,
-                text_color="red",
-            )
-        ]
-        self.tasks[0].pack()
+        self.show_area([("error", _("Couldn't load tasks!"))])